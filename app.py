@@ -2,11 +2,21 @@
 # Streamlit UI — entry point.
 # All analysis goes through graph.py which uses the real LangGraph StateGraph.
 
+import hashlib
+import html
+import json
 import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 import streamlit as st
-from graph import run_graph, compiled_graph
+import rules
+from escalation import AUTO
+from graph import run_direct, run_graph, speculate
+from logstore import ingest
+from report_html import render_report
 from samples import SAMPLES
+from streaming import StreamDetector, iter_source
 
 # ── Page config ───────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -15,6 +25,116 @@ st.set_page_config(
     layout="wide",
 )
 
+REPORT_CACHE_SIZE = 128   # reports kept in memory, shared by every session
+PREVIEW_LINES     = 200   # lines per page of the large-log preview
+
+# ── Result cache ──────────────────────────────────────────────────────────────
+
+@st.cache_resource
+def _report_cache() -> tuple[OrderedDict, threading.Lock]:
+    """Process-wide LRU of finished reports — one instance shared across sessions."""
+    return OrderedDict(), threading.Lock()
+
+
+def _report_key(content_sha: str, model: str, with_llm: bool) -> str:
+    # The rule set is part of the key: a reloaded rule pack may classify differently.
+    version = rules.current().version
+    return hashlib.sha256(f"{content_sha}\0{model}\0{int(with_llm)}\0{version}".encode()).hexdigest()
+
+
+def _text_sha(logs: str) -> str:
+    return hashlib.sha256(logs.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def analyze_cached(logs: str, groq_api_key: str, model: str, handle=None, on_partial=None,
+                   speculative: bool = False) -> tuple[dict, bool]:
+    """
+    run_graph memoized on (logs, model, key present). Returns (report, cached).
+    With a logstore handle, the stored file is analyzed by path and keyed on its hash.
+    Reports that fell back after an LLM error are not kept, so the next click retries.
+    on_partial receives partial reports while the LLM answer streams in. With
+    `speculative` it first receives the rule-based report, right after detection.
+    """
+    key = _report_key(handle.sha256 if handle else _text_sha(logs), model, bool(groq_api_key))
+    cache, lock = _report_cache()
+    with lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key], True
+
+    if speculative and groq_api_key:
+        # Rule-based report now; the LLM's fields replace it as they arrive
+        spec = speculate("" if handle else logs, groq_api_key, model, handle.path if handle else None)
+        if on_partial:
+            on_partial(spec.report)
+            for update in spec.updates():
+                on_partial(update)
+        report = spec.result()
+    else:
+        # No key: the deterministic executor gives the same report without LangGraph dispatch
+        runner = run_graph if groq_api_key else run_direct
+        report = runner(raw_logs="" if handle else logs, groq_api_key=groq_api_key, model=model,
+                        log_path=handle.path if handle else None, on_partial=on_partial)
+    if report and not (groq_api_key and report.get("analysis_source") == "fallback"):
+        with lock:
+            cache[key] = report
+            while len(cache) > REPORT_CACHE_SIZE:
+                cache.popitem(last=False)
+    return report, False
+
+
+@st.cache_data(max_entries=REPORT_CACHE_SIZE, show_spinner=False)
+def _report_html(digest: str, _report: dict) -> str:
+    """Rendered report view, keyed on the report's content hash (the dict itself is not hashed)."""
+    return render_report(_report)
+
+
+# ── Large logs ────────────────────────────────────────────────────────────────
+
+def _ingest_upload(upload):
+    """Copy an upload into the logstore once per file; keep only the handle in the session."""
+    held = st.session_state.get("log_handle")
+    if held and held["file_id"] == upload.file_id and os.path.exists(held["handle"].path):
+        return held
+    handle = ingest(upload, upload.name)
+
+    det = StreamDetector()
+    for chunk in iter_source(handle.path):
+        det.feed(chunk)
+        if det.done:
+            break
+    det.result()
+    held = {"file_id": upload.file_id, "handle": handle, "matches": handle.line_numbers(det.evidence)}
+    st.session_state["log_handle"] = held
+    return held
+
+
+def _jump_to_match() -> None:
+    line = st.session_state.get("preview_match")
+    if line is not None:
+        st.session_state["preview_page"] = line // PREVIEW_LINES + 1
+
+
+def _render_preview(handle, matches: list) -> None:
+    """One page of the stored log — only PREVIEW_LINES lines ever reach the browser."""
+    pages = max(1, -(-handle.line_count // PREVIEW_LINES))
+    c_page, c_jump = st.columns([1, 2])
+    with c_page:
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key="preview_page")
+    with c_jump:
+        if matches:
+            st.selectbox("Jump to match", matches, index=None, key="preview_match",
+                         format_func=lambda n: f"line {n + 1}", on_change=_jump_to_match,
+                         placeholder=f"{len(matches)} matched lines")
+
+    first, hit = (page - 1) * PREVIEW_LINES, set(matches)
+    rows = []
+    for n, line in enumerate(handle.read_lines(first, PREVIEW_LINES), start=first):
+        cls = "pv-line pv-hit" if n in hit else "pv-line"
+        rows.append(f'<div class="{cls}"><span class="pv-n">{n + 1}</span>{html.escape(line[:500])}</div>')
+    st.markdown(f'<div class="preview">{"".join(rows)}</div>', unsafe_allow_html=True)
+
+
 # ── CSS ───────────────────────────────────────────────────────────────────────
 st.markdown("""
 <style>
@@ -112,6 +232,19 @@ html, body, [data-testid="stAppViewContainer"] {
     font-size:0.75rem; padding:0.55rem 0.9rem; border-radius:4px; margin:0.3rem 0;
 }
 
+/* Report layout — two columns inside one fragment */
+.report-grid { display:grid; grid-template-columns:1fr 1fr; gap:1rem; align-items:start; }
+@media (max-width: 900px) { .report-grid { grid-template-columns:1fr; } }
+
+/* Large-log preview */
+.preview {
+    background:white; border:1px solid #ddd9d0; border-radius:6px; max-height:420px;
+    overflow:auto; font-family:'IBM Plex Mono',monospace; font-size:0.7rem; padding:0.4rem 0;
+}
+.pv-line { white-space:pre; padding:0 0.7rem; color:#333; line-height:1.5; }
+.pv-hit  { background:#fff3b0; color:#111; font-weight:500; }
+.pv-n    { display:inline-block; min-width:4.5rem; color:#bbb; user-select:none; }
+
 /* Streamlit overrides */
 .stTextArea textarea {
     background:white !important; border:1px solid #ddd9d0 !important;
@@ -170,7 +303,15 @@ with st.sidebar:
     )
     model = st.selectbox(
         "Model",
-        ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768"],
+        [AUTO, "llama-3.3-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768"],
+        format_func=lambda m: "auto — 8b first, 70b if needed" if m == AUTO else m,
+        help="auto tries llama-3.1-8b-instant and escalates to llama-3.3-70b-versatile when its answer "
+             "is invalid or late, or when detection confidence is low.",
+    )
+    speculative = st.toggle(
+        "Instant rule-based report",
+        value=True,
+        help="Show the pattern-based report as soon as detection finishes; the LLM analysis replaces it as it arrives.",
     )
 
     st.markdown("---")
@@ -188,6 +329,9 @@ with st.sidebar:
         <span class="gnode">analyze_node</span>
               <span class="gedge">└──►</span> <span class="gnode">format_node</span>
                     <span class="gedge">└──► END</span>
+        <span class="gedge">├──(pattern)──►</span>
+        <span class="gnode">pattern_node</span>
+              <span class="gedge">└──►</span> <span class="gnode">format_node</span>
         <span class="gedge">└──(unknown)──►</span>
         <span class="gnode">unknown_node</span>
               <span class="gedge">└──► END</span>
@@ -199,12 +343,11 @@ with st.sidebar:
          color:#555;text-transform:uppercase;letter-spacing:0.15em;margin-bottom:0.5rem;">
          Detects
     </div>""", unsafe_allow_html=True)
-    for label in ["CrashLoopBackOff", "OOMKilled / Exit 137", "CreateContainerConfigError"]:
-        st.markdown(f"""
+    st.markdown("".join(f"""
         <div style="font-family:'IBM Plex Mono',monospace;font-size:0.7rem;
              color:#666;padding:0.2rem 0;">
-             <span style="color:#7dff94;">✓</span> {label}
-        </div>""", unsafe_allow_html=True)
+             <span style="color:#7dff94;">✓</span> {html.escape(rule.failure_type)}
+        </div>""" for rule in rules.current().rules), unsafe_allow_html=True)
 
     # (Upload UI removed)
 
@@ -213,15 +356,16 @@ st.markdown('<div class="title">K8s Debug Assistant</div>', unsafe_allow_html=Tr
 st.markdown("""
 <div class="subtitle">
     LangGraph StateGraph &nbsp;·&nbsp; LangChain ChatGroq &nbsp;·&nbsp;
-    Streamlit &nbsp;·&nbsp; 4-node conditional graph
+    Streamlit &nbsp;·&nbsp; 5-node conditional graph
 </div>""", unsafe_allow_html=True)
 
 # ── Input ──────────────────────────────────────────────────────────────────────
 col_in, col_info = st.columns([3, 2], gap="large")
 
 with col_in:
-    tab_paste, tab_sample = st.tabs(["PASTE LOGS", "SAMPLES"])
+    tab_paste, tab_sample, tab_large = st.tabs(["PASTE LOGS", "SAMPLES", "LARGE LOG"])
     log_text = ""
+    log_handle = None
 
     with tab_paste:
         v = st.text_area(
@@ -238,6 +382,17 @@ with col_in:
             log_text = SAMPLES[pick]
             st.code(log_text[:500] + "…", language="bash")
 
+    with tab_large:
+        # Uploaded once and kept server-side; reruns only carry the handle.
+        upload = st.file_uploader("Upload a log file", label_visibility="collapsed",
+                                  help="Stored on the server and analyzed from disk — use this for logs of many MB.")
+        if upload is not None:
+            held = _ingest_upload(upload)
+            log_handle = held["handle"]
+            st.caption(f"{log_handle.name} · {log_handle.size / 1e6:,.1f} MB · "
+                       f"{log_handle.line_count:,} lines · {len(held['matches'])} matched lines highlighted")
+            _render_preview(log_handle, held["matches"])
+
 with col_info:
     st.markdown("""
     <div class="card">
@@ -246,8 +401,9 @@ with col_info:
     for n, title, desc in [
         (1, "detect_node",  "Regex pattern detection → sets route = 'analyze' or 'unknown'"),
         (2, "analyze_node", "LangChain ChatGroq → structured JSON root cause + remediation"),
-        (3, "format_node",  "Merges all node outputs into final_report"),
-        (4, "unknown_node", "Fallback when no failure pattern matched (conditional edge)"),
+        (3, "pattern_node", "No API key → deterministic remediation from the pattern tables, no network"),
+        (4, "format_node",  "Merges all node outputs into final_report"),
+        (5, "unknown_node", "Fallback when no failure pattern matched (conditional edge)"),
     ]:
         st.markdown(f"""
         <div class="step" style="border-bottom:1px solid #f0ece4;">
@@ -268,95 +424,58 @@ _, bc, _ = st.columns([1, 1.4, 1])
 with bc:
     run = st.button("Run LangGraph Analysis →", use_container_width=True)
 
-# ── Analysis & Results ─────────────────────────────────────────────────────────
+# ── Analysis ───────────────────────────────────────────────────────────────────
+# An uploaded large log takes precedence over pasted text / samples.
+input_sha = log_handle.sha256 if log_handle else _text_sha(log_text)
+
 if run:
-    if not log_text.strip():
+    if log_handle is None and not log_text.strip():
         st.error("Paste logs, upload a file, or pick a sample first.")
         st.stop()
 
     if not groq_api_key:
         st.warning("No Groq API key — using pattern detection only. Add your key for LLM analysis.")
 
+    # The LLM answer streams in: each completed field re-renders this placeholder
+    live = st.empty()
+
+    def show_partial(partial: dict) -> None:
+        live.markdown(render_report(partial), unsafe_allow_html=True)
+
     with st.spinner("Running LangGraph graph…"):
-        report = run_graph(
-            raw_logs=log_text,
-            groq_api_key=groq_api_key or "",
-            model=model,
-        )
+        report, cached = analyze_cached(log_text, groq_api_key or "", model, log_handle, show_partial, speculative)
+    live.empty()
 
     if not report:
         st.error("Analysis returned no result.")
         st.stop()
 
-    st.markdown("---")
-
-    # ── Header row ─────────────────────────────────────────────────────────────
-    failure  = report.get("failure_type", "Unknown")
-    severity = report.get("severity", "high")
-    is_root  = report.get("is_root_cause", False)
-    conf     = report.get("confidence", "low")
-
-    sev_cls = {"critical": "badge-critical", "high": "badge-high", "medium": "badge-medium"}.get(severity, "badge-high")
-
-    st.markdown(f"""
-    <div style="margin-bottom:1rem;">
-        <div style="font-family:'IBM Plex Mono',monospace;font-size:1rem;font-weight:600;
-             color:#111;margin-bottom:0.5rem;">{failure}</div>
-        <span class="badge {'badge-cause' if is_root else 'badge-symptom'}">
-            {'⬤ Root Cause' if is_root else '◎ Symptom'}
-        </span>
-        <span class="badge {sev_cls}">{severity.upper()}</span>
-        <span style="font-family:'IBM Plex Mono',monospace;font-size:0.68rem;
-              color:#aaa;margin-left:0.3rem;">detection confidence: {conf}</span>
-    </div>""", unsafe_allow_html=True)
+    # Kept across reruns, so expanding the JSON or switching tabs re-renders
+    # the same report without running the graph again.
+    st.session_state["last_report"] = {
+        "report": report,
+        "cached": cached,
+        "key":    _report_key(input_sha, model, bool(groq_api_key)),
+        "digest": hashlib.sha256(json.dumps(report, sort_keys=True, default=str).encode()).hexdigest(),
+    }
 
-    # ── Two-column results ──────────────────────────────────────────────────────
-    left, right = st.columns(2, gap="medium")
+# ── Results ────────────────────────────────────────────────────────────────────
+last = st.session_state.get("last_report")
+if last:
+    report = last["report"]
 
-    with left:
-        # Root cause + explanation
-        st.markdown(f"""
-        <div class="card">
-            <div class="card-label">Root Cause</div>
-            <div class="root-cause-box">{report.get('root_cause', '—')}</div>
-            <div class="explanation-text">{report.get('explanation', '')}</div>
-        </div>""", unsafe_allow_html=True)
-
-        # Extracted signals
-        signals = report.get("signals") or {}
-        if signals:
-            st.markdown('<div class="card"><div class="card-label">Extracted Signals</div>',
-                        unsafe_allow_html=True)
-            for k, v in signals.items():
-                st.markdown(f"""
-                <div class="sig-row">
-                    <span class="sig-key">{k.replace('_',' ').title()}</span>
-                    <span class="sig-val">{v}</span>
-                </div>""", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-
-    with right:
-        # Remediation steps
-        steps = report.get("remediation_steps") or []
-        if steps:
-            st.markdown('<div class="card"><div class="card-label">Remediation Steps</div>',
-                        unsafe_allow_html=True)
-            for i, step in enumerate(steps, 1):
-                st.markdown(f"""
-                <div class="step">
-                    <div class="step-n">{i}</div>
-                    <div class="step-t">{step}</div>
-                </div>""", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
-
-        # kubectl commands
-        cmds = report.get("kubectl_commands") or []
-        if cmds:
-            st.markdown('<div class="card" style="margin-top:0;"><div class="card-label">Commands</div>',
-                        unsafe_allow_html=True)
-            for cmd in cmds:
-                st.markdown(f'<div class="cmd">$ {cmd}</div>', unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown("---")
+    if last["key"] != _report_key(input_sha, model, bool(groq_api_key)):
+        st.caption("Showing the previous result — the logs or model changed since. Run again to update.")
+    elif last["cached"]:
+        st.caption("Served from the result cache — same logs and model as an earlier run.")
+    elif report.get("analysis_source") == "coalesced":
+        st.caption("Shared with an identical analysis another session had in flight — one LLM call served both.")
+    if model == AUTO and report.get("analysis_model"):
+        st.caption(f"Answered by {report['analysis_model']}.")
+
+    # Whole report view as one escaped HTML fragment — a single delta to the browser
+    st.markdown(_report_html(last["digest"], report), unsafe_allow_html=True)
 
     # Raw JSON
     with st.expander("Full report JSON"):
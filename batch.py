@@ -0,0 +1,208 @@
+# batch.py
+# Headless batch triage — runs detection over a directory or tarball of per-pod
+# log files on every core, then the LLM stage with bounded concurrency.
+#
+#   python batch.py ./incident-logs/ -o reports.jsonl
+#   python batch.py incident.tar.gz --workers 8 --llm-concurrency 4
+#   python batch.py ./incident-logs/ --metrics-file batch.prom --spans-file spans.jsonl
+#
+# One JSON line per pod is written as soon as its report is ready; throughput
+# and per-stage timings go to stderr at the end. A pod whose file cannot be
+# read or analyzed gets a {"pod", "error"} line instead of stopping the batch.
+# Failing pods with the same fingerprint share one analysis (see grouping.py);
+# --no-group turns that off.
+
+import argparse
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import metrics
+from grouping import Groups
+from state import new_state
+from streaming import detect_file
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+TAR_SUFFIXES  = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+# ── Input discovery ───────────────────────────────────────────────────────────
+
+def discover(root: Path) -> list[tuple[str, Path]]:
+    """Return (pod_name, path) for every regular file under root, sorted."""
+    files = []
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        rel = path.relative_to(root).as_posix()
+        files.append((rel.rsplit(".", 1)[0] if "." in path.name else rel, path))
+    return files
+
+
+# ── Stage 1: detection (process pool) ────────────────────────────────────────
+
+def _detect_file(pod: str, path: str) -> dict:
+    """Worker: streaming detection plus, when needed, the prompt excerpt."""
+    t0    = time.perf_counter()
+    state = detect_file(path)
+    return {
+        "pod":     pod,
+        "state":   state,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# ── Stage 2: analysis (thread pool, I/O bound) ───────────────────────────────
+
+def _state(detected: dict, groq_api_key: str, model: str):
+    state = new_state(detected.pop("raw_logs"), groq_api_key, model)
+    state.update(detected)
+    return state
+
+
+def _analyze(pod: str, state) -> dict:
+    # Imported lazily so detection workers only load what detection needs.
+    from graph import run_nodes
+
+    t0 = time.perf_counter()
+    run_nodes(state)   # analyze, pattern-only (no API key) or unknown
+
+    return {
+        "pod":     pod,
+        "state":   state,
+        "report":  state["final_report"],
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# ── Driver ───────────────────────────────────────────────────────────────────
+
+def run_batch(root: Path, out, groq_api_key: str, model: str,
+              workers: int | None = None, llm_concurrency: int = 4, group: bool = True) -> dict:
+    """
+    Analyze every file under root, writing one JSON line per pod to `out`.
+    With `group`, only the first failing pod of each fingerprint is analyzed.
+    Returns timing stats.
+    """
+    files  = discover(root)
+    stats  = {"pods": len(files), "detect": [], "analyze": [], "errors": 0}
+    groups = Groups() if group else None
+    leads  = {}     # leader pod → its Group
+    t0 = time.perf_counter()
+
+    def write(pod, report, grp=None):
+        line = {"pod": pod, "report": report}
+        if grp is not None:
+            line["group"] = grp.key
+        out.write(json.dumps(line) + "\n")
+        out.flush()
+
+    def write_error(pod, name, exc, grp=None):
+        # One bad file (or failed analysis) costs its own row, not the batch
+        stats["errors"] += 1
+        line = {"pod": pod, "error": f"{name}: {type(exc).__name__}: {exc}"[:300]}
+        if grp is not None:
+            line["group"] = grp.key
+        out.write(json.dumps(line) + "\n")
+        out.flush()
+
+    with ProcessPoolExecutor(max_workers=workers) as procs, \
+         ThreadPoolExecutor(max_workers=llm_concurrency) as llm:
+        stage   = {procs.submit(_detect_file, pod, str(path)): ("detect", pod) for pod, path in files}
+        pending = set(stage)
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, pod = stage.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    grp = leads.pop(pod, None)
+                    write_error(pod, name, e, grp)
+                    for member, _ in groups.fail(grp) if grp else ():
+                        write_error(member, name, e, grp)
+                    continue
+                stats[name].append(result["seconds"])
+                if "report" in result:
+                    grp = leads.pop(pod, None)
+                    write(pod, result["report"], grp)
+                    for member, state in groups.done(grp, result["state"]) if grp else ():
+                        write(member, state["final_report"], grp)
+                    continue
+                state = _state(result["state"], groq_api_key, model)
+                if groups is not None and state["failure_type"]:
+                    grp, leader = groups.join(pod, state)
+                    if not leader:
+                        if grp.state is not None:     # else it comes back from groups.done()
+                            write(pod, groups.follow(grp, pod, state)["final_report"], grp)
+                        continue
+                    leads[pod] = grp
+                nxt = llm.submit(_analyze, pod, state)
+                stage[nxt] = ("analyze", pod)
+                pending.add(nxt)
+
+    stats["groups"]  = len(groups) if groups is not None else None
+    stats["grouped"] = sum(g.size for g in groups.groups.values()) if groups is not None else 0
+    stats["wall"] = time.perf_counter() - t0
+    return stats
+
+
+def _summary(stats: dict) -> str:
+    wall = stats["wall"]
+    lines = [f"{stats['pods']} pods in {wall:.2f}s — {stats['pods'] / wall if wall else 0:.1f} pods/sec"]
+    if stats.get("groups") is not None:
+        lines.append(f"  {stats['grouped']} failing pods in {stats['groups']} groups")
+    if stats.get("errors"):
+        lines.append(f"  {stats['errors']} pods failed (error rows in the output)")
+    for name in ("detect", "analyze"):
+        times = sorted(stats[name])
+        if not times:
+            continue
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        lines.append(
+            f"  {name:<8} total {sum(times):8.3f}s   mean {sum(times) / len(times) * 1000:8.1f}ms"
+            f"   p95 {p95 * 1000:8.1f}ms   max {times[-1] * 1000:8.1f}ms"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Batch-triage a directory or tarball of per-pod logs.")
+    parser.add_argument("input", type=Path, help="directory of log files, or a .tar/.tar.gz of them")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--workers", type=int, default=None, help="detection processes (default: all cores)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="concurrent LLM calls")
+    parser.add_argument("--no-group", action="store_true", help="analyze every failing pod, even identical ones")
+    metrics.add_options(parser)
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("GROQ_API_KEY", "")
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    try:
+        with metrics.exposed(args):
+            if args.input.is_dir():
+                stats = run_batch(args.input, out, api_key, args.model, args.workers, args.llm_concurrency,
+                                  not args.no_group)
+            elif args.input.name.endswith(TAR_SUFFIXES):
+                with tempfile.TemporaryDirectory() as tmp, tarfile.open(args.input) as tar:
+                    tar.extractall(tmp, filter="data")
+                    stats = run_batch(Path(tmp), out, api_key, args.model, args.workers, args.llm_concurrency,
+                                      not args.no_group)
+            else:
+                parser.error(f"{args.input} is not a directory or tarball")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(_summary(stats), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+# bench/
+# Offline benchmark suite: synthetic log generator, per-stage timing with a
+# stubbed LLM, and baseline comparison. Run from the repo root:
+#
+#   python -m bench                          # default sizes 1K..16M
+#   python -m bench --sizes 1K,1M,1G --stages detect_stream
+#   python -m bench --save-baseline          # write bench/baseline.json
+#   python -m bench --compare                # exit 1 on >20% regressions
+#   python -m bench --stages concurrent      # upstream LLM calls per burst of identical requests
+#   python -m bench.loadtest --requests 200   # real clients against the local fake Groq server
@@ -0,0 +1,351 @@
+# bench/__main__.py
+# CLI entry point — see bench/__init__.py for usage.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+os.environ.setdefault("KUBE_DEBUG_CACHE", "off")    # measure the real path, not cache hits
+
+from bench.generator import generate, write_payload, write_rule_pack
+from bench.measure import compare, measure, measure_import, percentile, save_baseline
+from bench.stub import StubLLM, install
+
+MODEL            = "llama-3.3-70b-versatile"
+DEFAULT_SIZES    = "1K,64K,1M,16M"
+DEFAULT_RULES    = "0,100,300"   # synthetic rules added on top of rulepacks/ by the rules stage
+DEFAULT_CLIENTS  = 16            # simultaneous identical requests in the concurrent stage
+STUB_LATENCY     = 0.05          # seconds per stubbed LLM call in the concurrent and stream stages
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+IN_MEMORY_LIMIT  = 256 << 20     # larger payloads only run the streaming stage
+APPEND_STEPS     = 51            # appends prepared for the append stage (≥ warm-up + max repeats)
+_UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+STUB = StubLLM()   # the LLM every stage talks to; stages that want overlap give it latency
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper().rstrip("B")
+    return int(float(text[:-1]) * _UNITS[text[-1]]) if text[-1] in _UNITS else int(text)
+
+
+def repeats_for(size: int) -> int:
+    return max(3, min(50, (32 << 20) // max(size, 1)))
+
+
+# ── Stages ───────────────────────────────────────────────────────────────────
+# Each stage takes (text, path) and returns a zero-arg callable to time.
+
+def stage_detect(text, path):
+    from detector import detect_node
+    from state import new_state
+    return lambda: detect_node(new_state(text, "", MODEL))
+
+
+def stage_append(text, path):
+    """Re-detection of a large log that grew: each call sees the previous text plus 1% of the payload."""
+    from detector import detect_node
+    from state import new_state
+    from streaming import forget_appended
+    step  = max(len(text) // 100, 1)
+    start = max(len(text) - step * APPEND_STEPS, 0)
+    texts = iter([text[:start + step * i] for i in range(1, APPEND_STEPS + 1)])
+    forget_appended()
+    detect_node(new_state(text[:start], "", MODEL))
+    return lambda: detect_node(new_state(next(texts), "", MODEL))
+
+
+def stage_detect_stream(text, path):
+    from streaming import detect_stream
+    return lambda: detect_stream(path)
+
+
+def stage_prompt(text, path):
+    from detector import detect_node
+    from nodes import _build_messages
+    from state import new_state
+    detected = detect_node(new_state(text, "", MODEL))
+    return lambda: _build_messages(dict(detected, log_excerpt=None))
+
+
+def stage_nodes(text, path):
+    """detect → analyze → format called directly: the graph's work without LangGraph."""
+    from detector import detect_node
+    from nodes import analyze_node, format_node, unknown_node
+    from state import new_state
+
+    def run():
+        state = detect_node(new_state(text, "stub", MODEL))
+        return format_node(analyze_node(state)) if state["route"] == "analyze" else unknown_node(state)
+    return run
+
+
+def stage_graph(text, path):
+    from graph import run_graph
+    return lambda: run_graph(text, "stub", MODEL)
+
+
+def stage_pattern(text, path):
+    """Direct executor with no API key. Checks it matches the LangGraph run first."""
+    from graph import run_direct, run_graph
+    for key in ("", "stub"):
+        direct, graph = run_direct(text, key, MODEL), run_graph(text, key, MODEL)
+        if direct != graph:
+            diff = sorted(k for k in direct.keys() | graph.keys() if direct.get(k) != graph.get(k))
+            raise AssertionError(f"run_direct differs from run_graph (key={key!r}): {', '.join(diff)}")
+    return lambda: run_direct(text, "", MODEL)
+
+
+STAGES = {
+    "detect":        stage_detect,
+    "append":        stage_append,
+    "detect_stream": stage_detect_stream,
+    "prompt":        stage_prompt,
+    "nodes":         stage_nodes,
+    "graph":         stage_graph,
+    "pattern":       stage_pattern,
+}
+STREAMING_STAGES = {"detect_stream"}
+WARM_STAGES      = {"append"}          # every other stage starts from cold detection state
+
+# Cold-start stage: import time of the modules short-lived jobs and workers load.
+IMPORT_STAGE   = "import"
+IMPORT_MODULES = ("detector", "streaming", "nodes", "graph", "batch")
+
+# Rule-count stage: the detect stage with N synthetic rules loaded, one result per count.
+RULES_STAGE = "rules"
+
+# Concurrent stage: bursts of identical run_graph calls against a slow stub LLM,
+# with the single-flight on and off; results carry upstream calls per burst.
+CONCURRENT_STAGE = "concurrent"
+
+# LLM streaming stage: run_graph with on_partial against a slow streaming stub;
+# results carry the time until the root cause was shown.
+LLM_STREAM_STAGE = "llm_stream"
+
+# Speculative stage: graph.speculate against the same slow streaming stub; the
+# first report (rule-based, complete) arrives when detection finishes.
+SPECULATIVE_STAGE = "speculative"
+
+SPECIAL_STAGES = (IMPORT_STAGE, RULES_STAGE, CONCURRENT_STAGE, LLM_STREAM_STAGE, SPECULATIVE_STAGE)
+
+
+def _cold(fn):
+    """Forget appended-log state before each call, so repeats of one text aren't resumed."""
+    from streaming import forget_appended
+    def run():
+        forget_appended()
+        return fn()
+    return run
+
+
+def _with_rules(count: int, tmp: str) -> None:
+    """Load rulepacks/ plus `count` synthetic rules (0 = the shipped packs only)."""
+    import rules
+    packs = Path(tmp) / "rules"
+    packs.mkdir(exist_ok=True)
+    for old in packs.glob("*.json"):
+        old.unlink()
+    if count:
+        write_rule_pack(packs / "synthetic.json", count)
+    os.environ["KUBE_DEBUG_RULES"] = str(packs)
+    rules.reload()
+
+
+def _measure_concurrent(text, size: int, clients: int) -> dict:
+    from graph import run_graph
+    from streaming import forget_appended
+    results = {}
+    saved   = os.environ.get("KUBE_DEBUG_SINGLEFLIGHT")
+    STUB.latency = STUB_LATENCY
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            def burst():
+                forget_appended()
+                list(pool.map(lambda _: run_graph(text, "stub", MODEL), range(clients)))
+            for mode, setting in (("singleflight", ""), ("off", "off")):
+                os.environ["KUBE_DEBUG_SINGLEFLIGHT"] = setting
+                repeats  = 5
+                STUB.calls = 0
+                result   = measure(burst, size, repeats)
+                result["upstream_calls"] = STUB.calls / (repeats + 1)    # + the warm-up burst
+                result["clients"]        = clients
+                results[f"{CONCURRENT_STAGE}+{mode}@{size}"] = result
+    finally:
+        STUB.latency = 0.0
+        if saved is None:
+            os.environ.pop("KUBE_DEBUG_SINGLEFLIGHT", None)
+        else:
+            os.environ["KUBE_DEBUG_SINGLEFLIGHT"] = saved
+    return results
+
+
+def _measure_llm_stream(text, size: int) -> dict:
+    from graph import run_graph
+    from streaming import forget_appended
+    firsts = []
+
+    def run():
+        forget_appended()
+        t0, first = time.perf_counter(), []
+
+        def on_partial(report):
+            if not first and report["root_cause"] is not None:
+                first.append(time.perf_counter() - t0)
+        run_graph(text, "stub", MODEL, on_partial=on_partial)
+        firsts.append(first[0] if first else time.perf_counter() - t0)
+
+    STUB.latency = STUB_LATENCY
+    try:
+        result = measure(run, size, 10)
+    finally:
+        STUB.latency = 0.0
+    firsts = sorted(firsts[1:])     # without the warm-up run
+    result["first_output_ms"] = percentile(firsts, 0.50) * 1000
+    return {f"{LLM_STREAM_STAGE}@{size}": result}
+
+
+def _measure_speculative(text, size: int) -> dict:
+    from graph import speculate
+    from streaming import forget_appended
+    firsts = []
+
+    def run():
+        forget_appended()
+        t0 = time.perf_counter()
+        spec = speculate(text, "stub", MODEL)
+        firsts.append(time.perf_counter() - t0)
+        spec.result()
+
+    STUB.latency = STUB_LATENCY
+    try:
+        result = measure(run, size, 10)
+    finally:
+        STUB.latency = 0.0
+    firsts = sorted(firsts[1:])     # without the warm-up run
+    result["first_output_ms"] = percentile(firsts, 0.50) * 1000
+    return {f"{SPECULATIVE_STAGE}@{size}": result}
+
+
+def run(sizes: list[int], stages: list[str], kind: str | None, rule_counts: list[int] = (),
+        clients: int = DEFAULT_CLIENTS) -> dict:
+    results = {}
+    if IMPORT_STAGE in stages:
+        root = Path(__file__).resolve().parent.parent
+        for module in IMPORT_MODULES:
+            results[f"{IMPORT_STAGE}@{module}"] = measure_import(module, cwd=root)
+        stages = [s for s in stages if s != IMPORT_STAGE]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = Path(tmp) / f"payload-{size}.log"
+            write_payload(path, size, kind)
+            text = generate(size, kind) if size <= IN_MEMORY_LIMIT else None
+            for name in stages:
+                if text is None and name not in STREAMING_STAGES:
+                    continue
+                if name == RULES_STAGE:
+                    results.update(_measure_rules(text, path, size, rule_counts, tmp))
+                    continue
+                if name == CONCURRENT_STAGE:
+                    results.update(_measure_concurrent(text, size, clients))
+                    continue
+                if name == LLM_STREAM_STAGE:
+                    results.update(_measure_llm_stream(text, size))
+                    continue
+                if name == SPECULATIVE_STAGE:
+                    results.update(_measure_speculative(text, size))
+                    continue
+                fn = STAGES[name](text, path)
+                if name not in WARM_STAGES:
+                    fn = _cold(fn)
+                results[f"{name}@{size}"] = measure(fn, size, repeats_for(size))
+            path.unlink()
+    return results
+
+
+def _measure_rules(text, path, size: int, counts: list[int], tmp: str) -> dict:
+    import rules
+    results = {}
+    saved   = os.environ.get("KUBE_DEBUG_RULES")
+    try:
+        for count in counts:
+            _with_rules(count, tmp)
+            results[f"{RULES_STAGE}+{count}@{size}"] = measure(_cold(stage_detect(text, path)), size, repeats_for(size))
+    finally:
+        if saved is None:
+            os.environ.pop("KUBE_DEBUG_RULES", None)
+        else:
+            os.environ["KUBE_DEBUG_RULES"] = saved
+        rules.reload()
+    return results
+
+
+def format_table(results: dict) -> str:
+    w = max([26, *(len(key) + 2 for key in results)])
+    lines = [f"{'stage@bytes':<{w}}{'runs':>5}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'MB/s':>10}{'peak RSS MB':>13}"]
+    for key, r in results.items():
+        lines.append(f"{key:<{w}}{r['runs']:>5}{r['p50_ms']:>11.3f}{r['p95_ms']:>11.3f}"
+                     f"{r['p99_ms']:>11.3f}{r['mb_per_s']:>10.1f}{r['peak_rss_mb']:>13.1f}")
+    for key, r in results.items():
+        if key.startswith("graph@") and "nodes@" + key[6:] in results:
+            overhead = r["p50_ms"] - results["nodes@" + key[6:]]["p50_ms"]
+            lines.append(f"LangGraph dispatch overhead @{key[6:]} bytes: {overhead:.3f} ms (p50)")
+    for key, r in results.items():
+        if "first_output_ms" in r:
+            lines.append(f"{key}: root cause shown after {r['first_output_ms']:.1f} ms of {r['p50_ms']:.1f} ms (p50)")
+        if "upstream_calls" in r:
+            lines.append(f"{key}: {r['upstream_calls']:.1f} upstream LLM calls per {r['clients']} identical requests")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmark detection, prompt and graph stages.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated payload sizes, e.g. 1K,1M,2G")
+    all_stages = [IMPORT_STAGE, *STAGES, *SPECIAL_STAGES[1:]]
+    parser.add_argument("--stages", default=",".join(all_stages),
+                        help=f"comma-separated subset of {', '.join(all_stages)}")
+    parser.add_argument("--rule-counts", default=DEFAULT_RULES,
+                        help="synthetic rules added for the rules stage, comma-separated")
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS,
+                        help="simultaneous identical requests in the concurrent stage")
+    parser.add_argument("--kind", default=None, help="SAMPLES key to embed (default: random per run)")
+    parser.add_argument("--json", help="also write raw results to this file")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 if any metric regressed past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = [s for s in stages if s not in STAGES and s not in SPECIAL_STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    install(STUB)
+    results = run([parse_size(s) for s in args.sizes.split(",")], stages, args.kind,
+                  [int(n) for n in args.rule_counts.split(",") if n.strip()], args.clients)
+    print(format_table(results))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"baseline written to {args.baseline}")
+    if args.compare:
+        if not args.baseline.exists():
+            parser.error(f"no baseline at {args.baseline} — run with --save-baseline first")
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line, file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+# bench/fakegroq.py
+# A local stand-in for the Groq chat-completions API, for offline load tests of
+# the LLM stage. Speaks the protocol ChatGroq uses (POST .../chat/completions,
+# plain JSON or SSE streaming) with configurable latency, 429 / 5xx injection,
+# requests/min and tokens/min quotas, malformed, invalid or ```json-fenced
+# answers, per-model overrides (--model) and token accounting. Point the app at
+# it with GROQ_API_BASE:
+#
+#   python -m bench.fakegroq --port 8787 --latency lognormal:0.4,0.6 --rate-429 0.05
+#   GROQ_API_BASE=http://127.0.0.1:8787 GROQ_API_KEY=fake streamlit run app.py
+#
+#   server = FakeGroq(FakeConfig(latency="fixed:0.2", malformed=0.1)).start()
+#   server.url, server.stats(), server.stop()       # GET /stats on a standalone server
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.measure import percentile
+
+_FAILURE_RE = re.compile(r"## Detected Failure\s*\n(.+)")
+
+
+def parse_latency(spec: str):
+    """
+    Latency distribution → zero-arg sampler (seconds), given a random.Random:
+      fixed:S · uniform:A,B · exp:MEAN · lognormal:MEDIAN,SIGMA · normal:MEAN,SD
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v.strip()]
+    shapes = {
+        "fixed":     (1, lambda rnd, s: s),
+        "uniform":   (2, lambda rnd, a, b: rnd.uniform(a, b)),
+        "exp":       (1, lambda rnd, mean: rnd.expovariate(1 / mean) if mean else 0.0),
+        "lognormal": (2, lambda rnd, median, sigma: rnd.lognormvariate(math.log(median), sigma) if median else 0.0),
+        "normal":    (2, lambda rnd, mean, sd: max(0.0, rnd.gauss(mean, sd))),
+    }
+    if kind not in shapes or len(values) != shapes[kind][0]:
+        raise ValueError(f"bad latency spec {spec!r} — use fixed:S, uniform:A,B, exp:MEAN, "
+                         f"lognormal:MEDIAN,SIGMA or normal:MEAN,SD")
+    fn = shapes[kind][1]
+    return lambda rnd: fn(rnd, *values)
+
+
+class FakeConfig:
+    """What the fake server does. Rates are per-request probabilities, checked in this order."""
+
+    def __init__(self, latency: str = "fixed:0.2", rate_429: float = 0.0, rate_500: float = 0.0,
+                 malformed: float = 0.0, fenced: float = 0.0, invalid: float = 0.0,
+                 rpm: float = 0.0, tpm: float = 0.0, completion_tokens: int = 250, ttft: float = 0.25, retry_after: float = 0.2, seed: int = 0,
+                 models: dict | None = None):
+        self.latency           = latency             # total response time distribution
+        self.rate_429          = rate_429
+        self.rate_500          = rate_500
+        self.malformed         = malformed           # answer is not valid JSON
+        self.fenced            = fenced              # answer wrapped in ```json … ```
+        self.invalid           = invalid             # JSON, but no root cause and an unknown severity
+        self.rpm               = rpm                 # requests/min quota, 0 = none (429 past it)
+        self.tpm               = tpm                 # tokens/min quota, 0 = none
+        self.completion_tokens = completion_tokens   # approximate answer length
+        self.ttft              = ttft                # streaming: share of the latency before the first chunk
+        self.retry_after       = retry_after         # seconds, sent with injected 429s
+        self.seed              = seed
+        self.models            = models or {}        # model → {field: value} overriding the above for it
+
+    def for_model(self, model: str) -> "FakeConfig":
+        """This config with `model`'s overrides applied. Quotas stay server-wide."""
+        overrides = self.models.get(model)
+        if not overrides:
+            return self
+        config = FakeConfig(**{**vars(self), "models": None})
+        vars(config).update(overrides)
+        return config
+
+
+def parse_model_override(spec: str) -> tuple[str, dict]:
+    """
+    "MODEL:field=value;field=value" → (model, overrides), e.g.
+    "llama-3.1-8b-instant:latency=fixed:0.1;malformed=0.3".
+    """
+    model, _, rest = spec.partition(":")
+    overrides = {}
+    for item in filter(None, rest.split(";")):
+        key, _, value = item.partition("=")
+        key = key.strip().replace("-", "_")
+        if key not in ("latency", "rate_429", "rate_500", "malformed", "fenced", "invalid",
+                       "completion_tokens") or not value:
+            raise ValueError(f"bad model override {item!r} in {spec!r}")
+        overrides[key] = value if key == "latency" else type(getattr(FakeConfig(), key))(value)
+        if key == "latency":
+            parse_latency(value)
+    if not model or not overrides:
+        raise ValueError(f"bad model override {spec!r} — use MODEL:field=value;field=value")
+    return model, overrides
+
+
+def count_tokens(text: str) -> int:
+    """~4 characters per token, the same estimate ratelimit.py uses."""
+    return max(1, len(text) // 4)
+
+
+def _answer(failure_type: str, tokens: int) -> dict:
+    filler = "The container was restarted repeatedly and the pattern is consistent across restarts. "
+    explanation = f"The pod failed with {failure_type}. "
+    while count_tokens(explanation) < max(tokens - 120, 20):
+        explanation += filler
+    return {
+        "root_cause":        f"{failure_type} caused by the workload exceeding its configured limits.",
+        "explanation":       explanation.strip(),
+        "severity":          "high",
+        "remediation_steps": ["Step 1: inspect kubectl describe pod output",
+                              "Step 2: check the previous container logs",
+                              "Step 3: adjust the pod spec and redeploy"],
+        "kubectl_commands":  ["kubectl describe pod <pod> -n <namespace>",
+                              "kubectl logs <pod> --previous -n <namespace>"],
+    }
+
+
+# ── Server ───────────────────────────────────────────────────────────────────
+
+class FakeGroq:
+    """Threaded HTTP server; start() returns self, with .url set."""
+
+    def __init__(self, config: FakeConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+        self.config   = config or FakeConfig()
+        self._samples = {}           # latency spec → sampler
+        self._rnd     = random.Random(self.config.seed)
+        self._lock    = threading.Lock()
+        self._window  = deque()      # (time, tokens) of requests in the last minute, for quotas
+        self._counts  = {}
+        self._latency = []
+        self._server  = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread  = None
+        self.url      = f"http://{host}:{self._server.server_address[1]}"
+
+    def start(self) -> "FakeGroq":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-groq", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        self._server.serve_forever()
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self._counts[name] = self._counts.get(name, 0) + n
+
+    def stats(self) -> dict:
+        """Requests by outcome, token totals and observed server-side latency percentiles."""
+        with self._lock:
+            out, latency = dict(self._counts), sorted(self._latency)
+        out.update(latency_p50_s=percentile(latency, 0.50), latency_p99_s=percentile(latency, 0.99))
+        return out
+
+    def decide(self, prompt_tokens: int, model: str = "") -> tuple[str, float, random.Random]:
+        """
+        Outcome ("ok", "413", "429", "500", "malformed", "fenced", "invalid"), a delay and an RNG for
+        one request. The delay is the response latency — or, for a 429, the Retry-After. A request
+        larger than the whole tokens/min quota can never fit, so it gets a 413 as on the real API.
+        """
+        cfg = self.config.for_model(model)
+        with self._lock:
+            if cfg.latency not in self._samples:
+                self._samples[cfg.latency] = parse_latency(cfg.latency)
+            sample = self._samples[cfg.latency]
+            rnd = random.Random(self._rnd.random())
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] > 60:
+                self._window.popleft()
+            used = sum(t for _, t in self._window)
+            tokens = prompt_tokens + cfg.completion_tokens
+            self._count("requests")
+            if cfg.tpm and tokens > cfg.tpm:
+                self._count("outcome_413")
+                return "413", 0.0, rnd
+            if (cfg.rpm and len(self._window) >= cfg.rpm) or (cfg.tpm and used + tokens > cfg.tpm):
+                # Like the real API: retry once the oldest request leaves the one-minute window
+                self._count("quota_exceeded")
+                self._count("outcome_429")
+                oldest = self._window[0][0] if self._window else now - 60
+                return "429", max(cfg.retry_after, 60 - (now - oldest)), rnd
+            roll = rnd.random()
+            outcome = "ok"
+            for name, rate in (("429", cfg.rate_429), ("500", cfg.rate_500),
+                               ("malformed", cfg.malformed), ("fenced", cfg.fenced), ("invalid", cfg.invalid)):
+                if roll < rate:
+                    outcome = name
+                    break
+                roll -= rate
+            if outcome != "429":
+                self._window.append((now, tokens))
+            self._count(f"outcome_{outcome}")
+            if model in self.config.models:
+                self._count(f"model_{model}")
+        if outcome == "429":
+            return outcome, cfg.retry_after, rnd
+        return outcome, 0.0 if outcome == "500" else sample(rnd), rnd
+
+    def record(self, seconds: float, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        with self._lock:
+            self._latency.append(seconds)
+            self._count("prompt_tokens", prompt_tokens)
+            self._count("completion_tokens", completion_tokens)
+
+
+def _handler(server: FakeGroq):
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"     # keep-alive, like the real API
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                return self._json(200, {"object": "list", "data": []})
+            if self.path.rstrip("/") == "/stats":
+                return self._json(200, server.stats())
+            self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+        def do_POST(self):
+            try:
+                self._post()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (deadline, or a hedged request that lost the race)
+                self.close_connection = True
+                with server._lock:
+                    server._count("client_disconnects")
+
+        def _post(self):
+            t0     = time.perf_counter()
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except json.JSONDecodeError:
+                return self._json(400, {"error": {"message": "invalid JSON body", "type": "invalid_request_error"}})
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+            prompt = "".join(str(m.get("content", "")) for m in body.get("messages") or [])
+            prompt_tokens = count_tokens(prompt)
+            outcome, latency, rnd = server.decide(prompt_tokens, body.get("model", ""))
+
+            if outcome == "413":
+                server.record(time.perf_counter() - t0)
+                return self._json(413, {"error": {"message": "Request too large for tokens per minute (TPM) (fake)",
+                                                  "type": "tokens", "code": "rate_limit_exceeded"}})
+            if outcome == "429":
+                server.record(time.perf_counter() - t0)
+                return self._json(429, {"error": {"message": "Rate limit reached (fake)", "type": "tokens",
+                                                  "code": "rate_limit_exceeded"}},
+                                  {"retry-after": f"{latency:.3f}", "retry-after-ms": str(int(latency * 1000))})
+            if outcome == "500":
+                server.record(time.perf_counter() - t0)
+                return self._json(500, {"error": {"message": "internal error (fake)", "type": "internal_server_error"}})
+
+            match   = _FAILURE_RE.search(prompt)
+            config  = server.config.for_model(body.get("model", ""))
+            parsed  = _answer(match.group(1).strip() if match else "Unknown failure", config.completion_tokens)
+            if outcome == "invalid":
+                parsed.update(root_cause="", severity="unknown")
+            answer  = json.dumps(parsed, indent=2)
+            if outcome == "malformed":
+                answer = "Sure! Here is the analysis: " + answer[: len(answer) // 2]
+            elif outcome == "fenced":
+                answer = f"```json\n{answer}\n```"
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": count_tokens(answer),
+                     "total_tokens": prompt_tokens + count_tokens(answer)}
+            model = body.get("model", "fake")
+            base  = {"id": f"chatcmpl-fake-{rnd.getrandbits(48):x}", "created": int(time.time()), "model": model,
+                     "system_fingerprint": "fp_fake"}
+
+            if body.get("stream"):
+                self._stream(base, answer, usage, latency)
+            else:
+                time.sleep(latency)
+                self._json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [{
+                    "index": 0, "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop", "logprobs": None}]})
+            server.record(time.perf_counter() - t0, usage["prompt_tokens"], usage["completion_tokens"])
+
+        def _json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _stream(self, base: dict, answer: str, usage: dict, latency: float) -> None:
+            """SSE over chunked transfer encoding: ~1 token per event, latency spread after the first."""
+            pieces = [answer[i:i + 4] for i in range(0, len(answer), 4)] or [""]
+            ttft   = latency * server.config.ttft
+            gap    = (latency - ttft) / len(pieces)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(ttft)
+            for i, piece in enumerate(pieces):
+                delta = {"role": "assistant", "content": piece} if i == 0 else {"content": piece}
+                self._event({**base, "object": "chat.completion.chunk",
+                             "choices": [{"index": 0, "delta": delta, "finish_reason": None, "logprobs": None}]})
+                if gap:
+                    time.sleep(gap)
+            self._event({**base, "object": "chat.completion.chunk", "x_groq": {"usage": usage},
+                         "choices": [{"index": 0, "delta": {}, "finish_reason": "stop", "logprobs": None}]})
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+
+        def _event(self, payload: dict) -> None:
+            self._chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+        def _chunk(self, data: bytes) -> None:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def config_args(parser: argparse.ArgumentParser) -> None:
+    """FakeConfig options, shared with bench.loadtest."""
+    parser.add_argument("--latency", default="fixed:0.2",
+                        help="fixed:S, uniform:A,B, exp:MEAN, lognormal:MEDIAN,SIGMA or normal:MEAN,SD")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="share of requests answered 500")
+    parser.add_argument("--malformed", type=float, default=0.0, help="share of answers that are not JSON")
+    parser.add_argument("--fenced", type=float, default=0.0, help="share of answers in ```json fences")
+    parser.add_argument("--invalid", type=float, default=0.0, help="share of JSON answers that fail validation")
+    parser.add_argument("--rpm", type=float, default=0.0, help="requests/min quota (0 = none)")
+    parser.add_argument("--tpm", type=float, default=0.0, help="tokens/min quota (0 = none)")
+    parser.add_argument("--completion-tokens", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", action="append", default=[], metavar="MODEL:FIELD=VALUE;…",
+                        help="per-model overrides, e.g. llama-3.1-8b-instant:latency=fixed:0.1;malformed=0.3")
+
+
+def config_from(args) -> FakeConfig:
+    parse_latency(args.latency)    # fail fast on a bad spec
+    return FakeConfig(latency=args.latency, rate_429=args.rate_429, rate_500=args.rate_500,
+                      malformed=args.malformed, fenced=args.fenced, invalid=args.invalid,
+                      rpm=args.rpm, tpm=args.tpm,
+                      completion_tokens=args.completion_tokens, seed=args.seed,
+                      models=dict(parse_model_override(spec) for spec in args.model))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.fakegroq", description="Fake Groq chat-completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    config_args(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = config_from(args)
+    except ValueError as e:
+        parser.error(str(e))
+    server = FakeGroq(config, args.host, args.port)
+    print(f"fake Groq API on {server.url} — set GROQ_API_BASE={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
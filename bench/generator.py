@@ -0,0 +1,234 @@
+# bench/generator.py
+# Synthetic `kubectl describe` / `kubectl logs` payloads of any size, seeded
+# with the failure shapes in samples.SAMPLES and padded with realistic noise.
+
+import random
+
+from samples import SAMPLES
+
+_LEVELS   = ["INFO"] * 12 + ["DEBUG"] * 6 + ["WARN"] * 2 + ["ERROR"]
+_SERVICES = ["app", "api", "worker", "scheduler", "cache", "grpc"]
+_PATHS    = ["/api/v1/items", "/api/v1/orders", "/healthz", "/metrics", "/api/v2/users/{id}"]
+_MESSAGES = [
+    "request handled method={method} path={path} status={status} latency={ms}ms",
+    "gc pause young={ms}ms heap_used={mb}Mi heap_max=512Mi",
+    "connection pool stats active={n} idle={m} waiting=0",
+    "cache hit ratio={ratio:.2f} keys={keys}",
+    "processed batch size={n} lag={ms}ms partition={m}",
+    "retrying upstream call attempt={n} backoff={ms}ms",
+]
+_DESCRIBE_HEADER = """\
+Name:             {pod}
+Namespace:        {ns}
+Priority:         0
+Node:             ip-10-0-{a}-{b}.ec2.internal/10.0.{a}.{b}
+Start Time:       Mon, 15 Jan 2024 14:00:00 +0000
+Labels:           app={app}
+                  pod-template-hash={hash}
+Status:           Running
+IP:               10.42.{a}.{b}
+Controlled By:    ReplicaSet/{app}-{hash}
+Containers:
+  {app}:
+    Image:          registry.example.com/{app}:1.{a}.{b}
+    Port:           8080/TCP
+"""
+
+
+def noise_line(rnd: random.Random, i: int) -> str:
+    msg = rnd.choice(_MESSAGES).format(
+        method=rnd.choice(["GET", "POST", "PUT"]), path=rnd.choice(_PATHS),
+        status=rnd.choice([200, 200, 200, 201, 204, 404]), ms=rnd.randint(1, 900),
+        mb=rnd.randint(64, 500), n=rnd.randint(1, 64), m=rnd.randint(0, 31),
+        ratio=rnd.random(), keys=rnd.randint(100, 100000),
+    )
+    return (f"2024-01-15T14:{(i // 60) % 60:02d}:{i % 60:02d}.{rnd.randint(0, 999):03d}Z "
+            f"{rnd.choice(_LEVELS):<5} {rnd.choice(_SERVICES)} {msg}\n")
+
+
+def iter_payload(size: int, kind: str | None = None, position: float = 0.8,
+                 seed: int = 0, with_describe: bool = True):
+    """
+    Yield str chunks totalling ~`size` bytes: a describe header, noise lines,
+    and the SAMPLES[kind] failure block inserted at `position` (0 = head,
+    1 = tail). kind=None picks a sample at random; kind="" inserts none.
+    """
+    rnd = random.Random(seed)
+    if kind is None:
+        kind = rnd.choice(list(SAMPLES))
+    block = SAMPLES[kind] if kind else ""
+
+    produced = 0
+    if with_describe:
+        a, b = rnd.randint(0, 255), rnd.randint(0, 255)
+        header = _DESCRIBE_HEADER.format(pod=f"bench-{seed}-7d9f8c6b5-x2k4q", ns="bench", a=a, b=b,
+                                         app="bench", hash="7d9f8c6b5")
+        yield header
+        produced += len(header)
+
+    insert_at = produced + max(0, int((size - produced - len(block)) * position))
+    i, batch = 0, []
+    while produced < size:
+        if block and produced >= insert_at:
+            batch.append(block)
+            produced += len(block)
+            block = ""
+            continue
+        line = noise_line(rnd, i)
+        batch.append(line)
+        produced += len(line)
+        i += 1
+        if len(batch) >= 2048:
+            yield "".join(batch)
+            batch = []
+    if block:
+        batch.append(block)
+    if batch:
+        yield "".join(batch)
+
+
+def generate(size: int, kind: str | None = None, **kwargs) -> str:
+    return "".join(iter_payload(size, kind, **kwargs))
+
+
+def write_payload(path, size: int, kind: str | None = None, **kwargs) -> None:
+    """Write a payload to disk chunk by chunk — works for multi-GB sizes."""
+    with open(path, "w", encoding="utf-8") as fh:
+        for chunk in iter_payload(size, kind, **kwargs):
+            fh.write(chunk)
+
+
+# ── Synthetic rule packs ─────────────────────────────────────────────────────
+
+_SYLLABLES = ["ka", "zu", "mo", "rex", "vin", "tor", "quo", "lyx", "pha", "dre", "sno", "gil"]
+
+
+def synthetic_rules(count: int, seed: int = 0) -> dict:
+    """
+    A rule pack (see rules.py) of `count` made-up rules, ranked between the
+    config and crashloop rules so every one is considered. One in twenty has a
+    trigger starting with a literal common in the noise, so the benchmark pays
+    for some regex verification too, not only index lookups.
+    """
+    rnd   = random.Random(seed)
+    rules = []
+    for i in range(count):
+        word = "".join(rnd.choice(_SYLLABLES) for _ in range(3)) + str(i)
+        common = i % 20 == 0
+        rules.append({
+            "id":           f"synthetic-{i}",
+            "failure_type": f"Synthetic {word}",
+            "priority":     rnd.randint(11, 89),
+            "triggers":     [f"request handled method=delete {word}" if common else f"{word}error",
+                             f"reason:\\s*{word}backoff"],
+            "signals":      [{"name": "code", "pattern": f"{word} code[:\\s]+(\\d+)"},
+                             {"name": "flag", "pattern": f"[Ff]ailed {word}", "value": "true"}],
+        })
+    return {"rules": rules}
+
+
+def write_rule_pack(path, count: int, seed: int = 0) -> None:
+    import json
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(synthetic_rules(count, seed), fh)
+
+
+# ── Watch-mode event streams ─────────────────────────────────────────────────
+
+_FAILURES = [
+    ("OOMKilled", 137, "Memory cgroup out of memory: Kill process 4242"),
+    ("Error", 1, "FATAL: startup failed after 3 retries"),
+    (None, None, 'Error: secret "db-credentials" not found'),
+]
+
+
+def _pod_object(name: str, ns: str, restarts: int, waiting: str | None = None,
+                last: tuple | None = None) -> dict:
+    status = {"name": "app", "restartCount": restarts,
+              "state": {"waiting": {"reason": waiting}} if waiting else {"running": {}}}
+    if last:
+        status["lastState"] = {"terminated": {"reason": last[0], "exitCode": last[1]}}
+    return {
+        "kind": "Pod",
+        "metadata": {"name": name, "namespace": ns},
+        "spec": {"containers": [{"name": "app", "resources": {"limits": {"memory": "512Mi"},
+                                                               "requests": {"memory": "256Mi"}}}]},
+        "status": {"containerStatuses": [status]},
+    }
+
+
+def iter_events(pods: int, lines_per_pod: int, failing: float = 0.05, seed: int = 0):
+    """
+    Yield watch-mode events (see watch.py) for `pods` pods: an ADDED status each,
+    interleaved noise log lines, and for a `failing` fraction of pods a failure —
+    its log line, then status updates through CrashLoopBackOff.
+    """
+    rnd   = random.Random(seed)
+    names = [(f"svc-{i % 50}-{seed}-{i:05d}", f"ns-{i % 7}") for i in range(pods)]
+    fails = set(rnd.sample(range(pods), int(pods * failing)))
+
+    for name, ns in names:
+        yield {"type": "ADDED", "object": _pod_object(name, ns, 0)}
+
+    for i in range(lines_per_pod):
+        for p, (name, ns) in enumerate(names):
+            pod = f"{ns}/{name}"
+            yield {"type": "LOG", "pod": pod, "line": noise_line(rnd, i).rstrip("\n")}
+            if p in fails and i == lines_per_pod // 2:
+                reason, code, line = _FAILURES[p % len(_FAILURES)]
+                yield {"type": "LOG", "pod": pod, "line": line}
+                if reason:
+                    for restarts in range(1, 4):
+                        yield {"type": "MODIFIED", "object": _pod_object(
+                            name, ns, restarts, "CrashLoopBackOff", (reason, code))}
+                else:
+                    yield {"type": "MODIFIED", "object": _pod_object(name, ns, 0, "CreateContainerConfigError")}
+
+
+def write_events(path, pods: int, lines_per_pod: int, **kwargs) -> None:
+    import json
+    with open(path, "w", encoding="utf-8") as fh:
+        for event in iter_events(pods, lines_per_pod, **kwargs):
+            fh.write(json.dumps(event) + "\n")
+
+
+# ── Pod / event lists ────────────────────────────────────────────────────────
+
+_EVENTS = {
+    "OOMKilled": [("Warning", "BackOff", "kubelet", "Back-off restarting failed container app in pod {pod}")],
+    "Error":     [("Warning", "BackOff", "kubelet", "Back-off restarting failed container app in pod {pod}")],
+    None:        [("Warning", "Failed", "kubelet", 'Error: secret "db-credentials" not found')],
+}
+
+
+def write_podlist(path, pods: int, failing: float = 0.05, seed: int = 0, events: bool = True) -> None:
+    """
+    Write `kubectl get pods,events -o json`-style output for `pods` pods — one
+    List whose items are the pods, then their events — item by item, so any
+    size works. A `failing` fraction of pods is in one of the _FAILURES states.
+    """
+    import json
+    rnd   = random.Random(seed)
+    fails = set(rnd.sample(range(pods), int(pods * failing)))
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write('{"apiVersion": "v1", "kind": "List", "items": [\n')
+        sep = ""
+        for i in range(pods):
+            name, ns = f"svc-{i % 50}-{seed}-{i:05d}", f"ns-{i % 7}"
+            if i in fails:
+                reason, code, _ = _FAILURES[i % len(_FAILURES)]
+                obj = (_pod_object(name, ns, rnd.randint(3, 40), "CrashLoopBackOff", (reason, code)) if reason
+                       else _pod_object(name, ns, 0, "CreateContainerConfigError"))
+            else:
+                obj = _pod_object(name, ns, rnd.randint(0, 2))
+            fh.write(sep + json.dumps(obj))
+            sep = ",\n"
+            if events and i in fails:
+                for type_, reason, component, message in _EVENTS[_FAILURES[i % len(_FAILURES)][0]]:
+                    fh.write(sep + json.dumps({
+                        "kind": "Event", "type": type_, "reason": reason, "count": rnd.randint(1, 30),
+                        "involvedObject": {"kind": "Pod", "name": name, "namespace": ns},
+                        "source": {"component": component}, "lastTimestamp": "2024-01-15T14:00:00Z",
+                        "message": message.format(pod=f"{ns}/{name}"),
+                    }))
+        fh.write("\n]}\n")
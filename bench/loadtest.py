@@ -0,0 +1,198 @@
+# bench/loadtest.py
+# Load test for the LLM stage against bench.fakegroq — real ChatGroq clients,
+# real HTTP, no network or API key. Pushes N analyses through run_graph (thread
+# pool), arun_graph (one event loop) or streamed run_graph, then reports
+# throughput, tail latency, how each report was produced and what the fake
+# server saw (outcomes, retries, tokens).
+#
+#   python -m bench.loadtest --requests 200 --concurrency 16
+#   python -m bench.loadtest --mode async --latency lognormal:0.4,0.6 --rate-429 0.1
+#   python -m bench.loadtest --mode stream --malformed 0.05 --fenced 0.2 --json
+#   python -m bench.loadtest --llm-model auto --model llama-3.1-8b-instant:invalid=0.2
+#   python -m bench.loadtest --url http://127.0.0.1:8787     # an already running fake server
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("KUBE_DEBUG_CACHE", "off")    # every request must reach the server
+
+from bench.fakegroq import FakeGroq, config_args, config_from
+from bench.generator import generate
+from bench.measure import percentile
+from escalation import tiers_for
+from samples import SAMPLES
+
+MODEL        = "llama-3.3-70b-versatile"
+PAYLOAD_SIZE = 16 << 10
+FAKE_KEY     = "gsk_fake_loadtest"
+
+
+def payloads(count: int, distinct: int, size: int) -> list[str]:
+    """`count` logs cycling through `distinct` different ones (distinct noise, so distinct cache keys)."""
+    kinds = sorted(SAMPLES)
+    unique = [generate(size, kinds[i % len(kinds)], seed=i) for i in range(max(1, distinct))]
+    return [unique[i % len(unique)] for i in range(count)]
+
+
+def warm_up(models) -> None:
+    """Import LangChain, compile the graph and build the pooled client, so none of it lands in the timings."""
+    from clients import get_llm
+    from graph import get_compiled_graph
+    from nodes import MAX_TOKENS
+
+    get_compiled_graph()
+    for model in models:
+        get_llm(FAKE_KEY, model, temperature=0.1, max_tokens=MAX_TOKENS)
+
+
+# ── Drivers ──────────────────────────────────────────────────────────────────
+# Each returns [(seconds, report, seconds_to_first_partial | None)] in request order.
+
+def run_threads(logs: list[str], concurrency: int, model: str = MODEL, stream: bool = False) -> list:
+    from graph import run_graph
+
+    def one(text):
+        first = []
+        on_partial = (lambda report: first or first.append(time.perf_counter())) if stream else None
+        t0 = time.perf_counter()
+        report = run_graph(text, FAKE_KEY, model, on_partial=on_partial)
+        return time.perf_counter() - t0, report, first[0] - t0 if first else None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, logs))
+
+
+def run_async(logs: list[str], concurrency: int, rpm: float, tpm: float, model: str = MODEL) -> tuple[list, dict]:
+    from graph import arun_graph
+    from ratelimit import RateLimiter
+
+    async def main():
+        limiter = RateLimiter(max_concurrency=concurrency, requests_per_min=rpm, tokens_per_min=tpm,
+                              base_delay=0.1, max_delay=2.0)
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one(text):
+            async with gate:
+                t0 = time.perf_counter()
+                report = await arun_graph(text, FAKE_KEY, model, limiter=limiter)
+                return time.perf_counter() - t0, report, None
+
+        results = await asyncio.gather(*(one(text) for text in logs))
+        return results, {"limiter_calls": limiter.calls, "limiter_rate_limited": limiter.rate_limited}
+
+    return asyncio.run(main())
+
+
+# ── Report ───────────────────────────────────────────────────────────────────
+
+def summarize(results: list, wall: float, server: dict, extra: dict | None = None) -> dict:
+    latencies = sorted(seconds for seconds, _, _ in results)
+    firsts    = sorted(first for _, _, first in results if first is not None)
+    sources   = Counter(report.get("analysis_source") or "none" for _, report, _ in results)
+    models    = Counter(report["analysis_model"] for _, report, _ in results if report.get("analysis_model"))
+    n         = len(results)
+    out = {
+        "requests":        n,
+        "wall_s":          wall,
+        "throughput_rps":  n / wall if wall else 0.0,
+        "p50_ms":          percentile(latencies, 0.50) * 1000,
+        "p95_ms":          percentile(latencies, 0.95) * 1000,
+        "p99_ms":          percentile(latencies, 0.99) * 1000,
+        "max_ms":          (latencies[-1] if latencies else 0.0) * 1000,
+        "sources":         dict(sources),
+        "models":          dict(models),
+        "fallback_rate":   sources.get("fallback", 0) / n if n else 0.0,
+        # Above 1.0: the SDK or the RateLimiter retried after 429s / 5xx
+        "upstream_per_analysis": server.get("requests", 0) / max(1, n - sources.get("cache", 0)),
+        "server":          server,
+    }
+    if firsts:
+        out["first_partial_p50_ms"] = percentile(firsts, 0.50) * 1000
+        out["first_partial_p95_ms"] = percentile(firsts, 0.95) * 1000
+    from metrics import snapshot
+    analyze = snapshot().get("analyze", {})
+    out.update(escalations=analyze.get("escalations", 0), hedged=analyze.get("hedged", 0))
+    out.update(extra or {})
+    return out
+
+
+def format_summary(s: dict) -> str:
+    lines = [
+        f"{s['requests']} requests in {s['wall_s']:.2f}s — {s['throughput_rps']:.1f} req/s",
+        f"latency  p50 {s['p50_ms']:.0f} ms · p95 {s['p95_ms']:.0f} ms · "
+        f"p99 {s['p99_ms']:.0f} ms · max {s['max_ms']:.0f} ms",
+    ]
+    if "first_partial_p50_ms" in s:
+        lines.append(f"first partial  p50 {s['first_partial_p50_ms']:.0f} ms · p95 {s['first_partial_p95_ms']:.0f} ms")
+    lines.append("sources  " + " · ".join(f"{k} {v}" for k, v in sorted(s["sources"].items()))
+                 + f"   (fallback rate {s['fallback_rate']:.1%})")
+    if s["models"]:
+        lines.append("answers  " + " · ".join(f"{k} {v}" for k, v in sorted(s["models"].items()))
+                     + f"   ({s['escalations']} escalated · {s['hedged']} hedged)")
+    server = s["server"]
+    outcomes = {k[len("outcome_"):]: v for k, v in server.items() if k.startswith("outcome_")}
+    lines.append(f"server   {server.get('requests', 0)} requests "
+                 f"({s['upstream_per_analysis']:.2f} per analysis) · "
+                 + " · ".join(f"{k} {v}" for k, v in sorted(outcomes.items())))
+    lines.append(f"tokens   prompt {server.get('prompt_tokens', 0)} · completion {server.get('completion_tokens', 0)}")
+    if "limiter_calls" in s:
+        lines.append(f"limiter  {s['limiter_calls']} calls · {s['limiter_rate_limited']} rate-limited")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.loadtest", description="Load-test the LLM stage against a fake Groq server.")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mode", choices=("sync", "async", "stream"), default="sync",
+                        help="run_graph in threads, arun_graph on one loop, or streamed run_graph")
+    parser.add_argument("--distinct", type=int, default=0,
+                        help="different logs to cycle through (default: one per request)")
+    parser.add_argument("--llm-model", default=MODEL, help='model passed to run_graph ("auto" for tiers)')
+    parser.add_argument("--size", type=int, default=PAYLOAD_SIZE, help="bytes per log")
+    parser.add_argument("--client-rpm", type=float, default=1e6, help="async mode: RateLimiter requests/min")
+    parser.add_argument("--client-tpm", type=float, default=1e9, help="async mode: RateLimiter tokens/min")
+    parser.add_argument("--url", help="use a fake server that is already running instead of starting one")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    config_args(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = config_from(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = None if args.url else FakeGroq(config).start()
+    os.environ["GROQ_API_BASE"] = args.url or server.url     # read by ChatGroq when clients.get_llm builds it
+    logs = payloads(args.requests, args.distinct or args.requests, args.size)
+
+    warm_up(tiers_for(args.llm_model, None)[0])
+    extra = None
+    t0 = time.perf_counter()
+    try:
+        if args.mode == "async":
+            results, extra = run_async(logs, args.concurrency, args.client_rpm, args.client_tpm, args.llm_model)
+        else:
+            results = run_threads(logs, args.concurrency, args.llm_model, stream=args.mode == "stream")
+        wall = time.perf_counter() - t0
+        if server:
+            stats = server.stats()
+        else:
+            import httpx
+            stats = httpx.get(f"{args.url.rstrip('/')}/stats").json()
+    finally:
+        if server:
+            server.stop()
+
+    summary = summarize(results, wall, stats, extra)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# bench/measure.py
+# Timing, percentile, peak-RSS and baseline-comparison helpers.
+
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+_CLEAR_REFS = Path("/proc/self/clear_refs")
+_STATUS     = Path("/proc/self/status")
+
+
+def reset_peak_rss() -> None:
+    """Reset the kernel's high-water mark (Linux only; no-op elsewhere)."""
+    try:
+        _CLEAR_REFS.write_text("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS since the last reset_peak_rss() — or since process start where resets aren't supported."""
+    try:
+        for line in _STATUS.read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def percentile(sorted_values: list, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, size: int, repeats: int, warmup: int = 1) -> dict:
+    """Run fn() `repeats` times; return latency percentiles, throughput and peak RSS."""
+    for _ in range(warmup):
+        fn()
+    reset_peak_rss()
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    p50 = percentile(times, 0.50)
+    return {
+        "bytes":       size,
+        "runs":        repeats,
+        "p50_ms":      p50 * 1000,
+        "p95_ms":      percentile(times, 0.95) * 1000,
+        "p99_ms":      percentile(times, 0.99) * 1000,
+        "mb_per_s":    size / p50 / 1e6 if p50 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure_import(module: str, repeats: int = 5, cwd=None) -> dict:
+    """
+    Cold import time of `module`, each run in a fresh interpreter. Uses the
+    cumulative figure from -X importtime, so interpreter startup is excluded.
+    """
+    times = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=cwd, capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module and not fields[2][1:].startswith(" "):
+                times.append(int(fields[1]) / 1e6)
+    times.sort()
+    return {
+        "bytes":       0,
+        "runs":        len(times),
+        "p50_ms":      percentile(times, 0.50) * 1000,
+        "p95_ms":      percentile(times, 0.95) * 1000,
+        "p99_ms":      percentile(times, 0.99) * 1000,
+        "mb_per_s":    0.0,
+        "peak_rss_mb": 0.0,
+    }
+
+
+# ── Baselines ────────────────────────────────────────────────────────────────
+# Results are keyed "stage@size". Latency and RSS regress when they go up,
+# throughput when it goes down.
+
+_HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "peak_rss_mb")
+_LOWER_IS_WORSE  = ("mb_per_s",)
+
+
+def save_baseline(path: Path, results: dict) -> None:
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a line per metric that regressed by more than `tolerance` (0.2 = 20%)."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric in _HIGHER_IS_WORSE + _LOWER_IS_WORSE:
+            old, new = base.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if metric in _LOWER_IS_WORSE:
+                change = -change
+            if change > tolerance:
+                regressions.append(f"{key} {metric}: {old:.2f} → {new:.2f} ({change:+.0%})")
+    return regressions
@@ -0,0 +1,95 @@
+# bench/stub.py
+# In-process stand-in for ChatGroq, shared by the benchmark suite and tests/.
+# Costs nothing, needs no network, and counts its calls.
+#
+#   llm = install(StubLLM(latency=0.05))     # nodes.get_llm now returns llm
+#   llm.calls, llm.latency, llm.error
+
+import json
+import threading
+import time
+
+ANSWER = {
+    "root_cause":        "Container exceeded its memory limit.",
+    "explanation":       "Stubbed LLM response.",
+    "severity":          "high",
+    "remediation_steps": ["Step 1: raise the limit", "Step 2: profile the heap"],
+    "kubectl_commands":  ["kubectl describe pod <pod>", "kubectl top pod <pod>"],
+}
+USAGE = {"input_tokens": 100, "output_tokens": 50, "total_tokens": 150}
+CHUNK = 4     # characters per streamed chunk (~1 token)
+
+
+class StubMessage:
+    def __init__(self, content: str, usage: dict | None = None):
+        self.content        = content
+        self.usage_metadata = usage
+
+
+class StubLLM:
+    """
+    `latency` makes calls take time (so concurrent ones overlap); stream() and
+    astream() spread it over CHUNK-character chunks. With `error` set, calls
+    raise it — the first `failures` calls only, or all of them when that is None.
+    """
+
+    def __init__(self, latency: float = 0.0, error: Exception | None = None, failures: int | None = None):
+        self.latency  = latency
+        self.error    = error
+        self.failures = failures
+        self.calls    = 0
+        self._lock    = threading.Lock()
+
+    def _start(self) -> bool:
+        """Count the call; True if it is one that fails."""
+        with self._lock:
+            self.calls += 1
+            return self.error is not None and (self.failures is None or self.calls <= self.failures)
+
+    def _chunks(self) -> list[str]:
+        text = json.dumps(ANSWER)
+        return [text[i:i + CHUNK] for i in range(0, len(text), CHUNK)]
+
+    def invoke(self, messages):
+        fails = self._start()
+        if self.latency:
+            time.sleep(self.latency)
+        if fails:
+            raise self.error
+        return StubMessage(json.dumps(ANSWER), USAGE)
+
+    async def ainvoke(self, messages):
+        import asyncio
+        fails = self._start()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if fails:
+            raise self.error
+        return StubMessage(json.dumps(ANSWER), USAGE)
+
+    def stream(self, messages):
+        fails, pieces = self._start(), self._chunks()
+        for i, piece in enumerate(pieces):
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            if fails:
+                raise self.error
+            yield StubMessage(piece, USAGE if i == len(pieces) - 1 else None)
+
+    async def astream(self, messages):
+        import asyncio
+        fails, pieces = self._start(), self._chunks()
+        for i, piece in enumerate(pieces):
+            if self.latency:
+                await asyncio.sleep(self.latency / len(pieces))
+            if fails:
+                raise self.error
+            yield StubMessage(piece, USAGE if i == len(pieces) - 1 else None)
+
+
+def install(llm: StubLLM | None = None) -> StubLLM:
+    """Make nodes.get_llm return `llm` (a new StubLLM by default); returns it."""
+    import nodes
+    llm = llm or StubLLM()
+    nodes.get_llm = lambda *args, **kwargs: llm
+    return llm
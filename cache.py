@@ -0,0 +1,162 @@
+# cache.py
+# Persistent LLM result cache, keyed on the failure fingerprint.
+# SQLite-backed (stdlib only) with TTL expiry, LRU eviction and hit/miss counters.
+#
+# Location: $KUBE_DEBUG_CACHE, default ~/.cache/kube-debug-ai/llm_cache.sqlite3.
+# Set KUBE_DEBUG_CACHE=off to disable. A cache that cannot be opened, read or
+# written (read-only home, bad path, locked or corrupt file) is skipped: the
+# analysis runs as if the cache were off.
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_PATH        = Path.home() / ".cache" / "kube-debug-ai" / "llm_cache.sqlite3"
+DEFAULT_TTL         = 7 * 24 * 3600     # seconds
+DEFAULT_MAX_ENTRIES = 5000
+
+# Noise that differs between otherwise-identical failures.
+_TIMESTAMP_RE  = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+                            r"|\w{3}, \d{1,2} \w{3} \d{4} \d{2}:\d{2}:\d{2} [+-]\d{4}")
+_AGE_RE        = re.compile(r"\b\d+[smhd]\b")
+_POD_HASH_RE   = re.compile(r"\b([a-z0-9-]+)-[a-f0-9]{8,10}-[a-z0-9]{5}\b")
+_PID_RE        = re.compile(r"\b(process|pid)\s+\d+", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_excerpt(text: str) -> str:
+    """Strip timestamps, event ages, pod-template hashes and PIDs; collapse whitespace."""
+    text = _TIMESTAMP_RE.sub("<ts>", text)
+    text = _AGE_RE.sub("<age>", text)
+    text = _POD_HASH_RE.sub(r"\1-<hash>", text)
+    text = _PID_RE.sub(r"\1 <n>", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def fingerprint(model: str, failure_type: str, is_root_cause: bool,
+                signals: dict, log_excerpt: str) -> str:
+    """Cache key: model + detection result + hash of the normalized excerpt."""
+    excerpt_hash = hashlib.sha256(normalize_excerpt(log_excerpt).encode()).hexdigest()
+    payload = json.dumps({
+        "model":         model,
+        "failure_type":  failure_type,
+        "is_root_cause": bool(is_root_cause),
+        "signals":       {str(k): str(v).strip() for k, v in (signals or {}).items()},
+        "excerpt":       excerpt_hash,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMCache:
+    """
+    Disk-backed key → JSON-dict store. Safe to share between threads; separate
+    processes can open the same file (SQLite handles the locking).
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl: float = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path        = Path(path)
+        self.ttl         = ttl
+        self.max_entries = max_entries
+        self.hits        = 0
+        self.misses      = 0
+        self._lock       = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key        TEXT PRIMARY KEY,
+                value      TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                used_at    REAL NOT NULL
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS llm_cache_used_at ON llm_cache(used_at)")
+
+    def get(self, key: str) -> dict | None:
+        """The cached value, or None — also when the database cannot be read."""
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or now - row[1] > self.ttl:
+                    if row is not None:
+                        self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                self._db.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+                value = json.loads(row[0])
+            except (OSError, sqlite3.Error, ValueError):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        """Store value; a failed write is dropped — the cache is only an optimization."""
+        now = time.time()
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, used_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                self._evict(now)
+            except (OSError, sqlite3.Error):
+                pass
+
+    def _evict(self, now: float) -> None:
+        self._db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+        self._db.execute("""
+            DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?
+            )""", (self.max_entries,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries":  entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_default_cache: LLMCache | None = None
+_default_lock = threading.Lock()
+_unavailable: set = set()      # settings whose cache could not be opened; not retried
+
+
+def get_cache() -> LLMCache | None:
+    """Process-wide cache from $KUBE_DEBUG_CACHE, or None when disabled or it cannot be opened."""
+    global _default_cache
+    setting = os.getenv("KUBE_DEBUG_CACHE", "")
+    if setting.lower() == "off" or setting in _unavailable:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = LLMCache(setting or DEFAULT_PATH)
+            except (OSError, sqlite3.Error):
+                _unavailable.add(setting)
+                return None
+        return _default_cache
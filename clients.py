@@ -0,0 +1,118 @@
+# clients.py
+# Registry of long-lived ChatGroq clients, shared across Streamlit reruns,
+# batch threads and async analyses. Each client owns a pooled keep-alive httpx
+# client, so repeat analyses skip the TCP + TLS handshake. Idle clients are
+# closed by a reaper.
+
+import asyncio
+import atexit
+import threading
+import time
+
+import httpx
+from langchain_groq import ChatGroq
+
+IDLE_TIMEOUT = 300.0     # seconds a client may sit unused before it is closed
+
+_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=IDLE_TIMEOUT,
+)
+
+
+class _Entry:
+    __slots__ = ("llm", "http_client", "async_client", "loop", "last_used")
+
+    def __init__(self, llm: ChatGroq, http_client: httpx.Client,
+                 async_client: httpx.AsyncClient | None = None, loop=None):
+        self.llm          = llm
+        self.http_client  = http_client
+        self.async_client = async_client
+        self.loop         = loop
+        self.last_used    = time.monotonic()
+
+    def close(self) -> None:
+        self.http_client.close()
+        # An AsyncClient can only be closed on the loop that owns it.
+        if self.async_client is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.async_client.aclose(), self.loop)
+
+
+_registry: dict[tuple, _Entry] = {}
+_lock   = threading.Lock()
+_reaper: threading.Thread | None = None
+
+
+def get_llm(api_key: str, model: str, temperature: float = 0.1, max_tokens: int = 800,
+            loop: asyncio.AbstractEventLoop | None = None) -> ChatGroq:
+    """
+    Return the shared ChatGroq for (api_key, model, temperature, max_tokens),
+    creating it on first use. Raises whatever ChatGroq raises for bad settings.
+
+    Pass the running `loop` when the client will be used with ainvoke: async
+    connection pools are bound to one event loop, so those clients are kept per
+    loop, and they skip the SDK's own retries so ratelimit.RateLimiter sees 429s.
+    """
+    key = (api_key, model, temperature, max_tokens, loop)
+    with _lock:
+        entry = _registry.get(key)
+        if entry is None:
+            timeout      = httpx.Timeout(60.0, connect=10.0)
+            http_client  = httpx.Client(limits=_LIMITS, timeout=timeout)
+            async_client = httpx.AsyncClient(limits=_LIMITS, timeout=timeout) if loop else None
+            extra = {"http_async_client": async_client, "max_retries": 0} if loop else {}
+            try:
+                llm = ChatGroq(
+                    api_key=api_key,
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    http_client=http_client,
+                    **extra,
+                )
+            except Exception:
+                http_client.close()
+                raise
+            entry = _registry[key] = _Entry(llm, http_client, async_client, loop)
+            _start_reaper()
+        entry.last_used = time.monotonic()
+        return entry.llm
+
+
+def close_idle(max_idle: float = IDLE_TIMEOUT) -> int:
+    """Close clients unused for `max_idle` seconds. Returns how many were closed."""
+    cutoff = time.monotonic() - max_idle
+    with _lock:
+        stale = [k for k, e in _registry.items() if e.last_used < cutoff]
+        entries = [_registry.pop(k) for k in stale]
+    for entry in entries:
+        entry.close()
+    return len(entries)
+
+
+def close_all() -> None:
+    close_idle(max_idle=-1)
+
+
+def pool_size() -> int:
+    with _lock:
+        return len(_registry)
+
+
+def _start_reaper() -> None:
+    # Called with _lock held.
+    global _reaper
+    if _reaper is not None and _reaper.is_alive():
+        return
+
+    def reap():
+        while True:
+            time.sleep(IDLE_TIMEOUT / 2)
+            close_idle()
+
+    _reaper = threading.Thread(target=reap, name="groq-client-reaper", daemon=True)
+    _reaper.start()
+
+
+atexit.register(close_all)
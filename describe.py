@@ -0,0 +1,269 @@
+# describe.py
+# Structured `kubectl describe pod` parsing. The describe-shaped regions of a
+# log — `Key: value` lines nested by indentation, whole describes or pasted
+# fragments — are collected in one pass and built into a section tree:
+# containers with their State / Last State, Limits / Requests and Restart
+# Count, plus the Events table. Rule signal steps with a "field" read from it
+# (see rules.py), so values come from the failing container instead of the
+# first regex hit anywhere in the text.
+#
+#   d = collect(text)
+#   c = d.container_for(rule.triggers)
+#   d.lookup("container.limits.memory", c)   # → ("512Mi", (first, last)) or None
+
+import re
+from functools import lru_cache
+
+# A region starts at a line whose key is one of ANCHORS; it runs on while
+# lines stay indented under it, are blank, or are further keys at its own
+# indentation.
+ANCHORS     = ("Name", "Containers", "Init Containers", "State", "Last State", "Restart Count",
+               "Limits", "Requests", "Events")
+MAX_COLLECT = 1 << 20                    # chars of regions kept per log; later regions are ignored
+MAX_LINE    = 1 << 16                    # a longer line is never describe output: skipped, not buffered
+TABLES      = {"events", "conditions"}   # sections whose lines are table rows, not keys
+CONTAINERS  = {"containers", "init containers"}
+
+_KEY_LINE    = r"[A-Za-z][\w./()-]*(?: [\w./()-]+)*:(?:[ \t][^\n]*)?"
+_ANCHOR_LINE = re.compile(rf"([ \t]*)(?:{'|'.join(ANCHORS)}):(?=[ \t\n])")
+_ANCHOR      = re.compile(rf"\n([ \t]*)(?:{'|'.join(ANCHORS)}):(?=[ \t\n])")   # one pass over the newlines
+_LINE        = re.compile(r"([ \t]*)(?:([A-Za-z][\w./()-]*(?: [\w./()-]+)*):(?:[ \t]+([^\n]*))?|([^\n]*))\n")
+_CELLS       = re.compile(r"\s{2,}")
+
+
+@lru_cache(maxsize=None)
+def _region(indent: int) -> re.Pattern:
+    """Lines that continue a region whose keys sit at `indent`: deeper lines, keys at it, blanks."""
+    return re.compile(rf"(?:[ \t]{{{indent + 1},}}[^\n]*\n|[ \t]{{{indent}}}{_KEY_LINE}\n|[ \t]*\n)*")
+
+
+# ── Section tree ──────────────────────────────────────────────────────────────
+
+class Section:
+    """One `Key: value` line and what is nested under it. Keys are matched case-insensitively."""
+    __slots__ = ("name", "value", "span", "children", "rows", "lines", "kind")
+
+    def __init__(self, name: str, value: str | None = None, span: tuple = (), kind: str | None = None):
+        self.name     = name
+        self.value    = value
+        self.span     = span      # (first, last) char offsets of the value, or of the key if it has none
+        self.children = {}        # lower-case key → Section; the first occurrence wins
+        self.rows     = []        # nested lines that are not keys (table rows, continuations)
+        self.lines    = None      # containers only: the text of the section, for trigger matching
+        self.kind     = kind      # "table" / "containers" for sections whose lines are read differently
+
+    def get(self, path: str) -> "Section | None":
+        node = self
+        for key in path.split("."):
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def __repr__(self) -> str:
+        return f"Section({self.name!r}, {self.value!r}, {sorted(self.children)})"
+
+
+class Describe:
+    """The section tree of every collected region, merged under one root."""
+
+    def __init__(self, regions: list):
+        self.root       = Section("")
+        self.containers = []
+        for _, _, chunks in regions:
+            self._add(chunks)
+
+    def _add(self, chunks: list) -> None:
+        stack = [[-1, self.root, 0]]     # open sections: [indent, section, start of its text in this chunk]
+        for offset, text in chunks:
+            for m in _LINE.finditer(text):
+                lead, key, value, row = m.groups()
+                if key is None and not row.strip():
+                    continue
+                ind = len(lead)
+                while stack[-1][0] >= ind:
+                    _, done, begin = stack.pop()
+                    if done.lines is not None:
+                        done.lines.append(text[begin:m.start()])
+                parent = stack[-1][1]
+                if key is None or parent.kind == "table":
+                    parent.rows.append(m.group(0).strip())
+                    continue
+                lower = key.lower()
+                node  = parent.children.get(lower)
+                if node is None:
+                    value = value.rstrip() if value else None
+                    first = offset + (m.start(3) if value else m.start(2))
+                    kind  = "table" if lower in TABLES else "containers" if lower in CONTAINERS else None
+                    node  = parent.children[lower] = Section(key, value, (first, first + len(value or key) - 1), kind)
+                    if parent.kind == "containers":
+                        node.lines = []
+                        self.containers.append(node)
+                stack.append([ind, node, m.start()])
+            for entry in stack:
+                if entry[1].lines is not None:
+                    entry[1].lines.append(text[entry[2]:])
+                entry[2] = 0
+
+    # ── Queries ───────────────────────────────────────────────────────────────
+
+    @property
+    def events(self) -> list[dict]:
+        """Rows of the Events table as {type, reason, age, from, message}."""
+        section = self.root.children.get("events")
+        rows, columns = [], None
+        for row in section.rows if section else ():
+            if columns is None and row.startswith("Type") and "Reason" in row:
+                columns = [m.start() for m in re.finditer(r"\S+", row)]
+                continue
+            if set(row) <= {"-", " "}:
+                continue
+            if columns and len(columns) == 5:
+                cells = [row[a:b].strip() for a, b in zip(columns, columns[1:] + [None])]
+            else:
+                cells = _CELLS.split(row, 4)
+            rows.append(dict(zip(("type", "reason", "age", "from", "message"), cells + [""] * (5 - len(cells)))))
+        return rows
+
+    def container_for(self, triggers) -> Section | None:
+        """
+        The container a failure belongs to: the first whose own lines match one
+        of the (lower-case regex, IGNORECASE twin) triggers, else one an event
+        names, else the one restarted most. None when no containers were listed.
+        """
+        for c in self.containers:
+            text = "".join(c.lines)
+            low  = text.lower() if text.isascii() else None
+            if any(rx.search(low) if low is not None else folded.search(text) for rx, folded in triggers):
+                return c
+        for event in self.events:
+            message = event["message"]
+            for c in self.containers:
+                if f"container {c.name}" in message or f'container "{c.name}"' in message:
+                    return c
+        if not self.containers:
+            return None
+        return max(self.containers, key=_restarts)
+
+    def lookup(self, path: str, container: Section | None = None) -> tuple | None:
+        """
+        (value, span) at a dotted path, or None. "container.<path>" reads the
+        given container, then the root (fragments pasted without a Containers
+        section); "container.name" is the container's own name.
+        """
+        if path == "container.name":
+            return (container.name, container.span) if container is not None else None
+        node = None
+        if path.startswith("container."):
+            path = path[len("container."):]
+            if container is not None:
+                node = container.get(path)
+        if node is None:
+            node = self.root.get(path)
+        if node is None or node.value is None:
+            return None
+        return node.value, node.span
+
+
+def _restarts(container: Section) -> int:
+    node = container.get("restart count")
+    return int(node.value) if node is not None and (node.value or "").isdigit() else 0
+
+
+# ── Collection ────────────────────────────────────────────────────────────────
+
+class DescribeCollector:
+    """
+    Keeps only the describe-shaped regions of a log fed in order, in any
+    split. Cost is one regex pass over the line starts plus the regions themselves.
+    """
+
+    def __init__(self):
+        self.regions  = []      # [stream offset, key indent, [(offset, text of whole lines), ...]]
+        self._open    = False   # the last region may continue into the next feed
+        self._partial = ""      # trailing incomplete line
+        self._offset  = 0       # stream offset of _partial[0]
+        self._size    = 0       # chars kept so far
+        self._started = False   # any non-whitespace fed
+        self._skip    = False   # inside an over-long line: drop input up to its newline
+
+    def feed(self, data: str) -> None:
+        if self._skip:
+            i = data.find("\n")
+            if i < 0:
+                self._offset += len(data)
+                return
+            self._offset += i + 1
+            self._skip, data = False, data[i + 1:]
+        if not self._started:
+            # Leading whitespace of the log is dropped, as detect_node strips it.
+            skip = len(data) - len(data.lstrip())
+            self._offset += skip
+            self._started = skip < len(data)
+            data = data[skip:]
+        text, base = self._partial + data, self._offset
+        cut = text.rfind("\n") + 1
+        if cut:
+            self._scan(text, cut, base)
+        self._partial = text[cut:]
+        self._offset  = base + cut
+        if len(self._partial) > MAX_LINE:
+            # Keeps memory constant on input without newlines; the line ends any open region
+            self._offset += len(self._partial)
+            self._partial, self._open, self._skip = "", False, True
+
+    def close(self) -> None:
+        """End of stream: the trailing incomplete line counts as a line."""
+        if self._partial:
+            self._scan(self._partial + "\n", len(self._partial) + 1, self._offset)
+            self._offset += len(self._partial)
+            self._partial = ""
+        self._open, self._skip = False, False
+
+    def describe(self, rest: str = "") -> Describe:
+        """The tree as if the stream ended now, after `rest`. Feeding can continue afterwards."""
+        if not self._partial and not rest:
+            return Describe(self.regions)
+        clone = DescribeCollector()
+        clone.regions  = self.regions[:-1] + [[*r[:2], list(r[2])] for r in self.regions[-1:]]
+        clone._open, clone._partial, clone._offset, clone._size = self._open, self._partial, self._offset, self._size
+        clone._started, clone._skip = self._started, self._skip
+        clone.feed(rest)
+        clone.close()
+        return Describe(clone.regions)
+
+    def _scan(self, text: str, end: int, base: int) -> None:
+        """Collect regions from the complete lines in text[:end]."""
+        pos = self._extend(text, 0, end, base, None) if self._open else 0
+        while pos < end and self._size < MAX_COLLECT:
+            # pos is always a line start: try that line, then search the lines after it
+            m = _ANCHOR_LINE.match(text, pos, end) or _ANCHOR.search(text, pos, end)
+            if m is None:
+                break
+            pos = self._extend(text, m.start(1), end, base, len(m.group(1)))
+        if pos < end:
+            self._open = False
+
+    def _extend(self, text: str, i: int, end: int, base: int, indent: int | None) -> int:
+        """Add the lines from text[i:] that belong to a new region (indent given) or the open one; returns where it stopped."""
+        if indent is None:
+            region = self.regions[-1]
+        else:
+            region = [base + i, indent, []]
+            self.regions.append(region)
+        j = _region(region[1]).match(text, i, end).end()
+        if self._size + j - i > MAX_COLLECT:    # keep lines up to the one that crosses the limit
+            j = text.find("\n", i + MAX_COLLECT - self._size - 1) + 1
+        if j > i:
+            region[2].append((base + i, text[i:j]))
+            self._size += j - i
+        self._open = j >= end and self._size < MAX_COLLECT
+        return j
+
+
+def collect(text: str) -> Describe:
+    """Describe tree of a whole log held in memory."""
+    collector = DescribeCollector()
+    collector.feed(text)
+    collector.close()
+    return collector.describe()
@@ -1,17 +1,39 @@
 # detector.py
 # Deterministic pattern detection — Node 1 of the LangGraph graph.
 # Pure Python / regex, no external dependencies.
-
-import re
+#
+# The failure rules come from the JSON rule packs (rules.py, rulepacks/),
+# compiled once into a shared index. Triggers are checked rule by rule in
+# priority order — only rules whose trigger literals occur in the text —
+# stopping at the first hit; signal extraction then runs only for the rule
+# that won, reading `kubectl describe` fields from the parsed section tree
+# (describe.py) where its steps ask for them.
+
+import rules
+from describe import Describe, collect
+from rules import HINTS, REQUIRED, Rule, extract
 from state import AgentState
 
+INCREMENTAL_MIN = 256 * 1024   # chars of raw_logs from which detection is resumable (streaming.detect_appended)
+
 
 def detect_node(state: AgentState) -> AgentState:
     """
     LangGraph Node 1 — Pattern Detection.
-    Reads:  state["raw_logs"]
+    Reads:  state["raw_logs"] (or state["log_path"] for a stored large log)
     Writes: failure_type, is_root_cause, signals, confidence, route
     """
+    if state.get("log_path"):
+        from streaming import detect_file   # streaming imports this module
+        return detect_file(state["log_path"], state)
+    if len(state["raw_logs"]) >= INCREMENTAL_MIN:
+        from streaming import detect_appended   # resumes if this log grew since last time
+        return detect_appended(state)
+    return detect_text(state)
+
+
+def detect_text(state: AgentState) -> AgentState:
+    """detect_node as one full pass over state["raw_logs"], whatever its size."""
     logs = state["raw_logs"].strip()
 
     if not logs:
@@ -19,141 +41,127 @@ def detect_node(state: AgentState) -> AgentState:
         state["route"] = "unknown"
         return state
 
-    # Run detectors in priority order (OOM & config are true root causes)
-    result = _detect_oom(logs) or _detect_config_error(logs) or _detect_crashloop(logs)
-
-    if result:
-        state["failure_type"]  = result["failure_type"]
-        state["is_root_cause"] = result["is_root_cause"]
-        state["signals"]       = result["signals"]
-        state["confidence"]    = result["confidence"]
-        state["route"]         = "analyze"
-    else:
-        state["failure_type"]  = None
-        state["is_root_cause"] = False
-        state["signals"]       = {}
-        state["confidence"]    = "low"
-        state["route"]         = "unknown"
+    evidence = []
+    result = detect(logs, evidence)
+    apply_result(state, result)
 
+    # Match offsets, shifted back to raw_logs coordinates for the excerpt builder
+    shift = len(state["raw_logs"]) - len(state["raw_logs"].lstrip())
+    state["evidence"] = sorted({offset + shift for offset in evidence})
     return state
 
 
-# ── OOMKilled / Exit 137 ──────────────────────────────────────────────────────
-
-def _detect_oom(logs: str) -> dict | None:
-    patterns = [
-        r"OOMKilled",
-        r"[Ee]xit\s*[Cc]ode[:\s]+137",
-        r"exit status 137",
-        r"reason:\s*OOMKilled",
-        r"Out of memory",
-        r"oom_kill",
-    ]
-    if not any(re.search(p, logs, re.IGNORECASE) for p in patterns):
+def detect(logs: str, evidence: list | None = None, describe=None) -> dict | None:
+    """
+    Classify a log blob. Returns the highest-priority rule's result
+    (failure_type, is_root_cause, confidence, signals) or None.
+    If `evidence` is given, the first and last char offsets of every trigger
+    and signal match used are appended to it. `describe` supplies the fields
+    rules read (anything with Describe's container_for / lookup, such as
+    podlist.PodView); by default they are parsed from the text.
+    """
+    index = rules.current()
+    low = logs.lower() if logs.isascii() else None
+    pos, trigger = index.first_match(logs, low)
+    if pos is None:
         return None
 
-    signals = {}
-
-    m = re.search(r"[Ll]imits?[\s\S]{0,40}memory[:\s]+(\S+)", logs)
-    if m: signals["memory_limit"] = m.group(1)
-
-    m = re.search(r"[Rr]equests?[\s\S]{0,40}memory[:\s]+(\S+)", logs)
-    if m: signals["memory_request"] = m.group(1)
-
-    m = re.search(r"[Rr]estart\s+[Cc]ount[:\s]+(\d+)", logs)
-    if m: signals["restart_count"] = m.group(1)
-
-    if re.search(r"java\.lang\.OutOfMemoryError|GC overhead limit", logs):
-        signals["oom_type"] = "JVM heap exhaustion"
+    rule  = index.rules[pos]
+    find  = _text_finder(logs, low)
+    if rule.fields:
+        field = field_reader(describe if describe is not None else collect(logs), rule, evidence)
     else:
-        signals["oom_type"] = "container memory limit breached"
-
-    if re.search(r"Killed process|oom_kill_process", logs):
-        signals["kernel_oom"] = "true"
-
-    return {
-        "failure_type":  "OOMKilled / Exit Code 137",
-        "is_root_cause": True,
-        "confidence":    "high",
-        "signals":       signals,
-    }
+        field = None
+    if evidence is not None:
+        evidence.extend(trigger)
+        find = _recording(find, evidence)
+    return build_result(rule, find, field)
 
 
-# ── CreateContainerConfigError ────────────────────────────────────────────────
+# ── Matching ──────────────────────────────────────────────────────────────────
+# Pattern tables live in the rule index; HINTS maps each compiled pattern to
+# the lower-case literals a match must start with. For ASCII logs the search
+# begins at the first occurrence of a hint (a fast str.find) instead of
+# walking the regex across the whole text — or, for a pattern without hints,
+# is skipped when a literal every match contains (REQUIRED) is absent.
 
-def _detect_config_error(logs: str) -> dict | None:
-    patterns = [
-        r"CreateContainerConfigError",
-        r"secret[\"']?\s+not found",
-        r"configmap[\"']?\s+not found",
-        r"references non-existent secret",
-        r"couldn't find key",
-        r"invalid.*env",
-    ]
-    if not any(re.search(p, logs, re.IGNORECASE) for p in patterns):
+def search(rx, text: str, low: str | None, pos: int = 0):
+    """
+    rx.search(text, pos), skipped ahead to the pattern's hint when possible.
+    `low` is text.lower() for ASCII text, else None (no skipping).
+    """
+    hints = HINTS.get(rx)
+    if hints and low is not None:
+        starts = [p for p in (low.find(h, pos) for h in hints) if p >= 0]
+        if not starts:
+            return None
+        pos = min(starts)
+    elif low is not None and rx in REQUIRED and low.find(REQUIRED[rx], pos) < 0:
         return None
+    return rx.search(text, pos)
 
-    signals = {}
-
-    if re.search(r"[Ss]ecret", logs):
-        signals["missing_resource"] = "Secret"
-        m = re.search(r'secret[s]?["\s:/]+([a-z0-9][a-z0-9\-]+)', logs, re.IGNORECASE)
-        if m: signals["resource_name"] = m.group(1)
-
-    if re.search(r"[Cc]onfig[Mm]ap", logs):
-        signals["missing_resource"] = "ConfigMap"
-        m = re.search(r'configmap[s]?["\s:/]+([a-z0-9][a-z0-9\-]+)', logs, re.IGNORECASE)
-        if m: signals["resource_name"] = m.group(1)
-
-    m = re.search(r"namespace[:\s]+([a-z0-9\-]+)", logs, re.IGNORECASE)
-    if m: signals["namespace"] = m.group(1)
 
-    if re.search(r"\benv\b|environment", logs):
-        signals["env_var_issue"] = "true"
+# Signal extractors take `find(pattern) -> first Match | None`, so the same
+# rule steps can sit on top of different search strategies.
 
-    return {
-        "failure_type":  "CreateContainerConfigError",
-        "is_root_cause": True,
-        "confidence":    "high",
-        "signals":       signals,
-    }
+def _text_finder(logs: str, low: str | None):
+    return lambda rx: search(rx, logs, low)
 
 
-# ── CrashLoopBackOff ──────────────────────────────────────────────────────────
+def _recording(find, evidence: list):
+    def find_and_record(rx):
+        m = find(rx)
+        if m:
+            evidence.extend((m.start(), m.end() - 1))
+        return m
+    return find_and_record
 
-def _detect_crashloop(logs: str) -> dict | None:
-    patterns = [
-        r"CrashLoopBackOff",
-        r"[Bb]ack-?[Oo]ff restarting",
-    ]
-    if not any(re.search(p, logs, re.IGNORECASE) for p in patterns):
-        return None
 
-    signals = {}
+# ── Detection results ────────────────────────────────────────────────────────
+# Shared by every detector front end (full text here, streaming.StreamDetector,
+# watch.py): whatever the search strategy, a winning rule becomes the same
+# result dict and the same AgentState fields.
 
-    m = re.search(r"[Rr]estart\s+[Cc]ount[:\s]+(\d+)", logs)
-    if m:
-        signals["restart_count"] = m.group(1)
-        if int(m.group(1)) > 5:
-            signals["severity_hint"] = f"high — restarted {m.group(1)} times"
+def field_reader(describe: Describe, rule: Rule, evidence: list | None = None):
+    """
+    `field(path) -> value | None` over the container the rule's triggers point
+    at. Spans of the values read are appended to `evidence`, if given.
+    """
+    container = describe.container_for(rule.triggers)
 
-    m = re.search(r"[Ee]xit\s+[Cc]ode[:\s]+(\d+)", logs)
-    if m:
-        code = m.group(1)
-        signals["exit_code"] = code
-        exit_map = {
-            "1":   "application startup error",
-            "2":   "shell misuse / bad argument",
-            "137": "SIGKILL — likely OOMKilled",
-        }
-        signals["likely_cause"] = exit_map.get(code, f"non-zero exit ({code})")
+    def field(path):
+        hit = describe.lookup(path, container)
+        if hit is None:
+            return None
+        if evidence is not None:
+            evidence.extend(hit[1])
+        return hit[0]
+    return field
 
-    m = re.search(r"[Rr]eason[:\s]+(\w+)", logs)
-    if m: signals["termination_reason"] = m.group(1)
 
+def build_result(rule: Rule, find, field=None) -> dict:
+    """The detect() result for `rule`, its signals read through find() and field()."""
+    signals = extract(rule.signals, find, field=field)
     return {
-        "failure_type":  "CrashLoopBackOff",
-        "is_root_cause": False,          # symptom — deeper cause needed
-        "confidence":    "high",
+        "failure_type":  rule.failure_type,
+        "is_root_cause": rule.is_root_cause,
+        # A trigger with none of its rule's signals around is a weak match
+        "confidence":    rule.confidence if signals or not rule.signals else "low",
         "signals":       signals,
     }
+
+
+def apply_result(state: AgentState, result: dict | None) -> None:
+    """Write a detect() result (None: nothing found) into the state's detection fields."""
+    if result:
+        state["failure_type"]  = result["failure_type"]
+        state["is_root_cause"] = result["is_root_cause"]
+        state["signals"]       = result["signals"]
+        state["confidence"]    = result["confidence"]
+        state["route"]         = "analyze"
+    else:
+        state["failure_type"]  = None
+        state["is_root_cause"] = False
+        state["signals"]       = {}
+        state["confidence"]    = "low"
+        state["route"]         = "unknown"
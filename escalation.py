@@ -0,0 +1,338 @@
+# escalation.py
+# Deadlines, hedged requests and model tiers for the LLM call in analyze_node.
+#
+# Every analysis runs under a hard deadline (KUBE_DEBUG_LLM_DEADLINE, default
+# 45 s); past it analyze_node falls back to the rule's deterministic report.
+# Once an attempt has run longer than that model's recent p95, one duplicate
+# ("hedged") request is sent and the first good answer wins.
+#
+# With model "auto", the fast model (llama-3.1-8b-instant) is tried first under
+# its own deadline (KUBE_DEBUG_FAST_DEADLINE, default 6 s). The large model is
+# called when that answer fails validation, errors or is late — or straight
+# away when the detector's confidence is low (a trigger matched, but none of
+# the rule's signals did). A late fast answer still counts if it arrives before
+# the large one, even after the large model has failed.
+#
+#   outcome = policy().run(tiers, call, progress)          # call(model, progress) → (parsed, usage)
+#   outcome = await policy().arun(tiers, acall, progress, queued=True)   # acall calls admitted()
+#
+# Deadlines count from when an attempt is admitted by the rate limiter, not
+# from when it was queued, so a busy limiter delays analyses instead of
+# turning them into fallbacks.
+#
+# Set KUBE_DEBUG_HEDGE=off to disable hedged requests.
+
+import contextvars
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+AUTO        = "auto"
+FAST_MODEL  = "llama-3.1-8b-instant"
+LARGE_MODEL = "llama-3.3-70b-versatile"
+
+DEADLINE        = float(os.getenv("KUBE_DEBUG_LLM_DEADLINE", "45"))
+FAST_DEADLINE   = float(os.getenv("KUBE_DEBUG_FAST_DEADLINE", "6"))
+MIN_HEDGE_DELAY = 0.5     # never hedge sooner: below this, slowness is jitter, not a stuck request
+MIN_SAMPLES     = 20      # latencies seen for a model before its p95 is trusted
+WINDOW          = 200     # recent latencies kept per model
+
+SEVERITIES = ("critical", "high", "medium")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+def validate(parsed) -> str | None:
+    """What is wrong with an analysis answer, or None if it is usable as is."""
+    if not isinstance(parsed, dict):
+        return "not a JSON object"
+    if not isinstance(parsed.get("root_cause"), str) or not parsed["root_cause"].strip():
+        return "no root_cause"
+    if parsed.get("severity") not in SEVERITIES:
+        return f"severity {parsed.get('severity')!r}"
+    for key in ("remediation_steps", "kubectl_commands"):
+        value = parsed.get(key)
+        if not isinstance(value, list) or not value or not all(isinstance(v, str) for v in value):
+            return f"bad {key}"
+    return None
+
+
+def tiers_for(model: str, confidence: str | None) -> tuple[list, str | None]:
+    """Models to try in order, and why the fast tier is skipped (if it is)."""
+    if model != AUTO:
+        return [model], None
+    if confidence == "low":
+        return [LARGE_MODEL], "low detection confidence"
+    return [FAST_MODEL, LARGE_MODEL], None
+
+
+class Outcome:
+    __slots__ = ("parsed", "usage", "model", "escalation", "hedged")
+
+    def __init__(self, parsed: dict, usage, model: str, escalation: str | None, hedged: bool):
+        self.parsed     = parsed
+        self.usage      = usage
+        self.model      = model         # the model whose answer was used
+        self.escalation = escalation    # why a larger model was asked, or None
+        self.hedged     = hedged        # a duplicate request was sent
+
+
+class _Latencies:
+    """Recent successful call durations for one model."""
+
+    def __init__(self):
+        self._values = deque(maxlen=WINDOW)
+        self._lock   = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._values.append(seconds)
+
+    def p95(self) -> float | None:
+        with self._lock:
+            if len(self._values) < MIN_SAMPLES:
+                return None
+            values = sorted(self._values)
+        return values[min(len(values) - 1, int(0.95 * len(values)))]
+
+
+class Policy:
+    """Runs one analysis's attempts: tiers, hedging and deadlines. Latencies are shared across analyses."""
+
+    def __init__(self, deadline: float = DEADLINE, fast_deadline: float = FAST_DEADLINE, hedge: bool = True):
+        self.deadline      = deadline
+        self.fast_deadline = fast_deadline
+        self.hedge         = hedge
+        self._latencies    = {}
+        self._lock         = threading.Lock()
+
+    def _window(self, model: str) -> _Latencies:
+        with self._lock:
+            return self._latencies.setdefault(model, _Latencies())
+
+    def hedge_delay(self, model: str) -> float | None:
+        """When to send a duplicate request for `model`, or None (hedging off / too few samples)."""
+        p95 = self._window(model).p95() if self.hedge else None
+        return None if p95 is None else max(p95, MIN_HEDGE_DELAY)
+
+    def _race(self, tiers: list, reason: str | None, admitted: dict):
+        """
+        The policy as a generator, shared by run() and arun(). It yields
+        ("start", model, primary) — sent back: an attempt handle — and
+        ("wait", timeout | None) — sent back: [(handle, result, error)] of attempts
+        that finished (possibly none: an attempt was admitted). It returns the
+        Outcome or raises the final error.
+
+        `admitted` maps handles to when they got past the rate limiter. Clocks
+        start there, so time spent queued never counts against a deadline.
+        """
+        deadline = math.inf  # set by the first admitted attempt
+        pending  = {}        # handle → model, across tiers: a late fast answer can still win
+        best = error = None
+        escalation, hedged = reason, False
+
+        for i, model in enumerate(tiers):
+            final    = i == len(tiers) - 1
+            primary  = yield ("start", model, True)
+            pending[primary] = model
+            live     = {primary}
+            delay    = self.hedge_delay(model)
+            hedge_sent = False
+
+            # The last tier also waits for earlier tiers' attempts still running
+            while live or (final and pending):
+                if deadline == math.inf and admitted:
+                    deadline = min(admitted.values()) + self.deadline
+                start    = admitted.get(primary)
+                tier_end = deadline if final or start is None else min(deadline, start + self.fast_deadline)
+                hedge_at = start + delay if start is not None and delay is not None and not hedge_sent else math.inf
+                now = time.monotonic()
+                if now >= tier_end:
+                    break
+                if live and now >= hedge_at:
+                    handle = yield ("start", model, False)
+                    pending[handle] = model
+                    live.add(handle)
+                    hedged = hedge_sent = True
+                    continue
+                wake = min(tier_end, hedge_at)
+                for handle, result, exc in (yield ("wait", None if wake == math.inf else wake - now)):
+                    done_model = pending.pop(handle)
+                    live.discard(handle)
+                    if exc is not None:
+                        error = exc
+                        continue
+                    problem = validate(result[0])
+                    if problem is None:
+                        return Outcome(result[0], result[1], done_model, escalation, hedged)
+                    best  = best or (result, done_model)
+                    error = ValueError(f"{done_model} answer failed validation: {problem}")
+
+            if not final and escalation is None:
+                escalation = (f"{model} missed its {self.fast_deadline:g}s deadline" if live
+                              else str(error)[:200])
+
+        if best is not None:
+            # Nothing valid arrived: an answer with gaps beats the deterministic fallback
+            (parsed, usage), model = best
+            return Outcome(parsed, usage, model, escalation, hedged)
+        if pending or error is None:
+            raise DeadlineExceeded(f"no LLM answer within {self.deadline:g}s")
+        raise error
+
+    def _timed(self, call, model: str, progress):
+        t0 = time.monotonic()
+        result = call(model, progress)
+        self._window(model).observe(time.monotonic() - t0)
+        return result
+
+    def run(self, tiers: list, call, progress=None, reason: str | None = None) -> Outcome:
+        """
+        Sync driver. Attempts run on worker threads so deadlines hold; partial
+        reports are handed back to the calling thread, so progress is only ever
+        called here — and never after run() returns.
+        """
+        events   = queue.SimpleQueue()    # ("partial", attempt, report) | ("done", future)
+        current  = [None]                  # attempt whose partial reports are shown
+        admitted = {}                      # no rate limiter here: attempts start at once
+
+        def start(model, primary):
+            attempt = object()
+            emit = None
+            if primary and progress is not None:
+                current[0] = attempt
+                emit = lambda report: events.put(("partial", attempt, report))
+            future = _executor().submit(contextvars.copy_context().run, self._timed, call, model, emit)
+            admitted[future] = time.monotonic()
+            future.add_done_callback(lambda f: events.put(("done", f)))
+            return future
+
+        race, futures = self._race(tiers, reason, admitted), []
+        try:
+            step = next(race)
+            while True:
+                if step[0] == "start":
+                    futures.append(start(step[1], step[2]))
+                    step = race.send(futures[-1])
+                    continue
+                finished = []
+                end = math.inf if step[1] is None else time.monotonic() + step[1]
+                while not finished:
+                    try:
+                        event = events.get(timeout=None if end == math.inf else max(0.0, end - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if event[0] == "partial":
+                        if event[1] is current[0]:
+                            progress(event[2])
+                    else:
+                        future = event[1]
+                        exc = future.exception()
+                        finished.append((future, None if exc else future.result(), exc))
+                step = race.send(finished)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            for future in futures:
+                future.cancel()           # queued ones only; running calls end with their HTTP timeout
+
+    async def arun(self, tiers: list, call, progress=None, reason: str | None = None,
+                   queued: bool = False) -> Outcome:
+        """
+        Async driver: attempts are tasks, and the ones still running at the end
+        are cancelled. With `queued`, each attempt waits in a rate limiter first
+        and calls admitted() once it is let through; deadlines, hedge timers and
+        latency samples start from there.
+        """
+        import asyncio     # on first use, as in nodes.aanalyze_node: keeps `import nodes` light
+        loop     = asyncio.get_running_loop()
+        current  = [None]
+        admitted = {}
+        wake     = [None]                  # future the driver waits on, resolved by an admission
+
+        def start(model, primary):
+            attempt = object()
+            emit = None
+            if primary and progress is not None:
+                current[0] = attempt
+                emit = lambda report: progress(report) if current[0] is attempt else None
+
+            def on_admit():
+                admitted.setdefault(task, time.monotonic())
+                if wake[0] is not None and not wake[0].done():
+                    wake[0].set_result(None)
+
+            async def attempt_call():
+                if queued:
+                    _admit.set(on_admit)   # the task's own context: only this attempt sees it
+                result = await call(model, emit)
+                self._window(model).observe(time.monotonic() - admitted.get(task, time.monotonic()))
+                return result
+
+            task = asyncio.ensure_future(attempt_call())
+            if not queued:
+                admitted[task] = time.monotonic()
+            return task
+
+        race, tasks, waiting = self._race(tiers, reason, admitted), [], set()
+        try:
+            step = next(race)
+            while True:
+                if step[0] == "start":
+                    tasks.append(start(step[1], step[2]))
+                    waiting.add(tasks[-1])
+                    step = race.send(tasks[-1])
+                    continue
+                wake[0] = loop.create_future()
+                done, _ = await asyncio.wait({*waiting, wake[0]}, timeout=step[1],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                wake[0].cancel()
+                wake[0] = None
+                done = [t for t in done if t in waiting]
+                waiting.difference_update(done)
+                step = race.send([(t, None if t.exception() else t.result(), t.exception()) for t in done])
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            current[0] = None
+            for task in tasks:
+                task.cancel()
+
+
+_admit: contextvars.ContextVar = contextvars.ContextVar("escalation_admit", default=None)
+
+
+def admitted() -> None:
+    """Tell the running attempt's policy that its rate limiter let it through (see Policy.arun)."""
+    callback = _admit.get()
+    if callback is not None:
+        callback()
+
+
+_executor_lock = threading.Lock()
+_pool = None                  # ThreadPoolExecutor, built (and concurrent.futures imported) on first sync run
+_default: Policy | None = None
+
+
+def _executor():
+    global _pool
+    with _executor_lock:
+        if _pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            # Abandoned attempts keep a worker until their HTTP call ends, so leave headroom
+            _pool = ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-attempt")
+        return _pool
+
+
+def policy() -> Policy:
+    """Process-wide policy, so every analysis feeds the same latency windows."""
+    global _default
+    with _executor_lock:
+        if _default is None:
+            _default = Policy(hedge=os.getenv("KUBE_DEBUG_HEDGE", "").lower() != "off")
+        return _default
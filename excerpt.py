@@ -0,0 +1,186 @@
+# excerpt.py
+# Signal-aware log excerpt for the LLM prompt.
+#
+# Instead of the first N characters (usually startup noise), lines are ranked
+# by relevance — detector match offsets, fatal/error keywords, the Events
+# section, the last few lines — deduplicated, and packed into a fixed budget.
+# Single pass, memory bounded by the budget, so it also works on streamed files.
+
+import heapq
+import re
+from bisect import bisect_right
+from collections import deque
+
+DEFAULT_BUDGET = 2500    # characters — same size as the old raw_logs[:2500]
+TAIL_LINES     = 15
+MAX_LINE_CHARS = 300
+GAP            = "…"
+
+BLOCK_LINES    = 4096    # lines keyword-scanned together (one regex pass per block)
+
+SCORE_EVIDENCE = 100     # line contains a detector match
+SCORE_FATAL    = 30
+SCORE_ERROR    = 20
+SCORE_TAIL     = 15
+SCORE_EVENTS   = 15
+SCORE_WARN     = 10
+
+# Keyword classes, written in lower case; a line scores its best class.
+_KEYWORDS = [
+    (r"fatal|panic|oomkill|out of memory|killed|sigkill|segfault|traceback", SCORE_FATAL),
+    (r"error|exception|fail|refused|denied|not found|timed? ?out",           SCORE_ERROR),
+    (r"warn|back-?off|unhealthy|evict",                                      SCORE_WARN),
+]
+_COMPILED_KEYWORDS = [(re.compile(p), re.compile(p, re.IGNORECASE), score) for p, score in _KEYWORDS]
+_NOISE_RE = re.compile(r"\d+|\s+")
+
+
+def iter_lines(text: str, start: int = 0):
+    """Yield (offset, line) for each line of text, without splitting it all at once."""
+    pos, n = 0, len(text)
+    while pos < n:
+        end = text.find("\n", pos)
+        end = n if end < 0 else end + 1
+        yield start + pos, text[pos:end]
+        pos = end
+
+
+def iter_file_lines(path):
+    """iter_lines for a file on disk, decoded the same way StreamDetector decodes bytes."""
+    offset = 0
+    with open(path, encoding="utf-8", errors="replace", newline="") as fh:
+        for line in fh:
+            yield offset, line
+            offset += len(line)
+
+
+def _keyword_scores(block: list) -> dict:
+    """Map line index → keyword score for a block of (offset, line) pairs."""
+    text = "".join(raw for _, raw in block)
+    starts, pos = [], 0
+    for _, raw in block:
+        starts.append(pos)
+        pos += len(raw)
+
+    # Same trick as the detector: lower-case ASCII once, then match case-sensitively.
+    ascii_ = text.isascii()
+    if ascii_:
+        text = text.lower()
+
+    scores = {}
+    for fast, folded, score in _COMPILED_KEYWORDS:
+        for m in (fast if ascii_ else folded).finditer(text):
+            i = bisect_right(starts, m.start()) - 1
+            if scores.get(i, 0) < score:
+                scores[i] = score
+    return scores
+
+
+def _blocks(lines, size: int):
+    block = []
+    for item in lines:
+        block.append(item)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def _dedupe_key(line: str, has_evidence: bool) -> str:
+    # Near-duplicates (same line, different numbers) collapse — except evidence.
+    return line.strip() if has_evidence else _NOISE_RE.sub(" ", line.strip())
+
+
+def build_excerpt(lines, evidence=(), budget: int = DEFAULT_BUDGET,
+                  tail_lines: int = TAIL_LINES) -> str:
+    """
+    `lines` is a str or an iterable of (offset, line) pairs (see iter_lines);
+    `evidence` holds char offsets of detector matches in the same coordinates.
+    Returns the selected lines in their original order, gaps marked with "…".
+    """
+    if isinstance(lines, str):
+        if len(lines) <= budget:
+            return lines        # fits as-is — nothing to choose
+        lines = iter_lines(lines)
+
+    marks = sorted(evidence)
+    mi = 0
+    in_events = False
+    index = -1             # counts non-blank lines, so blank lines don't read as gaps
+    heap = []              # (score, index, line, key) — lowest score evicted first
+    heap_keys = set()
+    heap_chars = 0
+    tail = deque(maxlen=tail_lines)
+
+    for block in _blocks(lines, BLOCK_LINES):
+        keyword_scores = _keyword_scores(block)
+
+        for j, (offset, raw) in enumerate(block):
+            end = offset + len(raw)
+            has_evidence = False
+            while mi < len(marks) and marks[mi] < end:
+                has_evidence |= marks[mi] >= offset
+                mi += 1
+
+            line = raw.rstrip()
+            if not line.strip():
+                continue
+            index += 1
+            if len(line) > MAX_LINE_CHARS:
+                line = line[:MAX_LINE_CHARS] + GAP
+
+            if line.strip() == "Events:":
+                in_events = True
+            elif in_events and not line[0].isspace():
+                in_events = False
+
+            score = keyword_scores.get(j, 0)
+            if has_evidence:
+                score += SCORE_EVIDENCE
+            if in_events:
+                score += SCORE_EVENTS
+
+            tail.append((score, index, line, has_evidence))
+            if score <= 0:
+                continue
+
+            key = _dedupe_key(line, has_evidence)
+            if key in heap_keys:
+                continue
+            heapq.heappush(heap, (score, index, line, key))
+            heap_keys.add(key)
+            heap_chars += len(line) + 1
+            while heap_chars > budget:
+                _, _, dropped, dropped_key = heapq.heappop(heap)
+                heap_keys.discard(dropped_key)
+                heap_chars -= len(dropped) + 1
+
+    # Tail lines compete with the ranked candidates on equal terms; duplicates
+    # keep their highest-scoring occurrence.
+    chosen, keys = {}, {}
+    tail = [(s + SCORE_TAIL, i, l, _dedupe_key(l, e)) for s, i, l, e in tail]
+    for score, idx, line, key in heap + tail:
+        if key in keys:
+            if chosen[keys[key]][0] >= score:
+                continue
+            del chosen[keys[key]]
+        chosen[idx] = (score, line)
+        keys[key] = idx
+
+    picked, used = [], 0
+    for idx, (score, line) in sorted(chosen.items(), key=lambda kv: (-kv[1][0], -kv[0])):
+        if used + len(line) + 1 > budget:
+            continue
+        picked.append(idx)
+        used += len(line) + 1
+
+    out, prev = [], -1
+    for idx in sorted(picked):
+        if idx != prev + 1:
+            out.append(GAP)
+        out.append(chosen[idx][1])
+        prev = idx
+    if out and prev != index:
+        out.append(GAP)
+    return "\n".join(out)
@@ -1,48 +1,75 @@
 # graph.py
 # The REAL LangGraph graph — uses StateGraph, add_node, add_edge,
 # add_conditional_edges, START, END, and .compile().invoke()
+#
+# Importing this module is cheap: langgraph is only imported, and the graph
+# only compiled, the first time it is needed (see compiled_graph below).
 
-from langgraph.graph import StateGraph, START, END
-from state import AgentState
+import contextvars
+import os
+import queue
+import threading
+from typing import TYPE_CHECKING
+from state import AgentState, new_state
 from detector import detect_node
-from nodes import analyze_node, format_node, unknown_node, route_after_detect
+from nodes import (analyze_node, aanalyze_node, format_node, pattern_node, unknown_node, route_after_detect,
+                   provisional_report, reset_progress, upgrade_report, use_progress)
+from metrics import instrument, span
 
+if TYPE_CHECKING:
+    from ratelimit import RateLimiter     # annotation only: asyncio stays unimported until arun_graph
 
-def build_graph():
+# Every node wrapped once, so each call is timed and traced — shared by the
+# LangGraph graph and the direct executor, so both record the same metrics.
+_NODES = {
+    "detect":  instrument("detect",  detect_node),
+    "analyze": instrument("analyze", analyze_node),
+    "pattern": instrument("pattern", pattern_node),
+    "format":  instrument("format",  format_node),
+    "unknown": instrument("unknown", unknown_node),
+}
+_ASYNC_ANALYZE = instrument("analyze", aanalyze_node)
+
+
+def build_graph(use_async: bool = False):
     """
     Build and compile the LangGraph StateGraph.
+    use_async=True registers aanalyze_node, for use with .ainvoke().
 
     Graph topology:
         START
           └─► detect_node
                 ├─(route="analyze")──► analyze_node ──► format_node ──► END
+                ├─(route="pattern")──► pattern_node ──► format_node ──► END
                 └─(route="unknown")──► unknown_node ──────────────────► END
     """
+    from langgraph.graph import StateGraph, START, END
+
     # 1. Create the graph with our typed state
     graph = StateGraph(AgentState)
 
-    # 2. Register nodes
-    graph.add_node("detect",  detect_node)
-    graph.add_node("analyze", analyze_node)
-    graph.add_node("format",  format_node)
-    graph.add_node("unknown", unknown_node)
+    # 2. Register nodes — each wrapped so every call is timed and traced
+    for name, node in _NODES.items():
+        graph.add_node(name, _ASYNC_ANALYZE if use_async and name == "analyze" else node)
 
     # 3. Entry edge: START → detect
     graph.add_edge(START, "detect")
 
     # 4. Conditional edge after detect:
-    #    route_after_detect reads state["route"] and returns "analyze" or "unknown"
+    #    route_after_detect reads state["route"] and returns "analyze", "pattern" or "unknown"
     graph.add_conditional_edges(
         "detect",
         route_after_detect,
         {
             "analyze": "analyze",
+            "pattern": "pattern",
             "unknown": "unknown",
         }
     )
 
-    # 5. Linear edge: analyze → format → END
+    # 5. Linear edges: analyze / pattern → format → END
     graph.add_edge("analyze", "format")
+    graph.add_edge("pattern", "format")
     graph.add_edge("format",  END)
 
     # 6. unknown node goes straight to END
@@ -52,33 +79,181 @@ def build_graph():
     return graph.compile()
 
 
-# Build once at module level — reused across Streamlit reruns
-compiled_graph = build_graph()
+# Built once, on first use — reused across Streamlit reruns
+_compiled_graph       = None
+_compiled_async_graph = None     # with aanalyze_node, for arun_graph
+
+
+def get_compiled_graph():
+    global _compiled_graph
+    if _compiled_graph is None:
+        _compiled_graph = build_graph()
+    return _compiled_graph
+
 
+def __getattr__(name):
+    # `from graph import compiled_graph` keeps working, without compiling at import time
+    if name == "compiled_graph":
+        return get_compiled_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def run_graph(raw_logs: str, groq_api_key: str, model: str) -> dict:
+
+def run_graph(raw_logs: str, groq_api_key: str, model: str, log_path: str | None = None,
+              on_partial=None) -> dict:
     """
     Invoke the compiled LangGraph graph.
     Returns final_report dict from the last node.
+    Pass log_path (with raw_logs="") to analyze a stored log file without loading it.
+    With on_partial, the LLM answer is streamed: on_partial(report) is called with
+    a partial report (report["partial"] is True) each time another field is complete.
     """
-    initial_state: AgentState = {
-        "raw_logs":      raw_logs,
-        "groq_api_key":  groq_api_key,
-        "model":         model,
-        "failure_type":  None,
-        "is_root_cause": None,
-        "signals":       None,
-        "confidence":    None,
-        "route":         None,
-        "root_cause":    None,
-        "explanation":   None,
-        "severity":      None,
-        "remediation_steps": None,
-        "kubectl_commands":  None,
-        "final_report":  None,
-        "error":         None,
-    }
+    initial_state = new_state(raw_logs, groq_api_key, model, log_path)
+    size = os.path.getsize(log_path) if log_path else len(raw_logs)
 
     # .invoke() runs the full graph and returns final state
-    final_state = compiled_graph.invoke(initial_state)
+    token = use_progress(on_partial)
+    try:
+        with span("run_graph", input_bytes=size, model=model):
+            final_state = get_compiled_graph().invoke(initial_state)
+    finally:
+        reset_progress(token)
     return final_state.get("final_report", {})
+
+
+async def arun_graph(raw_logs: str, groq_api_key: str, model: str,
+                     limiter: "RateLimiter | None" = None, on_partial=None) -> dict:
+    """
+    Async run_graph: many calls can share one event loop. LLM calls go through
+    `limiter` (default: the loop's shared ratelimit.RateLimiter). on_partial as in run_graph.
+    """
+    from ratelimit import reset_limiter, use_limiter
+
+    global _compiled_async_graph
+    if _compiled_async_graph is None:
+        _compiled_async_graph = build_graph(use_async=True)
+
+    token, progress = use_limiter(limiter), use_progress(on_partial)
+    try:
+        with span("arun_graph", input_bytes=len(raw_logs), model=model):
+            final_state = await _compiled_async_graph.ainvoke(new_state(raw_logs, groq_api_key, model))
+    finally:
+        reset_progress(progress)
+        reset_limiter(token)
+    return final_state.get("final_report", {})
+
+
+# ── Direct executor ──────────────────────────────────────────────────────────
+# The same topology and instrumented nodes as build_graph, dispatched as plain
+# function calls. With no API key every path is deterministic and completes in
+# microseconds.
+
+_PATHS = {
+    "analyze": (_NODES["analyze"], _NODES["format"]),
+    "pattern": (_NODES["pattern"], _NODES["format"]),
+    "unknown": (_NODES["unknown"],),
+}
+
+
+def run_nodes(state: AgentState) -> AgentState:
+    """Run everything after detect_node for an already-detected state."""
+    for node in _PATHS[route_after_detect(state)]:
+        state = node(state)
+    return state
+
+
+def run_direct(raw_logs: str, groq_api_key: str = "", model: str = "llama-3.3-70b-versatile",
+               log_path: str | None = None, on_partial=None) -> dict:
+    """
+    run_graph without LangGraph: detect, route, then the route's nodes in order.
+    Produces the same final_report as run_graph for the same inputs.
+    """
+    size  = os.path.getsize(log_path) if log_path else len(raw_logs)
+    token = use_progress(on_partial)
+    try:
+        with span("run_direct", input_bytes=size, model=model):
+            state = run_nodes(_NODES["detect"](new_state(raw_logs, groq_api_key, model, log_path)))
+    finally:
+        reset_progress(token)
+    return state.get("final_report", {})
+
+
+# ── Speculative execution ───────────────────────────────────────────────────
+# The deterministic report is ready as soon as detection is. speculate() hands
+# it back at once and runs the LLM analysis in the background; each streamed
+# field replaces its provisional counterpart as it lands.
+
+_speculation_pool = None
+_speculation_lock = threading.Lock()
+_DONE = object()
+
+
+class Speculation:
+    """
+    A report available now and upgraded in the background. `report` is always
+    the latest version; its "provisional" list names the fields that are still
+    rule-based (empty once the analysis is final).
+    """
+
+    def __init__(self, report: dict, final: bool = False):
+        self.report   = report
+        self._future  = None         # the background analysis, when there is one
+        self._updates = queue.SimpleQueue()
+        if final:
+            self._updates.put(_DONE)
+
+    def _publish(self, report: dict) -> None:
+        self.report = report
+        self._updates.put(report)
+
+    def done(self) -> bool:
+        return self._future is None or self._future.done()
+
+    def result(self, timeout: float | None = None) -> dict:
+        """The final report, waiting for the analysis if needed."""
+        return self._future.result(timeout) if self._future is not None else self.report
+
+    def updates(self, timeout: float | None = None):
+        """Yield each newer report in the calling thread, ending with the final one."""
+        while True:
+            report = self._updates.get(timeout=timeout)
+            if report is _DONE:
+                return
+            yield report
+
+
+def speculate(raw_logs: str, groq_api_key: str, model: str, log_path: str | None = None,
+              stream: bool = True) -> Speculation:
+    """
+    Detect now and return a Speculation whose report is already complete
+    (nodes.provisional_report). The LLM analysis, if the route needs one, runs
+    on a background thread and replaces it — field by field with `stream`.
+    """
+    global _speculation_pool
+    size = os.path.getsize(log_path) if log_path else len(raw_logs)
+    # Root span for the foreground part; the upgrade's span joins its trace
+    with span("speculate", input_bytes=size, model=model):
+        state = _NODES["detect"](new_state(raw_logs, groq_api_key, model, log_path))
+        if route_after_detect(state) != "analyze":
+            # Nothing to wait for: the deterministic paths take microseconds
+            return Speculation({**run_nodes(state).get("final_report", {}), "provisional": []}, final=True)
+        base = provisional_report(state)
+        context = contextvars.copy_context()     # inside the span: the upgrade shares its trace
+    spec = Speculation(base)
+
+    def upgrade() -> dict:
+        token = use_progress((lambda partial: spec._publish(upgrade_report(base, partial))) if stream else None)
+        try:
+            with span("speculate_upgrade", input_bytes=size, model=model):
+                final = {**run_nodes(state).get("final_report", {}), "provisional": []}
+            spec._publish(final)
+            return final
+        finally:
+            reset_progress(token)
+            spec._updates.put(_DONE)
+
+    with _speculation_lock:
+        if _speculation_pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _speculation_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="speculate")
+    spec._future = _speculation_pool.submit(context.run, upgrade)
+    return spec
@@ -0,0 +1,164 @@
+# grouping.py
+# Cluster-wide grouping of identical failures. A bad rollout gives hundreds of
+# replicas the same failure type and nearly the same signals; only the first pod
+# of each group (the leader) is analyzed, and its analysis is fanned out to the
+# rest with the leader's pod name and namespace replaced by each member's own.
+#
+#   groups = Groups()
+#   group, leader = groups.join(pod, state)
+#   if leader:                 analyze state, then write it and every (pod, state) in groups.done(group, state)
+#   elif group.state is None:  nothing yet — the follower comes back from done()
+#   else:                      write groups.follow(group, pod, state)
+#
+# A fingerprint is the workload (namespace plus pod name without its
+# ReplicaSet / StatefulSet / generated suffix), the detection result and the
+# normalized log excerpt. So replicas of one rollout share an analysis, and
+# unrelated workloads that fail the same way do not.
+#
+# Only failing pods are grouped. Pods are "namespace/name" (or just "name")
+# strings. LLM spend and wall time scale with distinct fingerprints, not pods.
+
+import hashlib
+import json
+import re
+
+from cache import normalize_excerpt
+from excerpt import build_excerpt
+from state import AgentState
+
+# Signals that differ between replicas of one failure without changing the diagnosis.
+VOLATILE_SIGNALS = {"restart_count", "severity_hint"}
+
+# Generated pod-name suffixes use Kubernetes' vowel-free alphabet (so they never
+# spell words): deployment pods end in -<pod-template-hash>-<5>, DaemonSet and
+# Job pods in -<5>, StatefulSet pods in -<ordinal>.
+_SAFE     = "[bcdfghjklmnpqrstvwxz2456789]"
+_SUFFIX_RE = re.compile(rf"-(?:{_SAFE}{{6,10}}-{_SAFE}{{5}}|{_SAFE}{{5}}|\d+)$")
+_NUMBER_RE = re.compile(r"\d+")
+
+# Analysis fields copied from the leader (text in them gets name substitution).
+ANALYSIS_FIELDS  = ("root_cause", "explanation", "severity", "remediation_steps", "kubectl_commands",
+                    "analysis_source", "analysis_model")
+
+
+def identity(pod: str, state: AgentState | None = None) -> tuple[str | None, str]:
+    """(namespace, name) of a "namespace/name" pod, or of a bare name plus its namespace signal."""
+    namespace, _, name = pod.rpartition("/")
+    if not namespace and state is not None:
+        namespace = (state.get("signals") or {}).get("namespace") or ""
+    return namespace.rpartition("/")[2] or None, name
+
+
+def workload(name: str) -> str:
+    """Pod name without its generated suffix: "api-7d9f8c6bd5-x2bkq" → "api", "db-0" → "db"."""
+    stripped = _SUFFIX_RE.sub("", name)
+    return stripped or name
+
+
+def group_key(pod: str, state: AgentState) -> str:
+    """
+    Fingerprint of a detected failure: workload, detection result and log
+    excerpt, with pod names, hashes, timestamps, numbers and volatile signals removed.
+    """
+    namespace, name = identity(pod, state)
+
+    def normalize(text: str) -> str:
+        return normalize_excerpt(_substitute(text, name, "<pod>", namespace, "<namespace>"))
+
+    signals = {str(key): normalize(str(value)) for key, value in (state.get("signals") or {}).items()
+               if key not in VOLATILE_SIGNALS}
+    if not state.get("log_excerpt"):
+        # Built once here and reused by analyze_node, which reads the same field
+        state["log_excerpt"] = build_excerpt(state.get("raw_logs") or "", state.get("evidence") or ())
+    payload = json.dumps({
+        "namespace":     namespace,
+        "workload":      workload(name),
+        "failure_type":  state.get("failure_type"),
+        "is_root_cause": bool(state.get("is_root_cause")),
+        "signals":       signals,
+        # Counters, ports and latencies vary between replicas; the messages do not
+        "excerpt":       _NUMBER_RE.sub("<n>", normalize(state["log_excerpt"])),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def _substitute(text: str, name: str, new_name: str, namespace: str | None, new_namespace: str | None) -> str:
+    """Replace whole-word occurrences of a pod name / namespace (not parts of longer names)."""
+    if name and name != new_name:
+        text = re.sub(rf"(?<![\w.-]){re.escape(name)}(?![\w-])", new_name, text)
+    if namespace and new_namespace and namespace != new_namespace:
+        text = re.sub(rf"(?<![\w.-]){re.escape(namespace)}(?![\w-])", new_namespace, text)
+    return text
+
+
+def fan_out(leader_pod: str, leader: AgentState, pod: str, state: AgentState) -> AgentState:
+    """Give `state` the leader's analysis, rewritten for `pod`, and assemble its report."""
+    from nodes import format_node
+
+    old_ns, old_name = identity(leader_pod, leader)
+    new_ns, new_name = identity(pod, state)
+
+    def rewrite(value):
+        if isinstance(value, str):
+            return _substitute(value, old_name, new_name, old_ns, new_ns)
+        if isinstance(value, list):
+            return [rewrite(v) for v in value]
+        return value
+
+    for field in ANALYSIS_FIELDS:
+        state[field] = rewrite(leader.get(field))
+    return format_node(state)
+
+
+# ── Leader / follower bookkeeping ────────────────────────────────────────────
+
+class Group:
+    __slots__ = ("key", "leader", "state", "waiting", "size")
+
+    def __init__(self, key: str, leader: str):
+        self.key     = key
+        self.leader  = leader     # pod whose analysis is shared
+        self.state   = None       # the leader's analyzed state, once done
+        self.waiting = []         # (pod, state) followers that joined before it was done
+        self.size    = 1
+
+
+class Groups:
+    """
+    Not thread-safe: call join() and done() from the thread that collects
+    results (batch.py and podlist.py both do). Only the analysis runs elsewhere.
+    """
+
+    def __init__(self):
+        self.groups = {}
+
+    def join(self, pod: str, state: AgentState) -> tuple[Group, bool]:
+        """The pod's group, and whether it is the leader (and must be analyzed)."""
+        key   = group_key(pod, state)
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = Group(key, pod)
+            return group, True
+        group.size += 1
+        if group.state is None:
+            group.waiting.append((pod, state))
+        return group, False
+
+    def follow(self, group: Group, pod: str, state: AgentState) -> AgentState:
+        """A follower that joined after its leader was done: fanned out immediately."""
+        return fan_out(group.leader, group.state, pod, state)
+
+    def done(self, group: Group, state: AgentState) -> list[tuple[str, AgentState]]:
+        """Record the leader's analyzed state; returns the waiting followers, fanned out."""
+        group.state = state
+        waiting, group.waiting = group.waiting, []
+        return [(pod, fan_out(group.leader, state, pod, member)) for pod, member in waiting]
+
+    def fail(self, group: Group) -> list[tuple[str, AgentState]]:
+        """The leader's analysis failed: forget the group (the next such pod leads anew); returns its waiting followers."""
+        self.groups.pop(group.key, None)
+        waiting, group.waiting = group.waiting, []
+        return waiting
+
+    def __len__(self) -> int:
+        return len(self.groups)
@@ -0,0 +1,128 @@
+# jsonstream.py
+# Incremental parsing of one JSON object arriving in pieces (an LLM token
+# stream). Top-level fields become available the moment their value is
+# complete; array fields grow one finished item at a time. Text before the
+# opening brace (a ```json fence, a preamble) and after the closing one is ignored.
+#
+#   stream = ObjectStream()
+#   for chunk in chunks:
+#       if stream.feed(chunk):
+#           show(stream.fields)        # e.g. {"root_cause": "...", "remediation_steps": ["Step 1…"]}
+#   stream.done                       # True once the closing brace arrived
+
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+_SPACE   = re.compile(r"[ \t\n\r]*")
+
+
+class ObjectStream:
+    """Resumable parser for a single top-level JSON object."""
+
+    def __init__(self):
+        self.fields = {}
+        self.done   = False
+        self.failed = False      # structurally not a JSON object; callers then parse the whole text
+        self._buf   = ""
+        self._pos   = 0
+        self._state = "start"    # start → key → colon → value → next, or item / after_item inside arrays
+        self._key   = None
+
+    def feed(self, text: str) -> bool:
+        """Add text. Returns True if a field was completed or an array gained an item."""
+        if self.done or self.failed:
+            return False
+        self._buf += text
+        changed = False
+        while self._step():
+            changed = True
+        return changed
+
+    def _step(self) -> bool:
+        """Advance as far as the buffer allows; True after each completed field or item."""
+        buf = self._buf
+        while True:
+            if self._state == "start":
+                i = buf.find("{", self._pos)
+                if i < 0:
+                    self._pos = len(buf)
+                    return False
+                self._pos, self._state = i + 1, "key"
+                continue
+
+            self._pos = _SPACE.match(buf, self._pos).end()
+            if self._pos >= len(buf):
+                return False
+            c = buf[self._pos]
+
+            if self._state in ("key", "next"):
+                if c == "}":
+                    self._pos += 1
+                    self.done, self._state = True, "end"
+                    return False
+                if self._state == "next":
+                    if c != ",":
+                        return self._fail()
+                    self._pos += 1
+                    self._state = "key"
+                    continue
+                value, ok = self._value()
+                if not ok:
+                    return False
+                if not isinstance(value, str):
+                    return self._fail()
+                self._key, self._state = value, "colon"
+            elif self._state == "colon":
+                if c != ":":
+                    return self._fail()
+                self._pos += 1
+                self._state = "value"
+            elif self._state == "value":
+                if c == "[":
+                    self._pos += 1
+                    self.fields[self._key] = []
+                    self._state = "item"
+                    continue
+                value, ok = self._value()
+                if not ok:
+                    return False
+                self.fields[self._key] = value
+                self._state = "next"
+                return True
+            elif self._state == "item":
+                if c == "]":
+                    self._pos += 1
+                    self._state = "next"
+                    continue
+                value, ok = self._value()
+                if not ok:
+                    return False
+                self.fields[self._key].append(value)
+                self._state = "after_item"
+                return True
+            elif self._state == "after_item":
+                if c not in ",]":
+                    return self._fail()
+                self._pos += 1
+                self._state = "item" if c == "," else "next"
+            else:
+                return False
+
+    def _value(self):
+        """(value, True) if a complete value starts at _pos, else (None, False) to wait for more."""
+        try:
+            value, end = _DECODER.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            return None, False           # incomplete (or invalid: then the object never completes)
+        if not isinstance(value, (str, dict, list)):
+            # A number or literal is only complete once a delimiter follows ("1" may become "1.5")
+            after = _SPACE.match(self._buf, end).end()
+            if after >= len(self._buf) or self._buf[after] not in ",]}":
+                return None, False
+        self._pos = end
+        return value, True
+
+    def _fail(self) -> bool:
+        self.failed = True
+        return False
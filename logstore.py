@@ -0,0 +1,167 @@
+# logstore.py
+# Server-side store for large log inputs. An upload is copied to disk once, in
+# chunks, and from then on only a small LogHandle is passed around — to the
+# graph (run_graph(log_path=...)), to the result cache and to the paged preview.
+#
+# Location: $KUBE_DEBUG_LOG_STORE, default <tmp>/kube-debug-ai-logs.
+# Files are content-addressed (same upload → same file) and evicted by age/size.
+
+import hashlib
+import os
+import tempfile
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+
+DEFAULT_DIR   = Path(tempfile.gettempdir()) / "kube-debug-ai-logs"
+MAX_AGE       = 24 * 3600          # seconds a stored log is kept
+MAX_BYTES     = 4 * 1024 ** 3      # total store size before the oldest files go
+COPY_CHUNK    = 1 << 20
+INDEX_STRIDE  = 64                 # lines between index checkpoints
+
+
+def store_dir() -> Path:
+    path = Path(os.getenv("KUBE_DEBUG_LOG_STORE") or DEFAULT_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+# ── Line index ───────────────────────────────────────────────────────────────
+
+@dataclass
+class LineIndex:
+    """
+    Sparse index: byte and char offset of every INDEX_STRIDE-th line. Lets a page
+    of lines be read with one seek, and a char offset (detector evidence) be
+    mapped to its line number, without holding the file in memory.
+    """
+    lines: int   = 0
+    byte_at: array = field(default_factory=lambda: array("Q"))
+    char_at: array = field(default_factory=lambda: array("Q"))
+
+    @classmethod
+    def build(cls, path) -> "LineIndex":
+        index = cls()
+        byte_pos = char_pos = 0
+        with open(path, "rb") as fh:
+            for n, raw in enumerate(fh):
+                if n % INDEX_STRIDE == 0:
+                    index.byte_at.append(byte_pos)
+                    index.char_at.append(char_pos)
+                byte_pos += len(raw)
+                char_pos += len(raw) if raw.isascii() else len(raw.decode("utf-8", "replace"))
+                index.lines = n + 1
+        return index
+
+
+@dataclass
+class LogHandle:
+    """A stored log: where it is, how big, and its content hash."""
+    path:   str
+    name:   str
+    size:   int
+    sha256: str
+    _index: LineIndex | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def index(self) -> LineIndex:
+        if self._index is None:
+            self._index = LineIndex.build(self.path)
+        return self._index
+
+    @property
+    def line_count(self) -> int:
+        return self.index.lines
+
+    def read_lines(self, first: int, count: int) -> list[str]:
+        """Lines [first, first + count), decoded like StreamDetector decodes bytes."""
+        idx = self.index
+        if count <= 0 or first >= idx.lines:
+            return []
+        block = first // INDEX_STRIDE
+        out   = []
+        with open(self.path, "rb") as fh:
+            fh.seek(idx.byte_at[block])
+            for n, raw in enumerate(fh, start=block * INDEX_STRIDE):
+                if n >= first + count:
+                    break
+                if n >= first:
+                    out.append(raw.decode("utf-8", "replace").rstrip("\r\n"))
+        return out
+
+    def line_numbers(self, offsets) -> list[int]:
+        """Map char offsets (e.g. state["evidence"]) to 0-based line numbers."""
+        idx, found = self.index, set()
+        if not idx.lines:
+            return []
+        with open(self.path, "rb") as fh:
+            for offset in sorted(set(offsets)):
+                block = max(bisect_right(idx.char_at, offset) - 1, 0)
+                fh.seek(idx.byte_at[block])
+                pos = idx.char_at[block]
+                for n, raw in enumerate(fh, start=block * INDEX_STRIDE):
+                    pos += len(raw) if raw.isascii() else len(raw.decode("utf-8", "replace"))
+                    if offset < pos:
+                        found.add(n)
+                        break
+        return sorted(found)
+
+
+# ── Ingestion ────────────────────────────────────────────────────────────────
+
+def ingest(source, name: str = "upload.log") -> LogHandle:
+    """
+    Copy a binary file object (e.g. a Streamlit UploadedFile) or bytes into the
+    store chunk by chunk. Identical content maps to the same stored file.
+    """
+    root = store_dir()
+    fd, tmp = tempfile.mkstemp(dir=root, suffix=".part")
+    digest, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if isinstance(source, (bytes, bytearray)):
+                chunks = [source]
+            else:
+                chunks = iter(lambda: source.read(COPY_CHUNK), b"")
+            for chunk in chunks:
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha  = digest.hexdigest()
+        path = root / f"{sha}.log"
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    os.utime(path)
+    evict(keep=path)
+    return LogHandle(str(path), name, size, sha)
+
+
+def ingest_text(text: str, name: str = "pasted.log") -> LogHandle:
+    return ingest(text.encode("utf-8", "surrogatepass"), name)
+
+
+def evict(max_age: float = MAX_AGE, max_bytes: int = MAX_BYTES, keep: Path | None = None) -> int:
+    """Drop stored logs older than max_age, then oldest-first beyond max_bytes (never `keep`)."""
+    files = []
+    for path in store_dir().glob("*.log"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        files.append((st.st_mtime, st.st_size, path))
+    files.sort()
+
+    now, total, removed = time.time(), sum(size for _, size, _ in files), 0
+    for mtime, size, path in files:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total   -= size
+        removed += 1
+    return removed
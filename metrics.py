@@ -0,0 +1,329 @@
+# metrics.py
+# Per-node instrumentation for the graph: wall/CPU time, input size, LLM token
+# counts, cache hits and fallbacks. Each node run is recorded as a span (kept in
+# a ring buffer, optionally appended to a JSONL file) and folded into aggregates
+# that can be rendered as Prometheus text, written to a file, or served over HTTP.
+#
+#   KUBE_DEBUG_TRACE_FILE=spans.jsonl   — append every finished span as JSON
+#   serve_metrics(9464)                 — expose /metrics for Prometheus
+#   python batch.py logs/ --metrics-port 9464 --metrics-file m.prom --spans-file spans.jsonl
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+SPAN_BUFFER  = 10_000          # finished spans kept in memory
+RESERVOIR    = 1024            # recent samples per stage used for p50/p99
+BUCKETS      = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_span: contextvars.ContextVar[dict | None] = contextvars.ContextVar("current_span", default=None)
+_spans = deque(maxlen=SPAN_BUFFER)
+_lock  = threading.Lock()
+
+
+# ── Aggregates ───────────────────────────────────────────────────────────────
+
+class _Stage:
+    __slots__ = ("count", "wall_sum", "cpu_sum", "bytes_sum", "buckets", "recent")
+
+    def __init__(self):
+        self.count     = 0
+        self.wall_sum  = 0.0
+        self.cpu_sum   = 0.0
+        self.bytes_sum = 0
+        self.buckets   = [0] * len(BUCKETS)
+        self.recent    = deque(maxlen=RESERVOIR)
+
+    def observe(self, wall: float, cpu: float, size: int) -> None:
+        self.count     += 1
+        self.wall_sum  += wall
+        self.cpu_sum   += cpu
+        self.bytes_sum += size
+        self.recent.append(wall)
+        for i, bound in enumerate(BUCKETS):
+            if wall <= bound:
+                self.buckets[i] += 1
+
+
+_stages   = defaultdict(_Stage)
+_counters = defaultdict(int)     # (name, stage) → value
+
+
+def _count(name: str, stage: str, value: int = 1) -> None:
+    _counters[(name, stage)] += value
+
+
+# ── Spans ────────────────────────────────────────────────────────────────────
+
+class span:
+    """
+    Context manager timing one unit of work. Nests via contextvars, so node
+    spans opened inside run_graph's root span share its trace_id.
+    """
+
+    def __init__(self, name: str, **attrs):
+        self.name  = name
+        self.attrs = attrs
+
+    def __enter__(self) -> dict:
+        parent = _current_span.get()
+        self.record = {
+            "trace_id":  parent["trace_id"] if parent else uuid.uuid4().hex,
+            "span_id":   uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "name":      self.name,
+            "start":     time.time(),
+            "attrs":     dict(self.attrs),
+        }
+        self._token = _current_span.set(self.record)
+        self._wall  = time.perf_counter()
+        self._cpu   = time.thread_time()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu  = time.thread_time() - self._cpu
+        _current_span.reset(self._token)
+
+        rec = self.record
+        rec["end"] = rec["start"] + wall
+        rec["attrs"].update(wall_s=wall, cpu_s=cpu)
+        if exc_type is not None:
+            rec["attrs"]["error"] = repr(exc)[:200]
+        _finish(rec, wall, cpu)
+
+
+def _finish(rec: dict, wall: float, cpu: float) -> None:
+    attrs = rec["attrs"]
+    with _lock:
+        _spans.append(rec)
+        _stages[rec["name"]].observe(wall, cpu, attrs.get("input_bytes", 0))
+        if attrs.get("error"):
+            _count("errors", rec["name"])
+        if "analysis_source" in attrs:
+            _count(f"analysis_{attrs['analysis_source']}", rec["name"])
+        if attrs.get("escalation"):
+            _count("escalations", rec["name"])
+        if attrs.get("hedged"):
+            _count("hedged", rec["name"])
+        for key in ("prompt_tokens", "completion_tokens"):
+            if attrs.get(key):
+                _count(key, rec["name"], attrs[key])
+
+    path = os.getenv("KUBE_DEBUG_TRACE_FILE")
+    if path:
+        with _lock, open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(rec) + "\n")
+
+
+_NODE_FIELDS = ("llm_usage", "analysis_source", "analysis_model", "escalation", "hedged", "prompt_chars")
+
+
+def _node_attrs(before: dict, state: dict) -> dict:
+    """
+    Attributes for the fields this node wrote. Nodes return the whole state, so
+    comparing against the values it came in with keeps format (and pattern) from
+    re-counting the analysis, escalations and tokens that analyze recorded.
+    """
+    delta = {k: state.get(k) for k in _NODE_FIELDS if state.get(k) != before.get(k)}
+    attrs = {}
+    usage = delta.get("llm_usage") or {}
+    if usage:
+        attrs["prompt_tokens"]     = usage.get("input_tokens", 0)
+        attrs["completion_tokens"] = usage.get("output_tokens", 0)
+    if delta.get("analysis_source"):
+        attrs["analysis_source"] = delta["analysis_source"]
+    if delta.get("analysis_model"):
+        attrs["analysis_model"] = delta["analysis_model"]
+    if delta.get("escalation"):
+        attrs["escalation"] = delta["escalation"]
+    if delta.get("hedged"):
+        attrs["hedged"] = True
+    if delta.get("prompt_chars"):
+        attrs["prompt_chars"] = delta["prompt_chars"]
+    return attrs
+
+
+def instrument(name: str, fn):
+    """Wrap a graph node (sync or async) so every call is recorded as a span."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_node(state):
+            before = {k: state.get(k) for k in _NODE_FIELDS}
+            with span(name, input_bytes=len(state.get("raw_logs") or "")) as rec:
+                result = await fn(state)
+                rec["attrs"].update(_node_attrs(before, result))
+                return result
+        return async_node
+
+    @functools.wraps(fn)
+    def node(state):
+        before = {k: state.get(k) for k in _NODE_FIELDS}
+        with span(name, input_bytes=len(state.get("raw_logs") or "")) as rec:
+            result = fn(state)
+            rec["attrs"].update(_node_attrs(before, result))
+            return result
+    return node
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+
+def recent_spans(trace_id: str | None = None) -> list:
+    with _lock:
+        return [s for s in _spans if trace_id is None or s["trace_id"] == trace_id]
+
+
+def export_spans(path) -> int:
+    """Write buffered spans to `path` as JSONL. Returns how many were written."""
+    spans = recent_spans()
+    with open(path, "w", encoding="utf-8") as fh:
+        for s in spans:
+            fh.write(json.dumps(s) + "\n")
+    return len(spans)
+
+
+def _quantile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def snapshot() -> dict:
+    """Aggregates per stage: count, mean/p50/p99 wall, CPU, bytes, and counters."""
+    with _lock:
+        out = {}
+        for name, st in _stages.items():
+            recent = list(st.recent)
+            c = lambda event: _counters.get((event, name), 0)
+            analyzed = c("analysis_llm") + c("analysis_cache") + c("analysis_coalesced") + c("analysis_fallback")
+            out[name] = {
+                "count":             st.count,
+                "wall_mean_s":       st.wall_sum / st.count if st.count else 0.0,
+                "wall_p50_s":        _quantile(recent, 0.50),
+                "wall_p99_s":        _quantile(recent, 0.99),
+                "cpu_s":             st.cpu_sum,
+                "input_bytes":       st.bytes_sum,
+                "errors":            c("errors"),
+                "cache_hits":        c("analysis_cache"),
+                "coalesced":         c("analysis_coalesced"),
+                "fallbacks":         c("analysis_fallback"),
+                "fallback_rate":     c("analysis_fallback") / analyzed if analyzed else 0.0,
+                "escalations":       c("escalations"),
+                "hedged":            c("hedged"),
+                "prompt_tokens":     c("prompt_tokens"),
+                "completion_tokens": c("completion_tokens"),
+            }
+        return out
+
+
+def render_prometheus() -> str:
+    """Aggregates in the Prometheus text exposition format."""
+    lines = [
+        "# HELP kube_debug_stage_seconds Wall time per graph stage.",
+        "# TYPE kube_debug_stage_seconds histogram",
+    ]
+    with _lock:
+        stages = {name: (st.count, st.wall_sum, list(st.buckets), st.cpu_sum, st.bytes_sum, sorted(st.recent))
+                  for name, st in _stages.items()}
+        counters = dict(_counters)
+
+    for name, (count, wall_sum, buckets, _, _, _) in stages.items():
+        for bound, n in zip(BUCKETS, buckets):
+            lines.append(f'kube_debug_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {n}')
+        lines.append(f'kube_debug_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+        lines.append(f'kube_debug_stage_seconds_sum{{stage="{name}"}} {wall_sum}')
+        lines.append(f'kube_debug_stage_seconds_count{{stage="{name}"}} {count}')
+
+    lines += ["# HELP kube_debug_stage_seconds_recent Recent wall-time quantiles per stage.",
+              "# TYPE kube_debug_stage_seconds_recent gauge"]
+    for name, (*_, recent) in stages.items():
+        for q in (0.5, 0.99):
+            lines.append(f'kube_debug_stage_seconds_recent{{stage="{name}",quantile="{q}"}} {_quantile(recent, q)}')
+
+    lines += ["# HELP kube_debug_stage_cpu_seconds_total CPU time per graph stage.",
+              "# TYPE kube_debug_stage_cpu_seconds_total counter"]
+    lines += [f'kube_debug_stage_cpu_seconds_total{{stage="{name}"}} {v[3]}' for name, v in stages.items()]
+    lines += ["# HELP kube_debug_stage_input_bytes_total Log bytes entering each stage.",
+              "# TYPE kube_debug_stage_input_bytes_total counter"]
+    lines += [f'kube_debug_stage_input_bytes_total{{stage="{name}"}} {v[4]}' for name, v in stages.items()]
+
+    lines += ["# HELP kube_debug_events_total Errors, analysis sources and LLM tokens per stage.",
+              "# TYPE kube_debug_events_total counter"]
+    for (event, name), value in sorted(counters.items()):
+        lines.append(f'kube_debug_events_total{{stage="{name}",event="{event}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path) -> None:
+    """Write render_prometheus() to `path` (for node_exporter's textfile collector, say)."""
+    with open(path, "w", encoding="utf-8") as fh:
+        fh.write(render_prometheus())
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1"):
+    """
+    Serve GET /metrics from a daemon thread. Returns the server (call .shutdown()
+    to stop). Local only by default; pass host="0.0.0.0" to let a remote scraper in.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+# ── Command-line tools ───────────────────────────────────────────────────────
+# batch.py, podlist.py and watch.py take the same options: serve /metrics while
+# they run, and write the metrics and spans out when they stop.
+
+def add_options(parser) -> None:
+    group = parser.add_argument_group("metrics")
+    group.add_argument("--metrics-port", type=int, help="serve Prometheus /metrics on 127.0.0.1:PORT while running")
+    group.add_argument("--metrics-file", help="write Prometheus metrics to this file on exit")
+    group.add_argument("--spans-file", help="write the recorded spans to this JSONL file on exit")
+
+
+@contextlib.contextmanager
+def exposed(args):
+    """Expose metrics for the duration of the block, as add_options' `args` ask."""
+    server = serve_metrics(args.metrics_port) if args.metrics_port else None
+    try:
+        yield server
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        if args.metrics_file:
+            write_metrics(args.metrics_file)
+        if args.spans_file:
+            export_spans(args.spans_file)
+
+
+def reset() -> None:
+    with _lock:
+        _spans.clear()
+        _stages.clear()
+        _counters.clear()
@@ -2,10 +2,43 @@
 # LangGraph Node functions (Nodes 2 and 3).
 # Each function: AgentState → AgentState
 
+# LangChain, Groq, httpx and asyncio are imported on first use, so pattern-only
+# runs (and anything that only needs format_node / unknown_node) start fast.
+#
+# With a progress callback set (use_progress, or run_graph(..., on_partial=...)),
+# analyze_node streams the completion and calls it with a partial report each
+# time a field — or one remediation step — is complete.
+#
+# provisional_report / upgrade_report build the rule-based report that
+# graph.speculate shows first, and lay streamed fields over it.
+#
+# Every LLM call runs under escalation.policy(): a hard deadline, a hedged
+# duplicate request past the model's p95, and fast → large model tiers for "auto".
+
+import contextvars
 import json
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage
+import rules
 from state import AgentState
+from cache import fingerprint, get_cache
+from excerpt import build_excerpt
+from escalation import DeadlineExceeded, admitted, policy, tiers_for
+from jsonstream import ObjectStream
+from singleflight import flights
+
+MAX_TOKENS = 800    # completion budget per analysis
+
+ANALYSIS_KEYS = ("root_cause", "explanation", "severity", "remediation_steps", "kubectl_commands")
+
+_progress: contextvars.ContextVar = contextvars.ContextVar("analysis_progress", default=None)
+
+
+def use_progress(fn):
+    """Stream analyses in this context, calling fn(partial_report) as fields complete. Returns a reset token."""
+    return _progress.set(fn)
+
+
+def reset_progress(token) -> None:
+    _progress.reset(token)
 
 
 # ── Node 2: analyze_node  (calls Groq via LangChain) ─────────────────────────
@@ -13,16 +46,143 @@ from state import AgentState
 def analyze_node(state: AgentState) -> AgentState:
     """
     LangGraph Node 2 — LLM Root Cause Analysis.
-    Uses LangChain's ChatGroq to call Groq API.
-    Reads:  failure_type, signals, raw_logs
-    Writes: root_cause, explanation, severity, remediation_steps, kubectl_commands
+    Uses LangChain's ChatGroq (pooled via clients.get_llm) to call Groq API.
+    Reads:  failure_type, signals, raw_logs, evidence
+    Writes: root_cause, explanation, severity, remediation_steps, kubectl_commands,
+            log_excerpt, prompt_chars, analysis_model, escalation, hedged
+    Model "auto" starts with the fast model and escalates (escalation.py).
+    """
+    cache, cache_key, cached = _lookup_cache(state)
+    if cached:
+        _apply_analysis(state, cached)
+        state["analysis_source"] = "cache"
+        return state
+
+    progress = _progress.get()
+    tiers, reason = tiers_for(_model(state), state.get("confidence"))
+
+    def call(model, progress):
+        messages = _build_messages(state)
+        # Shared, pooled client — no new connection per analysis
+        llm = get_llm(state["groq_api_key"], model, temperature=0.1, max_tokens=MAX_TOKENS)
+        if progress is not None:
+            stream = _Streamed(state, progress)
+            for chunk in llm.stream(messages):
+                stream.feed(chunk)
+            return stream.result()
+        response = llm.invoke(messages)
+        return _parse_content(response.content), getattr(response, "usage_metadata", None)
+
+    def analyze():
+        # Deadline, hedged request and (for model "auto") fast → large escalation
+        return policy().run(tiers, call, progress, reason)
+
+    try:
+        # Concurrent identical analyses share one upstream call
+        flight = flights()
+        outcome, shared = flight.do(cache_key, analyze) if flight else (analyze(), False)
+        _apply_analysis(state, outcome.parsed)
+        _record_usage(state, outcome, shared)
+    except Exception as e:
+        _apply_fallback(state, e)
+    else:
+        # Outside the try: a failed cache write must not turn a good answer into the fallback
+        if cache and not shared:
+            cache.put(cache_key, outcome.parsed)
+
+    return state
+
+
+async def aanalyze_node(state: AgentState) -> AgentState:
+    """
+    Async twin of analyze_node for arun_graph. Calls llm.ainvoke through the
+    active rate limiter (concurrency + requests/min + tokens/min, 429 backoff).
+    """
+    import asyncio
+    from ratelimit import current_limiter, estimate_tokens
+
+    cache, cache_key, cached = _lookup_cache(state)
+    if cached:
+        _apply_analysis(state, cached)
+        state["analysis_source"] = "cache"
+        return state
+
+    progress = _progress.get()
+    tiers, reason = tiers_for(_model(state), state.get("confidence"))
+
+    async def call(model, progress):
+        messages = _build_messages(state)
+        llm = get_llm(state["groq_api_key"], model, temperature=0.1, max_tokens=MAX_TOKENS,
+                      loop=asyncio.get_running_loop())
+        if progress is not None:
+            async def consume():
+                stream = _Streamed(state, progress)
+                async for chunk in llm.astream(messages):
+                    stream.feed(chunk)
+                return stream.result()
+            return await current_limiter().call(consume, tokens=estimate_tokens(messages, MAX_TOKENS),
+                                                on_admit=admitted)
+        response = await current_limiter().call(
+            lambda: llm.ainvoke(messages),
+            tokens=estimate_tokens(messages, MAX_TOKENS),
+            on_admit=admitted,
+        )
+        return _parse_content(response.content), getattr(response, "usage_metadata", None)
+
+    async def analyze():
+        # Deadlines start once the rate limiter admits each attempt
+        return await policy().arun(tiers, call, progress, reason, queued=True)
+
+    try:
+        flight = flights()
+        outcome, shared = await flight.ado(cache_key, analyze) if flight else (await analyze(), False)
+        _apply_analysis(state, outcome.parsed)
+        _record_usage(state, outcome, shared)
+    except Exception as e:
+        _apply_fallback(state, e)
+    else:
+        # Outside the try: a failed cache write must not turn a good answer into the fallback
+        if cache and not shared:
+            cache.put(cache_key, outcome.parsed)
+
+    return state
+
+
+def get_llm(*args, **kwargs):
+    """clients.get_llm, imported on first use — keeps langchain_groq/httpx off the import path."""
+    from clients import get_llm as pooled
+    return pooled(*args, **kwargs)
+
+
+def _model(state: AgentState) -> str:
+    return state.get("model", "llama-3.3-70b-versatile")
+
+
+def _logs_preview(state: AgentState) -> str:
+    """Relevance-ranked excerpt of raw_logs, built once per state."""
+    if not state.get("log_excerpt"):
+        state["log_excerpt"] = build_excerpt(state["raw_logs"], state.get("evidence") or ())
+    return state["log_excerpt"]
+
+
+def _lookup_cache(state: AgentState):
+    """
+    Same model + detection + normalized excerpt → reuse the earlier answer.
+    The key is returned even with the cache off: it also keys the single-flight.
     """
+    cache_key = fingerprint(_model(state), state["failure_type"], state.get("is_root_cause", False),
+                            state.get("signals", {}), _logs_preview(state))
+    cache = get_cache()
+    return cache, cache_key, cache.get(cache_key) if cache else None
+
+
+def _build_messages(state: AgentState) -> list:
+    from langchain_core.messages import SystemMessage, HumanMessage
+
     failure_type = state["failure_type"]
     signals      = state.get("signals", {})
     is_root      = state.get("is_root_cause", False)
-    logs_preview = state["raw_logs"][:2500]
-    api_key      = state["groq_api_key"]
-    model        = state.get("model", "llama-3.3-70b-versatile")
+    logs_preview = _logs_preview(state)
 
     signal_text = "\n".join(f"  - {k}: {v}" for k, v in signals.items()) or "  None detected"
 
@@ -63,39 +223,136 @@ Respond ONLY with this JSON structure:
   ]
 }}""")
 
-    try:
-        llm = ChatGroq(
-            api_key=api_key,
-            model=model,
-            temperature=0.1,
-            max_tokens=800,
-        )
+    state["prompt_chars"] = len(system_msg.content) + len(human_msg.content)
+    return [system_msg, human_msg]
 
-        response = llm.invoke([system_msg, human_msg])
-        content  = response.content.strip()
 
-        # Strip markdown fences if model added them
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
+def _parse_content(content: str) -> dict:
+    content = content.strip()
 
-        parsed = json.loads(content.strip())
+    # Strip markdown fences if model added them
+    if content.startswith("```"):
+        content = content.split("```")[1]
+        if content.startswith("json"):
+            content = content[4:]
 
-        state["root_cause"]         = parsed.get("root_cause", "")
-        state["explanation"]        = parsed.get("explanation", "")
-        state["severity"]           = parsed.get("severity", "high")
-        state["remediation_steps"]  = parsed.get("remediation_steps", [])
-        state["kubectl_commands"]   = parsed.get("kubectl_commands", [])
+    return json.loads(content.strip())
 
-    except Exception as e:
-        # Graceful fallback — pattern results still shown
-        state["root_cause"]        = f"LLM error: {str(e)[:120]}"
-        state["explanation"]       = "Add a valid Groq API key for AI analysis. Pattern detection results are shown."
-        state["severity"]          = "high"
-        state["remediation_steps"] = _fallback_steps(failure_type)
-        state["kubectl_commands"]  = _fallback_cmds(failure_type)
 
+class _Streamed:
+    """A completion arriving as chunks: parsed as it comes, with a partial report per new field."""
+
+    def __init__(self, state: AgentState, progress):
+        self.state    = state
+        self.progress = progress
+        self.parser   = ObjectStream()
+        self.parts    = []
+        self.usage    = None
+
+    def feed(self, chunk) -> None:
+        text = chunk.content if isinstance(chunk.content, str) else ""
+        self.parts.append(text)
+        self.usage = getattr(chunk, "usage_metadata", None) or self.usage
+        if self.parser.feed(text):
+            self.progress(partial_report(self.state, self.parser.fields))
+
+    def result(self) -> tuple[dict, dict | None]:
+        # Anything the incremental parser could not follow goes through the usual whole-text parse
+        parsed = self.parser.fields if self.parser.done else _parse_content("".join(self.parts))
+        return parsed, self.usage
+
+
+def partial_report(state: AgentState, fields: dict) -> dict:
+    """The report as far as the analysis has arrived; "partial" marks it as still streaming."""
+    report = format_node(dict(state))["final_report"]
+    for key in ANALYSIS_KEYS:
+        report[key] = fields.get(key, [] if key in ("remediation_steps", "kubectl_commands") else None)
+    report["analysis_source"] = "streaming"
+    report["partial"]         = True
+    return report
+
+
+def provisional_report(state: AgentState) -> dict:
+    """
+    A complete report from detection alone — detector signals plus the matched
+    rule's severity and remediation — for showing while the LLM runs. Every
+    analysis field is listed in "provisional".
+    """
+    failure_type = state["failure_type"]
+    signals      = state.get("signals") or {}
+    report = format_node(dict(state))["final_report"]
+    report.update({
+        "root_cause":        f"{failure_type} detected — "
+                             + ("this is the root cause." if state.get("is_root_cause")
+                                else "a symptom of a deeper issue."),
+        "explanation":       "Rule-based summary while the LLM analysis runs."
+                             + (" Signals: " + ", ".join(f"{k} {v}" for k, v in signals.items()) + "."
+                                if signals else ""),
+        "severity":          _fallback_severity(failure_type),
+        "remediation_steps": _fallback_steps(failure_type),
+        "kubectl_commands":  _fallback_cmds(failure_type),
+        "analysis_source":   "provisional",
+        "provisional":       list(ANALYSIS_KEYS),
+    })
+    return report
+
+
+def upgrade_report(provisional: dict, partial: dict) -> dict:
+    """`partial`'s arrived fields laid over the provisional report; the rest stay provisional."""
+    report, pending = dict(partial), []
+    for key in ANALYSIS_KEYS:
+        if partial.get(key) is None or partial.get(key) == []:
+            report[key] = provisional[key]
+            pending.append(key)
+    report["provisional"] = pending
+    return report
+
+
+def _apply_analysis(state: AgentState, parsed: dict) -> None:
+    state["root_cause"]         = parsed.get("root_cause", "")
+    state["explanation"]        = parsed.get("explanation", "")
+    state["severity"]           = parsed.get("severity", "high")
+    state["remediation_steps"]  = parsed.get("remediation_steps", [])
+    state["kubectl_commands"]   = parsed.get("kubectl_commands", [])
+
+
+def _record_usage(state: AgentState, outcome, shared: bool) -> None:
+    # A coalesced analysis made no call of its own, so it has no token usage
+    state["analysis_source"] = "coalesced" if shared else "llm"
+    state["llm_usage"]       = None if shared else outcome.usage
+    state["analysis_model"]  = outcome.model
+    state["escalation"]      = outcome.escalation
+    state["hedged"]          = outcome.hedged
+
+
+def _apply_fallback(state: AgentState, e: Exception) -> None:
+    # Graceful fallback — pattern results still shown
+    failure_type = state["failure_type"]
+    state["analysis_source"]   = "fallback"
+    state["root_cause"]        = f"LLM error: {str(e)[:120]}"
+    state["explanation"]       = ("The LLM did not answer in time. Pattern detection results are shown."
+                                  if isinstance(e, DeadlineExceeded) else
+                                  "Add a valid Groq API key for AI analysis. Pattern detection results are shown.")
+    state["severity"]          = _fallback_severity(failure_type)
+    state["remediation_steps"] = _fallback_steps(failure_type)
+    state["kubectl_commands"]  = _fallback_cmds(failure_type)
+
+
+# ── Node: pattern_node  (deterministic, no LLM) ───────────────────────────────
+
+def pattern_node(state: AgentState) -> AgentState:
+    """
+    Deterministic stand-in for analyze_node — no client, no network.
+    Reached when a pattern matched but no Groq API key is set (air-gapped runs).
+    Writes the same fields as analyze_node, from the matched rule's remediation.
+    """
+    failure_type = state["failure_type"]
+    state["analysis_source"]   = "pattern"
+    state["root_cause"]        = f"{failure_type} detected by pattern matching (no LLM analysis)."
+    state["explanation"]       = "Add a Groq API key for AI analysis. Pattern detection results are shown."
+    state["severity"]          = _fallback_severity(failure_type)
+    state["remediation_steps"] = _fallback_steps(failure_type)
+    state["kubectl_commands"]  = _fallback_cmds(failure_type)
     return state
 
 
@@ -116,6 +373,9 @@ def format_node(state: AgentState) -> AgentState:
         "severity":          state.get("severity", "high"),
         "remediation_steps": state.get("remediation_steps", []),
         "kubectl_commands":  state.get("kubectl_commands", []),
+        "prompt_chars":      state.get("prompt_chars"),
+        "analysis_source":   state.get("analysis_source"),
+        "analysis_model":    state.get("analysis_model"),
     }
     return state
 
@@ -132,7 +392,7 @@ def unknown_node(state: AgentState) -> AgentState:
         "is_root_cause": False,
         "confidence":    "low",
         "signals":       {},
-        "root_cause":    "The logs did not match CrashLoopBackOff, OOMKilled, or CreateContainerConfigError.",
+        "root_cause":    "The logs did not match any of the loaded failure rules.",
         "explanation":   "Try pasting kubectl describe output or pod logs that contain Events, State, or Reason fields.",
         "severity":      "unknown",
         "remediation_steps": [
@@ -154,45 +414,31 @@ def route_after_detect(state: AgentState) -> str:
     """
     LangGraph conditional edge function.
     Called after detect_node to decide next node.
-    Returns: "analyze" | "unknown"
+    Returns: "analyze" | "pattern" (matched, but no API key) | "unknown"
     """
-    return state.get("route", "unknown")
+    route = state.get("route", "unknown")
+    if route == "analyze" and not state.get("groq_api_key"):
+        return "pattern"
+    return route
 
 
 # ── Fallback helpers ─────────────────────────────────────────────────────────
+# Without an LLM answer, severity and remediation come from the matched rule.
+
+def _rule(failure_type: str):
+    return rules.current().by_failure_type.get(failure_type)
+
+
+def _fallback_severity(failure_type: str) -> str:
+    rule = _rule(failure_type)
+    return rule.severity if rule else "high"
+
 
 def _fallback_steps(failure_type: str) -> list:
-    return {
-        "OOMKilled / Exit Code 137": [
-            "Increase resources.limits.memory in the pod spec",
-            "Profile app memory usage to find leaks",
-            "Consider Vertical Pod Autoscaler (VPA)",
-        ],
-        "CrashLoopBackOff": [
-            "Run: kubectl logs <pod> --previous to see crash reason",
-            "Check all env vars, secrets, and configmaps are present",
-            "Verify startup command and entrypoint are correct",
-        ],
-        "CreateContainerConfigError": [
-            "Verify the Secret or ConfigMap exists: kubectl get secrets,configmaps -n <ns>",
-            "Check spelling of names in the pod spec envFrom / env sections",
-            "Create the missing resource if it doesn't exist",
-        ],
-    }.get(failure_type, ["Check kubectl describe pod and kubectl logs for clues"])
+    rule = _rule(failure_type)
+    return list(rule.steps) if rule and rule.steps else ["Check kubectl describe pod and kubectl logs for clues"]
 
 
 def _fallback_cmds(failure_type: str) -> list:
-    return {
-        "OOMKilled / Exit Code 137": [
-            "kubectl top pods -n <namespace>",
-            "kubectl describe pod <pod> -n <namespace>",
-        ],
-        "CrashLoopBackOff": [
-            "kubectl logs <pod> --previous -n <namespace>",
-            "kubectl describe pod <pod> -n <namespace>",
-        ],
-        "CreateContainerConfigError": [
-            "kubectl get secrets,configmaps -n <namespace>",
-            "kubectl describe pod <pod> -n <namespace>",
-        ],
-    }.get(failure_type, ["kubectl describe pod <pod> -n <namespace>"])
+    rule = _rule(failure_type)
+    return list(rule.commands) if rule and rule.commands else ["kubectl describe pod <pod> -n <namespace>"]
@@ -0,0 +1,542 @@
+# podlist.py
+# Native Kubernetes object input — `kubectl get pods -o json` / `kubectl get
+# events -o json` documents (PodList, EventList, List, a single object, or a
+# stream of watch events), read item by item with json.JSONDecoder.raw_decode
+# so a document of thousands of pods never has to fit in memory.
+#
+#   python podlist.py events.json pods.json -o reports.jsonl
+#   kubectl get events,pods -A -o json | python podlist.py -
+#   python podlist.py pods.yaml                  # YAML: needs PyYAML, loaded whole
+#
+# Each pod's status (container states, last termination reason, exit codes,
+# restart counts, resource limits) and its events are rendered as a
+# describe-style block for the rule triggers and the LLM; the rule packs'
+# describe fields read the pod object itself (PodView), so they get the exact
+# values of the right container. Pods are reported as they are read, so memory
+# stays bounded: events are attached if they come before their pod (events
+# first) or shortly after it. One JSON line is written per failing pod (every
+# pod with --all); identical failures share one analysis (grouping.py).
+
+import argparse
+import codecs
+import json
+import os
+import re
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
+
+import metrics
+from detector import apply_result, detect
+from grouping import Groups
+from state import AgentState, new_state
+
+DEFAULT_MODEL  = "llama-3.3-70b-versatile"
+CHUNK_SIZE     = 1 << 20     # chars read per refill
+MAX_ITEM       = 64 << 20    # largest single object accepted, in chars
+EVENTS_PER_POD = 20          # most recent events kept per pod
+HOLD_PODS      = 256         # pods held back so events that follow them can be attached
+PENDING_PODS   = 10_000      # pods not seen yet whose events are kept
+MAX_WAITING    = 1024        # output lines held back for their analysis
+
+_DECODER = json.JSONDecoder()
+_SPACE   = re.compile(r"[ \t\n\r]*")
+
+
+# ── Streaming JSON ────────────────────────────────────────────────────────────
+
+class _Reader:
+    """A sliding text window over a file; decodes one JSON value at a time."""
+
+    def __init__(self, fh):
+        self.fh      = fh
+        self.buf     = ""
+        self.pos     = 0
+        self.eof     = False
+        self.decoder = None
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        data = self.fh.read(CHUNK_SIZE)
+        if isinstance(data, bytes):
+            if self.decoder is None:
+                self.decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            data = self.decoder.decode(data, final=not data)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or "" at the end of input."""
+        while True:
+            self.pos = _SPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise ValueError(f"invalid JSON: expected {' or '.join(repr(ch) for ch in chars)}, got {c or 'end of input'!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if len(self.buf) - self.pos > MAX_ITEM or not self._fill():
+                    raise ValueError(f"invalid JSON: {e.msg}") from None
+                continue
+            if end == len(self.buf) and self._fill():   # a number may go on in the next chunk
+                continue
+            self.pos = end
+            return obj
+
+
+def _items(value):
+    """Objects inside a decoded value: a List's items, a watch event's object, or itself."""
+    if isinstance(value, list):
+        for item in value:
+            yield from _items(item)
+    elif isinstance(value, dict):
+        if isinstance(value.get("items"), list):
+            yield from _items(value["items"])
+        elif "type" in value and isinstance(value.get("object"), dict):
+            if value["type"] != "DELETED":
+                yield value["object"]
+        else:
+            yield value
+
+
+def _stream_object(r: _Reader):
+    """A top-level object: its "items" array is streamed element by element."""
+    r.expect("{")
+    fields = {}
+    if r.peek() == "}":
+        r.pos += 1
+        return
+    while True:
+        key = r.value()
+        r.expect(":")
+        if key == "items" and r.peek() == "[":
+            yield from _stream_array(r)
+            fields["items"] = []
+        else:
+            fields[key] = r.value()
+        if r.expect(",}") == "}":
+            break
+    if "items" not in fields:
+        yield from _items(fields)
+
+
+def _stream_array(r: _Reader):
+    r.expect("[")
+    if r.peek() == "]":
+        r.pos += 1
+        return
+    while True:
+        yield from _items(r.value())
+        if r.expect(",]") == "]":
+            return
+
+
+def iter_objects(source):
+    """
+    Yield the objects (pods, events, ...) of a JSON document or stream at a
+    path, file object or "-" (stdin). Several concatenated documents, JSON
+    lines and watch events ({"type", "object"}) work too. *.yaml / *.yml
+    paths are read with PyYAML, whole.
+    """
+    if isinstance(source, (str, os.PathLike)) and str(source).endswith((".yaml", ".yml")):
+        yield from _iter_yaml(source)
+        return
+    fh = sys.stdin if source == "-" else (open(source, encoding="utf-8") if isinstance(source, (str, os.PathLike)) else source)
+    try:
+        r = _Reader(fh)
+        while c := r.peek():
+            if c == "{":
+                yield from _stream_object(r)
+            elif c == "[":
+                yield from _stream_array(r)
+            else:
+                raise ValueError(f"invalid JSON: expected an object or array, got {c!r}")
+    finally:
+        if fh is not sys.stdin and fh is not source:
+            fh.close()
+
+
+def _iter_yaml(path):
+    try:
+        import yaml
+    except ImportError:
+        raise ValueError(f"{path}: reading YAML needs PyYAML (pip install pyyaml)") from None
+    with open(path, encoding="utf-8") as fh:
+        for doc in yaml.safe_load_all(fh):
+            yield from _items(doc)
+
+
+# ── Objects → describe-style view ─────────────────────────────────────────────
+
+def kind_of(obj: dict) -> str | None:
+    """The object's kind; items of typed lists often omit it, so guess from the shape."""
+    if obj.get("kind"):
+        return obj["kind"]
+    if "involvedObject" in obj:
+        return "Event"
+    if "spec" in obj or "status" in obj:
+        return "Pod"
+    return None
+
+
+def pod_key(obj: dict) -> str | None:
+    """"namespace/name" of a pod, or of the pod an event is about (None for other objects)."""
+    if kind_of(obj) == "Event":
+        obj = obj.get("involvedObject") or {}
+        if obj.get("kind", "Pod") != "Pod":
+            return None
+        meta = obj
+    else:
+        meta = obj.get("metadata") or {}
+    if not meta.get("name"):
+        return None
+    return f"{meta.get('namespace') or 'default'}/{meta['name']}"
+
+
+def _one_line(value) -> str:
+    return " ".join(str(value).split())
+
+
+class _Container:
+    __slots__ = ("name", "part", "fields", "text", "restarts")
+
+    def __init__(self, name: str, part: int):
+        self.name     = name
+        self.part     = part      # index of its "  name:" line in PodView's parts
+        self.fields   = {}        # lower-case path → (value, part index, column)
+        self.text     = ""        # the container's own lines, for trigger matching
+        self.restarts = 0
+
+
+# Rendered line heads, with the describe path their value is read at
+_STATES = (("state", "    State: ", "state", "      "), ("lastState", "    Last State: ", "last state", "      "))
+_DETAIL = (("reason", "Reason: ", "reason"), ("message", "Message: ", "message"), ("exitCode", "Exit Code: ", "exit code"))
+_AMOUNT = (("limits", "    Limits:\n", "limits."), ("requests", "    Requests:\n", "requests."))
+
+
+class PodView:
+    """
+    A pod object rendered as a `kubectl describe` block (`text`, which the
+    detector's triggers and the LLM read), with the value behind every line
+    kept. It answers container_for() / lookup() like describe.Describe, so
+    rule fields are read straight from the object instead of re-parsing text.
+    `events` are (Events table row, message) pairs, oldest first.
+    """
+
+    def __init__(self, pod: dict, events=()):
+        parts = self._parts = []
+        self._offsets   = None
+        self.fields     = {}      # lower-case path → (value, part index, column)
+        self.containers = []
+        self.messages   = [message for _, message in events]
+        self.summary    = {"restart_count": 0, "last_termination_reason": None, "memory_limit": None,
+                           "waiting_reason": None}
+        meta   = pod.get("metadata") or {}
+        spec   = pod.get("spec") or {}
+        status = pod.get("status") or {}
+
+        self._put(self.fields, "name", "Name: ", meta.get("name", ""))
+        self._put(self.fields, "namespace", "Namespace: ", meta.get("namespace", ""))
+        for label, key in (("Status", "phase"), ("Reason", "reason"), ("Message", "message")):
+            if status.get(key):
+                self._put(self.fields, label.lower(), f"{label}: ", _one_line(status[key]))
+        for title, statuses, specs in (("Init Containers", "initContainerStatuses", "initContainers"),
+                                       ("Containers", "containerStatuses", "containers")):
+            resources = {c.get("name"): (c.get("resources") or {}) for c in spec.get(specs) or []}
+            if status.get(statuses):
+                parts.append(f"{title}:\n")
+            for cs in status.get(statuses) or []:
+                self._container(cs, resources.get(cs.get("name")) or {})
+
+        conditions = [c for c in status.get("conditions") or [] if c.get("status") != "True"]
+        if conditions:
+            parts.append("Conditions:\n")
+            parts += [f"  {c.get('type', '')}  {c.get('status', '')}  {c.get('reason', '')}  "
+                      f"{_one_line(c.get('message', ''))}".rstrip() + "\n" for c in conditions]
+        if events:
+            parts.append("Events:\n")
+            parts += [row for row, _ in events]
+        self.text = "".join(parts)
+
+    def _put(self, fields: dict, path: str, head: str, value) -> None:
+        """Write the line `head value`; the value is kept at `path` (the first one wins)."""
+        value = str(value)
+        if value:
+            fields.setdefault(path, (value, len(self._parts), len(head)))
+            self._parts.append(f"{head}{value}\n")
+        else:
+            self._parts.append(head.rstrip() + "\n")
+
+    def _container(self, cs: dict, resources: dict) -> None:
+        parts, summary = self._parts, self.summary
+        c = _Container(cs.get("name", ""), len(parts))
+        parts.append(f"  {c.name}:\n")
+        for key, head, path, indent in _STATES:
+            for phase, info in (cs.get(key) or {}).items():
+                info = info or {}
+                self._put(c.fields, path, head, phase.title())
+                for field, sub, name in _DETAIL:
+                    if field in info:
+                        value = _one_line(info[field]) if field == "message" else info[field]
+                        self._put(c.fields, f"{path}.{name}", indent + sub, value)
+                if key == "state" and phase == "waiting":
+                    summary["waiting_reason"] = info.get("reason")
+                if phase == "terminated" and (key == "lastState" or not summary["last_termination_reason"]):
+                    summary["last_termination_reason"] = info.get("reason")
+        c.restarts = cs.get("restartCount", 0) or 0
+        self._put(c.fields, "restart count", "    Restart Count: ", c.restarts)
+        summary["restart_count"] = max(summary["restart_count"], c.restarts)
+
+        for key, head, path in _AMOUNT:
+            amounts = resources.get(key) or {}
+            if amounts:
+                parts.append(head)
+                for resource, amount in amounts.items():
+                    self._put(c.fields, path + resource.lower(), f"      {resource}: ", amount)
+                if key == "limits" and amounts.get("memory"):
+                    summary["memory_limit"] = amounts["memory"]
+        c.text = "".join(parts[c.part:])
+        self.containers.append(c)
+
+    # ── Queries (describe.Describe's interface) ───────────────────────────────
+
+    def _span(self, part: int, column: int, length: int) -> tuple:
+        if self._offsets is None:
+            self._offsets = list(accumulate((len(p) for p in self._parts), initial=0))
+        first = self._offsets[part] + column
+        return first, first + max(length, 1) - 1
+
+    def container_for(self, triggers) -> _Container | None:
+        """The first container whose lines match a trigger, else one an event names, else the one restarted most."""
+        for c in self.containers:
+            low = c.text.lower() if c.text.isascii() else None
+            if any(rx.search(low) if low is not None else folded.search(c.text) for rx, folded in triggers):
+                return c
+        for message in self.messages:
+            for c in self.containers:
+                if f"container {c.name}" in message or f'container "{c.name}"' in message:
+                    return c
+        if not self.containers:
+            return None
+        return max(self.containers, key=lambda c: c.restarts)
+
+    def lookup(self, path: str, container: _Container | None = None) -> tuple | None:
+        """(value, span) at a describe path: "container.*" reads `container`, then the pod."""
+        if path == "container.name":
+            if container is None:
+                return None
+            return container.name, self._span(container.part, 2, len(container.name))
+        hit = None
+        if path.startswith("container."):
+            path = path[len("container."):]
+            if container is not None:
+                hit = container.fields.get(path)
+        if hit is None:
+            hit = self.fields.get(path)
+        if hit is None:
+            return None
+        value, part, column = hit
+        return value, self._span(part, column, len(value))
+
+
+def render_pod(pod: dict) -> tuple[str, dict]:
+    """Pod object → (describe-style text the detector understands, summary dict)."""
+    view = PodView(pod)
+    return view.text, view.summary
+
+
+def event_row(event: dict) -> str:
+    """One Events table row: type, reason, age (last seen), source, message."""
+    source = (event.get("source") or {}).get("component") or event.get("reportingComponent") or ""
+    seen   = event.get("lastTimestamp") or event.get("eventTime") or "<unknown>"
+    count  = f" (x{event['count']})" if (event.get("count") or 0) > 1 else ""
+    message = _one_line(event.get("message", ""))
+    return f"  {event.get('type', '')}  {event.get('reason', '')}  {seen}{count}  {source}  {message}\n"
+
+
+# ── Detection ────────────────────────────────────────────────────────────────
+
+def detect_pod(key: str, pod: dict | None, events=(), groq_api_key: str = "",
+               model: str = DEFAULT_MODEL) -> tuple[dict, AgentState]:
+    """
+    (status summary, detected AgentState) for one pod object (None: known only
+    from events). Fields are read from the object; triggers match its text.
+    """
+    if pod is None:
+        namespace, name = key.split("/", 1)
+        pod = {"metadata": {"name": name, "namespace": namespace}}
+    view     = PodView(pod, events)
+    state    = new_state(view.text, groq_api_key, model)
+    evidence = []
+    apply_result(state, detect(view.text, evidence, view))
+    state["evidence"] = sorted(set(evidence))
+    return view.summary, state
+
+
+def detect_objects(sources, groq_api_key: str = "", model: str = DEFAULT_MODEL):
+    """
+    Yield (pod, status summary, detected AgentState) per pod object, in input
+    order, once HOLD_PODS more pods have been read after it (or the input
+    ends). Its events are those read before it (the last EVENTS_PER_POD, kept
+    for up to PENDING_PODS pods not seen yet) and meanwhile; later ones are
+    dropped. Pods known only from events come last. Memory is bounded by these
+    constants plus one name per pod reported.
+    """
+    held     = OrderedDict()    # pod key → (object, events), waiting to be reported
+    pending  = OrderedDict()    # pod key → events read before its pod
+    reported = set()
+
+    def report(key, pod, events):
+        reported.add(key)
+        return (key, *detect_pod(key, pod, events, groq_api_key, model))
+
+    for source in sources:
+        for obj in iter_objects(source):
+            key  = pod_key(obj)
+            kind = kind_of(obj) if key is not None else None
+            if kind == "Event" and key not in reported:
+                row = (event_row(obj), _one_line(obj.get("message", "")))
+                if key in held:
+                    held[key][1].append(row)
+                    continue
+                events = pending.pop(key, None) or deque(maxlen=EVENTS_PER_POD)
+                events.append(row)
+                pending[key] = events
+                if len(pending) > PENDING_PODS:
+                    pending.popitem(last=False)
+            elif kind == "Pod":
+                # A newer object for a pod still held replaces it; one already reported is reported again
+                entry  = held.pop(key, None)
+                events = entry[1] if entry else pending.pop(key, None) or deque(maxlen=EVENTS_PER_POD)
+                held[key] = (obj, events)
+                if len(held) > HOLD_PODS:
+                    yield report(*_first(held))
+
+    while held:
+        yield report(*_first(held))
+    for key, events in pending.items():
+        yield report(key, None, events)
+
+
+def _first(held: OrderedDict) -> tuple:
+    key, (pod, events) = held.popitem(last=False)
+    return key, pod, events
+
+
+def _analyze(state: AgentState) -> AgentState:
+    # Imported lazily: reading and detection don't need the LLM stack.
+    from graph import run_nodes
+    return run_nodes(state)   # analyze, pattern-only (no API key) or unknown
+
+
+def _line(pod: str, summary: dict, state: AgentState, group=None) -> dict:
+    line = {
+        "pod":           pod,
+        "failure_type":  state["failure_type"],
+        "is_root_cause": state["is_root_cause"],
+        "confidence":    state["confidence"],
+        "signals":       state["signals"],
+        "status":        summary,
+        "report":        state["final_report"],
+    }
+    if group is not None:
+        line["group"] = group.key
+    return line
+
+
+def run_podlist(sources, out, groq_api_key: str, model: str, include_all: bool = False,
+                llm_concurrency: int = 4, group: bool = True) -> dict:
+    """
+    Write one JSON line per failing pod (or per pod), in input order. Analyses
+    run in a thread pool; with `group`, once per failure fingerprint. At most
+    up to MAX_WAITING lines wait for their analysis at any time.
+    """
+    stats  = {"pods": 0, "failing": 0, "analyses": 0}
+    groups = Groups() if group else None
+    window = deque()     # (pod, summary, group, state, future — None for a group follower), oldest first
+    fanned = {}          # id() of a waiting follower's state → that state, fanned out
+    t0 = time.perf_counter()
+
+    def write_oldest():
+        pod, summary, grp, state, fut = window.popleft()
+        if fut is not None:
+            state = fut.result()
+            if grp is not None:
+                fanned.update((id(member), member) for _, member in groups.done(grp, state))
+        elif id(state) in fanned:
+            state = fanned.pop(id(state))
+        else:                  # joined after its leader was done
+            state = groups.follow(grp, pod, state)
+        out.write(json.dumps(_line(pod, summary, state, grp)) + "\n")
+
+    with ThreadPoolExecutor(max_workers=llm_concurrency) as llm:
+        for pod, summary, state in detect_objects(sources, groq_api_key, model):
+            stats["pods"] += 1
+            if state["failure_type"]:
+                stats["failing"] += 1
+            elif not include_all:
+                continue
+            grp, leader = groups.join(pod, state) if groups is not None and state["failure_type"] else (None, True)
+            if leader:
+                stats["analyses"] += 1
+            window.append((pod, summary, grp, state, llm.submit(_analyze, state) if leader else None))
+            # Write what is ready; block only when too many lines are waiting
+            while window and (len(window) > MAX_WAITING or window[0][4] is None or window[0][4].done()):
+                write_oldest()
+        while window:
+            write_oldest()
+    stats["groups"] = len(groups) if groups is not None else None
+    stats["wall"] = time.perf_counter() - t0
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Triage pods from `kubectl get pods/events -o json` output.")
+    parser.add_argument("inputs", nargs="+", help="JSON (or YAML) files of pods and/or events, or - for stdin")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--all", action="store_true", help="also report pods with no detected failure")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="concurrent analyses")
+    parser.add_argument("--no-group", action="store_true", help="analyze every failing pod, even identical ones")
+    metrics.add_options(parser)
+    args = parser.parse_args(argv)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with metrics.exposed(args):
+            stats = run_podlist(args.inputs, out, os.getenv("GROQ_API_KEY", ""), args.model, args.all,
+                                args.llm_concurrency, not args.no_group)
+    except ValueError as e:
+        print(f"podlist: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = stats["wall"]
+    print(f"{stats['pods']} pods, {stats['failing']} failing in {wall:.2f}s"
+          f" — {stats['pods'] / wall if wall else 0:,.0f} pods/sec, {stats['analyses']} analyses", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+# ratelimit.py
+# Client-side rate limiting for async LLM calls: a concurrency semaphore plus
+# token buckets matching Groq's requests/min and tokens/min quotas, with
+# exponential backoff (honouring Retry-After) whenever a 429 comes back.
+
+import asyncio
+import contextvars
+import os
+import random
+import time
+import weakref
+
+DEFAULT_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+DEFAULT_RPM         = float(os.getenv("GROQ_REQUESTS_PER_MIN", "30"))
+DEFAULT_TPM         = float(os.getenv("GROQ_TOKENS_PER_MIN", "6000"))
+
+
+def estimate_tokens(messages, max_tokens: int) -> int:
+    """Rough prompt size (~4 chars/token) plus the completion budget."""
+    chars = sum(len(getattr(m, "content", m)) for m in messages)
+    return chars // 4 + max_tokens
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    return getattr(e, "status_code", None) == 429 or type(e).__name__ == "RateLimitError"
+
+
+def _retry_after(e: Exception) -> float | None:
+    response = getattr(e, "response", None)
+    value = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Refills `rate_per_min` units per minute up to `capacity` (default: one minute's worth)."""
+
+    def __init__(self, rate_per_min: float, capacity: float | None = None):
+        self.rate     = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self.tokens   = self.capacity
+        self._last    = time.monotonic()
+        self._lock    = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last  = now
+
+    async def acquire(self, n: float = 1) -> None:
+        n = min(n, self.capacity)    # an oversized request still goes through, alone
+        async with self._lock:       # FIFO: later callers wait behind earlier ones
+            self._refill()
+            while self.tokens < n:
+                await asyncio.sleep((n - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= n
+
+
+class RateLimiter:
+    """
+    Gate for async LLM calls. `await limiter.call(fn, tokens=n)` waits for a
+    concurrency slot and bucket capacity, runs `fn()`, and retries on 429 with
+    exponential backoff — pausing every caller on this limiter meanwhile.
+    `on_admit`, if given, is called each time the call is let through.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_CONCURRENCY,
+                 requests_per_min: float = DEFAULT_RPM,
+                 tokens_per_min: float = DEFAULT_TPM,
+                 max_retries: int = 4, base_delay: float = 1.0, max_delay: float = 30.0):
+        self._sem          = asyncio.Semaphore(max_concurrency)
+        self._requests     = TokenBucket(requests_per_min)
+        self._tokens       = TokenBucket(tokens_per_min)
+        self.max_retries   = max_retries
+        self.base_delay    = base_delay
+        self.max_delay     = max_delay
+        self._paused_until = 0.0
+        self.calls         = 0
+        self.rate_limited  = 0
+
+    async def _wait_pause(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def call(self, fn, tokens: int = 0, on_admit=None):
+        for attempt in range(self.max_retries + 1):
+            async with self._sem:
+                await self._wait_pause()
+                await self._requests.acquire(1)
+                await self._tokens.acquire(tokens)
+                self.calls += 1
+                if on_admit is not None:
+                    on_admit()
+                try:
+                    return await fn()
+                except Exception as e:
+                    if not _is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    self.rate_limited += 1
+                    delay = _retry_after(e) or min(self.max_delay, self.base_delay * 2 ** attempt)
+                    delay *= 1 + random.random() * 0.25     # jitter
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            # Slot released; wait out the pause before trying again.
+            await self._wait_pause()
+
+
+# ── Limiter selection ────────────────────────────────────────────────────────
+# asyncio primitives belong to one event loop, so the default limiter is kept
+# per loop. arun_graph can override it for a run via use_limiter().
+
+_per_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, RateLimiter]" = weakref.WeakKeyDictionary()
+_override: contextvars.ContextVar[RateLimiter | None] = contextvars.ContextVar("rate_limiter", default=None)
+
+
+def current_limiter() -> RateLimiter:
+    limiter = _override.get()
+    if limiter is not None:
+        return limiter
+    loop = asyncio.get_running_loop()
+    limiter = _per_loop.get(loop)
+    if limiter is None:
+        limiter = _per_loop[loop] = RateLimiter()
+    return limiter
+
+
+def use_limiter(limiter: RateLimiter | None):
+    """Make `limiter` current for this context. Returns a token for _override.reset()."""
+    return _override.set(limiter)
+
+
+def reset_limiter(token) -> None:
+    _override.reset(token)
@@ -0,0 +1,89 @@
+# report_html.py
+# Report view as one pre-rendered HTML fragment — header badges, root cause,
+# signals, remediation steps and commands — so the UI sends a single
+# st.markdown delta instead of one per row. Every report value is escaped.
+# Fields a speculative report lists as "provisional" are labelled as such.
+# Uses the .card / .badge / .sig-row / .step / .cmd classes defined in app.py.
+
+from html import escape
+
+_SEVERITY_CLASS = {"critical": "badge-critical", "high": "badge-high", "medium": "badge-medium"}
+
+
+def _header(report: dict) -> str:
+    failure  = escape(str(report.get("failure_type", "Unknown")))
+    severity = str(report.get("severity") or "high")
+    is_root  = report.get("is_root_cause", False)
+    conf     = escape(str(report.get("confidence", "low")))
+    sev_cls  = _SEVERITY_CLASS.get(severity, "badge-high")
+    return (
+        '<div style="margin-bottom:1rem;">'
+        '<div style="font-family:\'IBM Plex Mono\',monospace;font-size:1rem;font-weight:600;'
+        f'color:#111;margin-bottom:0.5rem;">{failure}</div>'
+        f'<span class="badge {"badge-cause" if is_root else "badge-symptom"}">'
+        f'{"⬤ Root Cause" if is_root else "◎ Symptom"}</span>'
+        f'<span class="badge {sev_cls}">{escape(severity.upper())}</span>'
+        '<span style="font-family:\'IBM Plex Mono\',monospace;font-size:0.68rem;'
+        f'color:#aaa;margin-left:0.3rem;">detection confidence: {conf}</span>'
+        '</div>'
+    )
+
+
+def _card(label: str, body: str, style: str = "") -> str:
+    style = f' style="{style}"' if style else ""
+    return f'<div class="card"{style}><div class="card-label">{label}</div>{body}</div>'
+
+
+def _label(report: dict, label: str, *fields: str) -> str:
+    # A speculative report lists the fields still taken from the rule, pending the LLM answer
+    provisional = report.get("provisional") or ()
+    if any(f in provisional for f in fields):
+        return f'{label} <span style="color:#b8860b;">· provisional, LLM analysis running</span>'
+    return label
+
+
+def _left(report: dict) -> str:
+    # A partial (still streaming) report has None for fields that have not arrived yet
+    pending   = "Analyzing…" if report.get("partial") else "—"
+    root      = report.get("root_cause", "—")
+    explained = report.get("explanation", "")
+    parts = [_card(
+        _label(report, "Root Cause", "root_cause", "explanation"),
+        f'<div class="root-cause-box">{escape(str(pending if root is None else root))}</div>'
+        f'<div class="explanation-text">{escape(str(explained or ""))}</div>',
+    )]
+    signals = report.get("signals") or {}
+    if signals:
+        rows = "".join(
+            f'<div class="sig-row"><span class="sig-key">{escape(str(k).replace("_", " ").title())}</span>'
+            f'<span class="sig-val">{escape(str(v))}</span></div>'
+            for k, v in signals.items()
+        )
+        parts.append(_card("Extracted Signals", rows))
+    return "".join(parts)
+
+
+def _right(report: dict) -> str:
+    parts = []
+    steps = report.get("remediation_steps") or []
+    if steps:
+        rows = "".join(
+            f'<div class="step"><div class="step-n">{i}</div><div class="step-t">{escape(str(step))}</div></div>'
+            for i, step in enumerate(steps, 1)
+        )
+        parts.append(_card(_label(report, "Remediation Steps", "remediation_steps"), rows))
+    cmds = report.get("kubectl_commands") or []
+    if cmds:
+        rows = "".join(f'<div class="cmd">$ {escape(str(cmd))}</div>' for cmd in cmds)
+        parts.append(_card(_label(report, "Commands", "kubectl_commands"), rows, "margin-top:0;"))
+    return "".join(parts)
+
+
+def render_report(report: dict) -> str:
+    """The whole report view (header + two columns) as one HTML string."""
+    return (
+        _header(report)
+        + '<div class="report-grid">'
+        + f'<div>{_left(report)}</div><div>{_right(report)}</div>'
+        + '</div>'
+    )
@@ -0,0 +1,642 @@
+# rules.py
+# Rule packs — declarative failure detectors. Every *.json pack in rulepacks/
+# (plus any directory or file on $KUBE_DEBUG_RULES, os.pathsep-separated) is
+# compiled into one RuleIndex shared by detector.py, streaming.py and watch.py.
+# Packs are re-read when they change — no restart needed.
+#
+# A pack is {"rules": [<rule>, ...]}; a rule:
+#
+#   {
+#     "id":            "oom",                          # a later pack with the same id replaces it
+#     "failure_type":  "OOMKilled / Exit Code 137",    # unique
+#     "priority":      100,                            # higher is checked first
+#     "is_root_cause": true,
+#     "severity":      "high",                         # reported when no LLM runs
+#     "triggers":      ["oomkilled", "exit\\s*code[:\\s]+137"],
+#     "signals":       [<step>, ...],
+#     "remediation":   {"steps": ["..."], "commands": ["kubectl ..."]}
+#   }
+#
+# Triggers are regexes written in lower case and matched case-insensitively;
+# the first trigger (in list order) of the highest-priority rule that has one
+# wins. Signal steps run in order, each setting signals[name]:
+#
+#   {"name": "memory_limit", "pattern": "[Ll]imits?...(\\S+)"}             group 1, else the whole match
+#   {"name": "kernel_oom",   "pattern": "...", "value": "true"}             fixed value; {} is the match
+#   {"name": "oom_type",     "pattern": "...", "value": "...", "default": "..."}   default if no match
+#   {"name": "likely_cause", "from": "exit_code", "map": {"1": "..."}, "default": "exit ({})"}
+#   {"name": "severity_hint", "from": "restart_count", "above": 5, "value": "restarted {} times"}
+#   {"name": "missing_resource", "pattern": "[Ss]ecret", "value": "Secret", "then": [<step>, ...]}
+#   {"name": "memory_limit", "field": "container.limits.memory", "pattern": "..."}
+#
+# "from" reads an earlier signal; "above" keeps numeric values over a bound;
+# "then" steps run only if their parent matched; "flags": "i" (also m, s).
+# "field" (a path, or a list tried in order) reads the parsed `kubectl
+# describe` sections (describe.py): "container.*" paths read the container
+# the rule's triggers point at, others the pod. "pattern", if also given, is
+# the fallback for logs without that field.
+#
+# Matching cost stays nearly flat in the rule count. Each pattern gets the
+# literal(s) a match must start with ("hints"), derived from the regex. A
+# rule's trigger regexes only run if one of their hints occurs in the text.
+# Hints are located with one str.find each; beyond FIND_LITERALS of them, they
+# are first checked against the text's vocabulary (its distinct words), built
+# in one pass, so absent literals cost a lookup instead of a scan.
+
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+RULES_DIR       = Path(__file__).with_name("rulepacks")
+RELOAD_INTERVAL = 2.0      # seconds between checks for changed packs
+FIND_LITERALS   = 32       # up to this many hints, str.find each; beyond, prefilter on the vocabulary
+
+_FLAGS = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL}
+
+
+class RuleError(ValueError):
+    """A rule pack that cannot be loaded: bad JSON, a bad field or an invalid regex."""
+
+
+# ── Hints ─────────────────────────────────────────────────────────────────────
+
+_META     = set(".^$*+?{}[]\\|()")
+_CASE_SET = re.compile(r"\[([A-Za-z])([A-Za-z])?\]")
+_WORD     = re.compile(r"[a-z]+")
+_LETTERS  = bytes(c if 97 <= c <= 122 else 32 for c in range(256))   # bytes.translate: keep a-z
+
+
+def _split_top(pattern: str) -> list[str] | None:
+    """Top-level alternatives of a regex, or None if it can't be split safely."""
+    parts, depth, start, i, n = [], 0, 0, 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            i += 1
+            if pattern[i:i + 1] == "^":
+                i += 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            while i < n and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            if i >= n:
+                return None
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts if depth == 0 else None
+
+
+def _literal_prefix(branch: str) -> str:
+    """Lower-cased literal every match of `branch` starts with ("" if none)."""
+    out, i = [], 0
+    while i < len(branch):
+        c = branch[i]
+        if c == "\\":
+            nxt = branch[i + 1:i + 2]
+            if nxt == "b" and not out:           # leading word boundary: zero-width
+                i += 2
+                continue
+            if not nxt or nxt.isalnum():         # \s, \d, \1 ...
+                break
+            atom, width = nxt, 2
+        elif c == "[":
+            m = _CASE_SET.match(branch, i)       # [Ll] or [s]
+            if not m or (m.group(2) and m.group(1).lower() != m.group(2).lower()):
+                break
+            atom, width = m.group(1).lower(), m.end() - i
+        elif c in _META:
+            break
+        else:
+            atom, width = c.lower(), 1
+        quant = branch[i + width:i + width + 1]
+        if quant and quant in "?*{":             # optional or counted: not guaranteed
+            break
+        out.append(atom)
+        i += width
+        if quant == "+":
+            break
+    return "".join(out)
+
+
+def _required_literal(pattern: str) -> str:
+    """
+    Longest lower-cased literal (3+ chars) outside any group that every match
+    of `pattern` contains — for patterns with no literal prefix, e.g.
+    "(\\d+/\\d+) nodes are available". "" if there is none.
+    """
+    if _split_top(pattern) != [pattern]:
+        return ""
+    best, run, i, depth = "", [], 0, 0
+    while i < len(pattern):
+        c, atom, width = pattern[i], None, 1
+        if c == "\\":
+            nxt, width = pattern[i + 1:i + 2], 2
+            if nxt and not nxt.isalnum():
+                atom = nxt
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "[":
+            m = _CASE_SET.match(pattern, i)
+            if m and not (m.group(2) and m.group(1).lower() != m.group(2).lower()):
+                atom, width = m.group(1).lower(), m.end() - i
+            else:
+                width = pattern.index("]", i + 2) - i + 1 if "]" in pattern[i + 2:] else len(pattern) - i
+        elif c not in _META:
+            atom = c.lower()
+        quant = pattern[i + width:i + width + 1]
+        if depth == 0 and atom is not None and not (quant and quant in "?*{"):
+            run.append(atom)
+            if quant == "+":
+                best, run = max(best, "".join(run), key=len), []
+        else:
+            best, run = max(best, "".join(run), key=len), []
+        i += width
+    best = max(best, "".join(run), key=len)
+    return best if len(best) >= 3 else ""
+
+
+def derive_hints(pattern: str) -> tuple[str, ...]:
+    """
+    Lower-case literals some match of `pattern` must start with — one per
+    top-level alternative — or () when an alternative has none.
+    """
+    branches = _split_top(pattern)
+    if not branches:
+        return ()
+    hints = [_literal_prefix(b) for b in branches]
+    if not all(hints):
+        return ()
+    # A hint starting with another one never occurs earlier: drop it.
+    return tuple(sorted(h for h in set(hints) if not any(o != h and h.startswith(o) for o in hints)))
+
+
+# Compiled regexes are shared by (pattern, flags) across packs and reloads, so
+# a signal used by several rules is searched once (streaming keys hits on it).
+_COMPILED = {}
+HINTS     = {}     # compiled regex → hint literals (detector.search)
+REQUIRED  = {}     # compiled regex → a literal every match contains, if longer than its hints
+
+
+def _compile(pattern: str, flags: int, where: str):
+    rx = _COMPILED.get((pattern, flags))
+    if rx is None:
+        try:
+            rx = re.compile(pattern, flags)
+        except re.error as e:
+            raise RuleError(f"{where}: invalid regex {pattern!r}: {e}") from None
+        hints    = derive_hints(pattern)
+        required = _required_literal(pattern)
+        if hints:
+            HINTS[rx] = hints
+        if required and len(required) > max(map(len, hints), default=0):
+            REQUIRED[rx] = required
+        _COMPILED[(pattern, flags)] = rx
+    return rx
+
+
+@lru_cache(maxsize=None)
+def _longest_word(literal: str) -> bytes:
+    words = _WORD.findall(literal)
+    return max(words, key=len).encode() if words else b""
+
+
+class Vocabulary:
+    """
+    Distinct a-z words of ASCII text (from `start`), built on first use. Tests
+    whether a literal can occur: its longest a-z run must be part of some word.
+    One instance can serve several lookups over the same text.
+    """
+    __slots__ = ("_low", "_start", "_blob")
+
+    def __init__(self, low: str, start: int = 0):
+        self._low, self._start, self._blob = low, start, None
+
+    def admits(self, literal: str) -> bool:
+        if self._blob is None:
+            data = self._low[self._start:] if self._start else self._low
+            self._blob = b"\n".join(set(data.encode("ascii").translate(_LETTERS).split()))
+        return _longest_word(literal) in self._blob
+
+
+def first_positions(low: str, literals, start: int = 0, vocab: Vocabulary | None = None) -> dict:
+    """{literal: index of its first occurrence at or after `start`} for those that occur in `low`."""
+    if len(literals) > FIND_LITERALS:
+        vocab    = vocab or Vocabulary(low, start)
+        literals = [lit for lit in literals if vocab.admits(lit)]
+    found = {}
+    for lit in literals:
+        p = low.find(lit, start)
+        if p >= 0:
+            found[lit] = p
+    return found
+
+
+def first_matches(patterns, text: str, low: str | None, start: int = 0,
+                  vocab: Vocabulary | None = None) -> dict:
+    """{rx: first match at or after `start`} for the patterns that match, skipping ahead via hints."""
+    if low is None:
+        return {rx: m for rx in patterns if (m := rx.search(text, start))}
+    at = first_positions(low, list(dict.fromkeys(h for rx in patterns for h in HINTS.get(rx, ()))), start, vocab)
+    out = {}
+    for rx in patterns:
+        hints = HINTS.get(rx)
+        if hints:
+            starts = [at[h] for h in hints if h in at]
+            if not starts:
+                continue
+            m = rx.search(text, min(starts))
+        elif rx in REQUIRED and low.find(REQUIRED[rx], start) < 0:
+            continue
+        else:
+            m = rx.search(text, start)
+        if m:
+            out[rx] = m
+    return out
+
+
+# ── Rules ─────────────────────────────────────────────────────────────────────
+
+@dataclass
+class Step:
+    """One signal extraction step — see the format at the top of this file."""
+    name:    str | None
+    rx:      re.Pattern | None
+    source:  str | None
+    value:   str | None
+    default: str | None
+    mapping: dict | None
+    above:   float | None
+    then:    tuple
+    fields:  tuple = ()
+
+
+@dataclass
+class Rule:
+    id:            str
+    failure_type:  str
+    priority:      int
+    is_root_cause: bool
+    severity:      str
+    confidence:    str
+    triggers:      tuple     # (case-sensitive regex for lower-cased ASCII, IGNORECASE twin) per trigger
+    signals:       tuple     # Steps
+    patterns:      tuple     # every signal regex the steps may search
+    fields:        bool      # whether any step reads describe fields
+    steps:         list      # fallback remediation steps
+    commands:      list      # fallback kubectl commands
+    source:        str
+
+
+def _number(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract(steps, find, signals: dict | None = None, field=None) -> dict:
+    """
+    Run signal steps in order. `find(rx)` returns the first match of rx, or
+    None; `field(path)` the value of a describe field, or None.
+    """
+    signals = {} if signals is None else signals
+    for step in steps:
+        if step.source is None:
+            found = None
+            for path in step.fields if field is not None else ():
+                found = field(path)
+                if found is not None:
+                    break
+            if found is None and step.rx is not None:
+                m = find(step.rx)
+                if m:
+                    found = m.group(1) if step.rx.groups else m.group(0)
+            if found is None:
+                if step.default is not None and step.name:
+                    signals[step.name] = step.default.format("")
+                continue
+        else:
+            found = signals.get(step.source)
+            if found is None:
+                continue
+
+        if step.above is not None:
+            n = _number(found)
+            if n is None or n <= step.above:
+                continue
+        if step.mapping is not None:
+            value = step.mapping.get(found)
+            if value is None and step.default is not None:
+                value = step.default.format(found)
+        elif step.value is not None:
+            value = step.value.format(found)
+        else:
+            value = found
+        if step.name and value is not None:
+            signals[step.name] = value
+        if step.then:
+            extract(step.then, find, signals, field)
+    return signals
+
+
+_RULE_KEYS = {"id", "failure_type", "priority", "is_root_cause", "severity", "confidence",
+              "triggers", "signals", "remediation"}
+_STEP_KEYS = {"name", "pattern", "field", "flags", "from", "value", "default", "map", "above", "then"}
+
+
+def _template(text, where: str) -> str | None:
+    if text is None:
+        return None
+    if not isinstance(text, str):
+        raise RuleError(f"{where}: expected a string, got {text!r}")
+    try:
+        text.format("x")
+    except (IndexError, KeyError, ValueError) as e:
+        raise RuleError(f"{where}: bad template {text!r}: {e}") from None
+    return text
+
+
+def _parse_step(raw, where: str) -> Step:
+    if not isinstance(raw, dict):
+        raise RuleError(f"{where}: a signal step must be an object")
+    unknown = raw.keys() - _STEP_KEYS
+    if unknown:
+        raise RuleError(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+    if ("pattern" in raw or "field" in raw) == ("from" in raw):
+        raise RuleError(f"{where}: a signal step needs 'pattern' and/or 'field', or else 'from'")
+    fields = raw.get("field", ())
+    if isinstance(fields, str):
+        fields = (fields,)
+    if not isinstance(fields, (list, tuple)) or not all(isinstance(f, str) and f for f in fields):
+        raise RuleError(f"{where}: 'field' must be a path or a list of paths")
+    if not raw.get("name") and not raw.get("then"):
+        raise RuleError(f"{where}: a signal step needs a 'name' (or 'then' steps)")
+
+    rx = None
+    if "pattern" in raw:
+        flags = 0
+        for f in raw.get("flags", ""):
+            if f not in _FLAGS:
+                raise RuleError(f"{where}: unknown flag {f!r} (use i, m, s)")
+            flags |= _FLAGS[f]
+        rx = _compile(raw["pattern"], flags, where)
+    mapping = raw.get("map")
+    if mapping is not None and not (isinstance(mapping, dict) and all(isinstance(v, str) for v in mapping.values())):
+        raise RuleError(f"{where}: 'map' must be an object of strings")
+    above = raw.get("above")
+    if above is not None and _number(above) is None:
+        raise RuleError(f"{where}: 'above' must be a number")
+
+    name = raw.get("name")
+    return Step(
+        name    = name,
+        rx      = rx,
+        source  = raw.get("from"),
+        value   = _template(raw.get("value"), where),
+        default = _template(raw.get("default"), where),
+        mapping = mapping,
+        above   = _number(above),
+        then    = tuple(_parse_step(s, f"{where} > {name or 'then'}") for s in raw.get("then", ())),
+        fields  = tuple(f.lower() for f in fields),
+    )
+
+
+def _reads_fields(steps) -> bool:
+    return any(step.fields or _reads_fields(step.then) for step in steps)
+
+
+def _step_patterns(steps) -> list:
+    out = []
+    for step in steps:
+        if step.rx is not None:
+            out.append(step.rx)
+        out += _step_patterns(step.then)
+    return out
+
+
+def _parse_rule(raw, source: str) -> Rule:
+    if not isinstance(raw, dict) or not isinstance(raw.get("id"), str):
+        raise RuleError(f"{source}: every rule needs a string 'id'")
+    where = f"{source}: rule {raw['id']!r}"
+    unknown = raw.keys() - _RULE_KEYS
+    if unknown:
+        raise RuleError(f"{where}: unknown key(s) {', '.join(sorted(unknown))}")
+    if not isinstance(raw.get("failure_type"), str):
+        raise RuleError(f"{where}: 'failure_type' must be a string")
+    triggers = raw.get("triggers")
+    if not triggers or not isinstance(triggers, list) or not all(isinstance(t, str) for t in triggers):
+        raise RuleError(f"{where}: 'triggers' must be a non-empty list of regexes")
+    for t in triggers:
+        if any(c.isupper() for c in re.sub(r"\\.", "", t)):
+            raise RuleError(f"{where}: trigger {t!r} — triggers run on lower-cased text; write them in lower case")
+    priority = raw.get("priority", 0)
+    if not isinstance(priority, int) or isinstance(priority, bool):
+        raise RuleError(f"{where}: 'priority' must be an integer")
+    remediation = raw.get("remediation") or {}
+
+    signals = tuple(_parse_step(s, f"{where} > {s.get('name', 'step') if isinstance(s, dict) else 'step'}")
+                    for s in raw.get("signals", ()))
+    return Rule(
+        id            = raw["id"],
+        failure_type  = raw["failure_type"],
+        priority      = priority,
+        is_root_cause = bool(raw.get("is_root_cause", False)),
+        severity      = str(raw.get("severity", "high")),
+        confidence    = str(raw.get("confidence", "high")),
+        triggers      = tuple((_compile(t, 0, where), _compile(t, re.IGNORECASE, where)) for t in triggers),
+        signals       = signals,
+        patterns      = tuple(dict.fromkeys(_step_patterns(signals))),
+        fields        = _reads_fields(signals),
+        steps         = list(remediation.get("steps", [])),
+        commands      = list(remediation.get("commands", [])),
+        source        = source,
+    )
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+class RuleIndex:
+    """
+    Every loaded rule in priority order, and the hint literals of their
+    triggers. Never changed once built — a reload builds a new index.
+    """
+
+    def __init__(self, rules: list[Rule], version: str = ""):
+        self.rules   = sorted(rules, key=lambda r: -r.priority)   # stable: load order breaks ties
+        self.version = version
+        self.by_failure_type = {}
+        for rule in self.rules:
+            if rule.failure_type in self.by_failure_type:
+                raise RuleError(f"{rule.source}: rule {rule.id!r}: failure_type {rule.failure_type!r} "
+                                f"is also used by rule {self.by_failure_type[rule.failure_type].id!r}")
+            self.by_failure_type[rule.failure_type] = rule
+
+        # Each trigger is indexed under its most selective literal(s): the one
+        # every match contains if that is longer, else its hints.
+        self._literals  = {}      # index literal → positions of the rules using it (ascending)
+        self._unindexed = set()   # positions of rules with a trigger that has neither
+        for pos, rule in enumerate(self.rules):
+            for rx, _ in rule.triggers:
+                keys = (REQUIRED[rx],) if rx in REQUIRED else HINTS.get(rx)
+                if not keys:
+                    self._unindexed.add(pos)
+                for key in keys or ():
+                    self._literals.setdefault(key, []).append(pos)
+        self._through = {}        # memo for patterns_through
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def first_match(self, logs: str, low: str | None, start: int = 0, stop: int | None = None,
+                    limit: int | None = None, vocab: Vocabulary | None = None) -> tuple[int | None, tuple]:
+        """
+        (position in self.rules, (first, last) offsets of its first trigger hit)
+        for the highest-priority rule — among the first `limit` — with a trigger
+        match starting in [start, stop); (None, ()) if there is none.
+        `low` is logs.lower() for ASCII input, None otherwise; `vocab`, if
+        given, is a Vocabulary of `low` from `start`.
+        """
+        stop  = len(logs) if stop is None else stop
+        limit = len(self.rules) if limit is None else limit
+        if low is None:                           # no hints for non-ASCII text: every rule
+            for pos in range(limit):
+                for _, folded in self.rules[pos].triggers:
+                    m = folded.search(logs, start)
+                    if m and m.start() < stop:
+                        return pos, (m.start(), m.end() - 1)
+            return None, ()
+
+        keys = [key for key, ps in self._literals.items() if ps[0] < limit]
+        at   = first_positions(low, keys, start, vocab)
+        candidates = {p for key in at for p in self._literals[key] if p < limit}
+        candidates.update(p for p in self._unindexed if p < limit)
+        looked = set(keys)
+
+        def first(lit: str) -> int:
+            if lit not in at:
+                at[lit] = -1 if lit in looked else low.find(lit, start)
+            return at[lit]
+
+        for pos in sorted(candidates):
+            for rx, _ in self.rules[pos].triggers:
+                if rx in REQUIRED and first(REQUIRED[rx]) < 0:
+                    continue
+                hints = HINTS.get(rx)
+                if hints:
+                    starts = [p for p in map(first, hints) if p >= 0]
+                    if not starts:
+                        continue
+                    m = rx.search(low, min(starts))
+                else:
+                    m = rx.search(low, start)
+                if m and m.start() < stop:
+                    return pos, (m.start(), m.end() - 1)
+        return None, ()
+
+    def patterns_through(self, pos: int | None) -> tuple:
+        """Signal patterns of every rule up to and including position `pos` (None: all rules)."""
+        pos = len(self.rules) - 1 if pos is None else pos
+        if pos not in self._through:
+            self._through[pos] = tuple(dict.fromkeys(rx for rule in self.rules[:pos + 1] for rx in rule.patterns))
+        return self._through[pos]
+
+
+# ── Loading and hot reload ───────────────────────────────────────────────────
+
+def rule_paths() -> list[Path]:
+    """Pack files in load order: rulepacks/, then each $KUBE_DEBUG_RULES entry."""
+    entries = [RULES_DIR] + [Path(p) for p in os.getenv("KUBE_DEBUG_RULES", "").split(os.pathsep) if p]
+    files = []
+    for entry in entries:
+        files += sorted(entry.glob("*.json")) if entry.is_dir() else [entry] if entry.is_file() else []
+    return files
+
+
+def load_index(paths=None) -> RuleIndex:
+    """Parse and compile packs into a RuleIndex. Raises RuleError on any bad pack."""
+    paths  = rule_paths() if paths is None else [Path(p) for p in paths]
+    rules  = {}                     # id → Rule; a later pack overrides an earlier rule
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            data = path.read_bytes()
+            pack = json.loads(data)
+        except (OSError, ValueError) as e:
+            raise RuleError(f"{path}: {e}") from None
+        if not isinstance(pack, dict) or not isinstance(pack.get("rules"), list):
+            raise RuleError(f'{path}: a rule pack is an object with a "rules" list')
+        digest.update(str(path).encode() + b"\0" + data + b"\0")
+        for raw in pack["rules"]:
+            rule = _parse_rule(raw, path.name)
+            rules.pop(rule.id, None)
+            rules[rule.id] = rule
+    return RuleIndex(list(rules.values()), digest.hexdigest()[:16])
+
+
+_lock    = threading.Lock()
+_current = None        # live RuleIndex
+_stamp   = None        # (path, mtime, size) of every pack behind _current
+_checked = 0.0         # time.monotonic() of the last look at the pack files
+
+
+def _stamp_of(paths) -> tuple:
+    out = []
+    for path in paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        out.append((str(path), st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def current() -> RuleIndex:
+    """
+    The live index. At most every RELOAD_INTERVAL seconds the pack files are
+    checked, and re-loaded if any changed. A broken edit keeps the previous
+    rules (and says why on stderr); only the first load raises.
+    """
+    global _current, _stamp, _checked
+    now = time.monotonic()
+    if _current is not None and now - _checked < RELOAD_INTERVAL:
+        return _current
+    with _lock:
+        if _current is None or now - _checked >= RELOAD_INTERVAL:
+            paths = rule_paths()
+            stamp = _stamp_of(paths)
+            if stamp != _stamp:
+                try:
+                    _current = load_index(paths)
+                except RuleError as e:
+                    if _current is None:
+                        raise
+                    print(f"rules: keeping the previous rules — {e}", file=sys.stderr)
+                _stamp = stamp
+            _checked = now
+    return _current
+
+
+def reload() -> RuleIndex:
+    """Check the pack files now instead of waiting for RELOAD_INTERVAL."""
+    global _checked
+    _checked = float("-inf")
+    return current()
@@ -0,0 +1,108 @@
+# singleflight.py
+# In-process single-flight for LLM analyses. When several sessions analyze the
+# same failure at once (an alert fires and everyone pastes the same pod's
+# logs), the first caller for a fingerprint makes the upstream call and the
+# others wait for it and share its result. Errors are not shared: one caller's
+# bad or rate-limited API key must not fail everyone else's analysis, so after
+# a failed call the waiting callers try again, one of them as the new leader.
+#
+#   result, shared = flights().do(key, lambda: call_llm())
+#   result, shared = await flights().ado(key, lambda: call_llm_async())
+#
+# Sync and async callers share one registry, so a Streamlit thread and an
+# arun_graph coroutine can coalesce with each other. Only calls that overlap in
+# time are merged; cache.py serves the ones that come later.
+# Set KUBE_DEBUG_SINGLEFLIGHT=off to disable.
+
+import os
+import threading
+
+_RETRY = object()    # leader failed or was cancelled: a follower takes over
+
+
+class SingleFlight:
+    """Registry of in-flight calls by key, with leader / coalesced counters."""
+
+    def __init__(self):
+        self._inflight = {}          # key → Future of the leader's result
+        self._lock     = threading.Lock()
+        self.leaders   = 0           # upstream calls made
+        self.coalesced = 0           # callers that shared another caller's call
+
+    def _join(self, key: str) -> tuple:
+        """(Future of the leader's result, whether this caller leads)."""
+        from concurrent.futures import Future     # imported on first use, like asyncio below
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                self.coalesced += 1
+                return fut, False
+            fut = self._inflight[key] = Future()
+            self.leaders += 1
+            return fut, True
+
+    def _finish(self, key: str, fut, result=None, failed: bool = False) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        # A failure (error, cancellation, interrupt) is the leader's own business
+        fut.set_result(_RETRY if failed else result)
+
+    def do(self, key: str, fn) -> tuple:
+        """
+        Return (fn()'s result, shared) — shared is True when another caller's
+        successful run was reused. fn()'s errors reach only this caller.
+        """
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            result = fut.result()
+            if result is not _RETRY:
+                return result, True
+        try:
+            result = fn()
+        except BaseException:
+            self._finish(key, fut, failed=True)
+            raise
+        self._finish(key, fut, result)
+        return result, False
+
+    async def ado(self, key: str, fn) -> tuple:
+        """do() for a coroutine function; waiting never blocks the event loop."""
+        import asyncio     # on first use: sync-only callers never pay for it
+        while True:
+            fut, leader = self._join(key)
+            if leader:
+                break
+            # shield: a cancelled follower must not cancel the shared future
+            result = await asyncio.shield(asyncio.wrap_future(fut))
+            if result is not _RETRY:
+                return result, True
+        try:
+            result = await fn()
+        except BaseException:
+            self._finish(key, fut, failed=True)
+            raise
+        self._finish(key, fut, result)
+        return result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._inflight)
+        total = self.leaders + self.coalesced
+        return {
+            "leaders":        self.leaders,
+            "coalesced":      self.coalesced,
+            "coalesced_rate": self.coalesced / total if total else 0.0,
+            "in_flight":      in_flight,
+        }
+
+
+_default = SingleFlight()
+
+
+def flights() -> SingleFlight | None:
+    """Process-wide registry, or None when $KUBE_DEBUG_SINGLEFLIGHT is off."""
+    if os.getenv("KUBE_DEBUG_SINGLEFLIGHT", "").lower() == "off":
+        return None
+    return _default
@@ -10,12 +10,14 @@ class AgentState(TypedDict):
     raw_logs: str
     groq_api_key: str
     model: str
+    log_path: Optional[str]           # stored large log (logstore) — read from disk instead of raw_logs
 
     # ── Node: detect ────────────────────────────────────────────────────
     failure_type: Optional[str]       # "CrashLoopBackOff" | "OOMKilled" | "CreateContainerConfigError" | None
     is_root_cause: Optional[bool]     # True = root cause, False = symptom
     signals: Optional[dict]           # Extracted key signals from logs
     confidence: Optional[str]         # "high" | "medium" | "low"
+    evidence: Optional[list]          # raw_logs offsets of the matches behind the result
 
     # ── Node: analyze ───────────────────────────────────────────────────
     root_cause: Optional[str]
@@ -23,6 +25,13 @@ class AgentState(TypedDict):
     severity: Optional[str]
     remediation_steps: Optional[list]
     kubectl_commands: Optional[list]
+    log_excerpt: Optional[str]        # lines selected for the prompt (excerpt.build_excerpt)
+    prompt_chars: Optional[int]       # size of the prompt actually sent
+    llm_usage: Optional[dict]         # token counts reported by the model (input_tokens, output_tokens)
+    analysis_source: Optional[str]    # "llm" | "cache" | "coalesced" (shared an in-flight call) | "fallback"
+    analysis_model: Optional[str]     # model whose answer was used (model "auto" picks one per analysis)
+    escalation: Optional[str]         # why the large model was asked, when it was
+    hedged: Optional[bool]            # a duplicate request was sent for a slow attempt
 
     # ── Node: format ────────────────────────────────────────────────────
     final_report: Optional[dict]
@@ -30,3 +39,33 @@ class AgentState(TypedDict):
     # ── Routing / error ─────────────────────────────────────────────────
     route: Optional[str]              # used by conditional edge: "analyze" | "unknown"
     error: Optional[str]
+
+
+def new_state(raw_logs: str, groq_api_key: str, model: str, log_path: str | None = None) -> AgentState:
+    """Initial graph state — inputs set, every node output still None."""
+    return {
+        "raw_logs":      raw_logs,
+        "groq_api_key":  groq_api_key,
+        "model":         model,
+        "log_path":      log_path,
+        "failure_type":  None,
+        "is_root_cause": None,
+        "signals":       None,
+        "confidence":    None,
+        "evidence":      None,
+        "route":         None,
+        "root_cause":    None,
+        "explanation":   None,
+        "severity":      None,
+        "remediation_steps": None,
+        "kubectl_commands":  None,
+        "log_excerpt":   None,
+        "prompt_chars":  None,
+        "llm_usage":     None,
+        "analysis_source": None,
+        "analysis_model":  None,
+        "escalation":    None,
+        "hedged":        None,
+        "final_report":  None,
+        "error":         None,
+    }
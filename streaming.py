@@ -0,0 +1,348 @@
+# streaming.py
+# Streaming, bounded-memory detection for logs too large to hold as one str.
+# Produces the same failure_type / signals as detector.detect, fed chunk by chunk.
+
+import codecs
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import rules
+from describe import DescribeCollector
+from detector import apply_result, build_result, field_reader
+from excerpt import build_excerpt, iter_file_lines
+from rules import Vocabulary, first_matches
+from state import AgentState
+
+CHUNK_SIZE = 1 << 20     # bytes read per step from files, and chars buffered before a scan
+OVERLAP    = 64 * 1024   # longest span (in chars) a single pattern match is assumed to need
+
+
+class _Hit:
+    """Detached copy of a re.Match — keeps groups and stream offsets, not the chunk."""
+    __slots__ = ("_groups", "offset", "last")
+
+    def __init__(self, m, base: int):
+        self._groups = (m.group(0),) + m.groups()
+        self.offset  = base + m.start()
+        self.last    = base + m.end() - 1
+
+    def group(self, i: int = 0):
+        return self._groups[i]
+
+    def start(self) -> int:
+        return self.offset
+
+
+class StreamDetector:
+    """
+    Incremental detector: feed() str or bytes in any split, call result() at any
+    point — it does not end the stream, so feeding can continue afterwards.
+    Peak memory is one buffered chunk plus `overlap` characters.
+
+    A match is only accepted once `overlap` characters follow its start (or the
+    stream has ended), so matches that span chunk boundaries — e.g. the multi-line
+    `Limits: ... memory:` signal — resolve exactly as they would in a full scan.
+    """
+
+    def __init__(self, overlap: int = OVERLAP):
+        self.overlap  = overlap
+        self._buf     = ""        # unsettled tail of the stream
+        self._start   = 0         # offset in _buf where unsettled positions begin
+        self._base    = 0         # stream offset of _buf[0]
+        self._pending = []        # fed text not yet merged into _buf
+        self._pending_len = 0
+        self._found   = {}        # rule position → stream (start, last) offsets of its first trigger hit
+        self._hits    = {}        # signal pattern → first _Hit
+        self._content = False     # any non-whitespace seen
+        self._describe = DescribeCollector()   # describe-shaped regions, for rules that read fields
+        self._decoder = None
+        self.rules    = rules.current()   # one index for the whole stream, even across a reload
+
+    # ── Input ─────────────────────────────────────────────────────────────────
+
+    def feed(self, data: str | bytes) -> None:
+        if isinstance(data, bytes):
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            data = self._decoder.decode(data)
+        if not data:
+            return
+        if not self._content and not data.isspace():
+            self._content = True
+        self._describe.feed(data)
+        self._pending.append(data)
+        self._pending_len += len(data)
+        if self._pending_len >= max(CHUNK_SIZE, self.overlap):
+            self._flush()
+            self._scan(final=False)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._buf += "".join(self._pending)
+            self._pending.clear()
+            self._pending_len = 0
+
+    # ── Scanning ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _best(found: dict) -> int | None:
+        return min(found) if found else None
+
+    def _needed_signals(self, found: dict, hits: dict) -> list:
+        # Signals of every rule that can still win: a higher-priority trigger
+        # may turn up later, and then its signals' first matches are needed.
+        return [rx for rx in self.rules.patterns_through(self._best(found)) if rx not in hits]
+
+    @property
+    def done(self) -> bool:
+        """
+        True once no further input can change the result: the top rule fired, all
+        its signals matched, and none of them reads describe fields — a later
+        describe block (e.g. the Containers section) would still change those.
+        """
+        best = self._best(self._found)
+        return (best == 0 and not self.rules.rules[best].fields
+                and not self._needed_signals(self._found, self._hits))
+
+    def _scan(self, final: bool) -> None:
+        """Settle every position that `overlap` chars of lookahead (or the end) make final."""
+        buf   = self._buf
+        limit = len(buf) if final else len(buf) - self.overlap
+        if limit <= self._start:
+            return
+        self._match(buf, limit, self._found, self._hits)
+
+        # Drop the settled prefix; keep one char before it so \b still sees context.
+        keep = max(limit - 1, 0)
+        self._buf   = buf[keep:]
+        self._start = limit - keep
+        self._base += keep
+
+    def _match(self, buf: str, limit: int, found: dict, hits: dict) -> None:
+        """Record trigger / signal matches starting in buf[self._start:limit] into found / hits."""
+        low   = buf.lower() if buf.isascii() else None
+        vocab = Vocabulary(low, self._start) if low is not None else None   # shared by both lookups
+
+        # Triggers: only rules ranked above the best hit so far can change it.
+        pos, span = self.rules.first_match(buf, low, self._start, limit, self._best(found), vocab)
+        if pos is not None:
+            found[pos] = (self._base + span[0], self._base + span[1])
+
+        for rx, m in first_matches(self._needed_signals(found, hits), buf, low, self._start, vocab).items():
+            if m.start() < limit:
+                hits[rx] = _Hit(m, self._base)
+
+    # ── Output ────────────────────────────────────────────────────────────────
+
+    @property
+    def empty(self) -> bool:
+        # Undecoded trailing bytes still count: at end of stream they become U+FFFD.
+        return not self._content and not (self._decoder and self._decoder.getstate()[0])
+
+    def _final(self) -> tuple[dict, dict, str]:
+        """
+        (found, hits, undecoded tail) as if the stream ended now. The unsettled
+        tail (at most `overlap` chars) is matched into copies, so the stream
+        stays open.
+        """
+        self._flush()
+        self._scan(final=False)
+        buf, rest = self._buf, ""
+        if self._decoder is not None:
+            state = self._decoder.getstate()
+            rest  = self._decoder.decode(b"", final=True)
+            self._decoder.setstate(state)
+            buf  += rest
+
+        found, hits = dict(self._found), dict(self._hits)
+        if len(buf) > self._start:
+            self._match(buf, len(buf), found, hits)
+        return found, hits, rest
+
+    def _outcome(self) -> tuple[dict | None, list]:
+        found, hits, rest = self._final()
+        best = self._best(found)
+        if best is None:
+            return None, []
+        rule     = self.rules.rules[best]
+        evidence = [*found[best]]
+
+        def find(rx):
+            hit = hits.get(rx)
+            if hit is not None:
+                evidence.extend((hit.offset, hit.last))
+            return hit
+
+        field = field_reader(self._describe.describe(rest), rule, evidence) if rule.fields else None
+        return build_result(rule, find, field), sorted(set(evidence))
+
+    def result(self) -> dict | None:
+        """The detect()-style result for everything fed so far, or None."""
+        return self._outcome()[0]
+
+    @property
+    def evidence(self) -> list:
+        """Stream offsets of the trigger and signal matches behind result()."""
+        return self._outcome()[1]
+
+    def apply(self, state: AgentState) -> AgentState:
+        """Write the detection into `state` exactly as detect_node would."""
+        if self.empty:
+            state["error"] = "No log content provided."
+            state["route"] = "unknown"
+        else:
+            result, evidence = self._outcome()
+            apply_result(state, result)
+            state["evidence"] = evidence
+        return state
+
+
+# ── Growing logs ─────────────────────────────────────────────────────────────
+
+class IncrementalDetector:
+    """
+    Resumable detection for a log that only grows (tail -f semantics). update()
+    feeds just the text past what was already consumed — the scan position,
+    fired triggers and first signal hits carry over — and returns exactly what a
+    full rescan would. If the consumed prefix changed, it starts over.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.detector = StreamDetector()
+        self._text    = ""     # last text seen — kept by reference for the prefix check
+
+    @property
+    def consumed(self) -> int:
+        return len(self._text)
+
+    def update(self, text: str) -> StreamDetector:
+        """Bring the detector up to date with `text`; returns it (use .result(), .apply())."""
+        # startswith is a memcmp over the old prefix: far cheaper than re-detecting it.
+        if not text.startswith(self._text) or self.detector.rules is not rules.current():
+            self.reset()
+        delta = text[len(self._text):]
+        if delta:
+            self.detector.feed(delta)
+        self._text = text
+        return self.detector
+
+
+FOLLOWER_SLOTS  = 4            # large logs remembered per process (each holds its last text)
+HEAD_CHARS      = 4096         # a log's identity: the hash of its first chars
+
+_followers      = OrderedDict()   # head hash → last text seen once, or IncrementalDetector once it grew
+_followers_lock = threading.Lock()
+
+
+def detect_appended(state: AgentState) -> AgentState:
+    """
+    detect_node for large raw_logs that may be an earlier input plus appended
+    lines. A log seen for the first time gets the normal one-pass detection;
+    once it is seen again with lines appended it gets an IncrementalDetector,
+    and from then on only the new tail is scanned. Results are identical to a
+    full rescan.
+    """
+    from detector import detect_text
+    text = state["raw_logs"]
+    key  = hashlib.sha256(text[:HEAD_CHARS].encode("utf-8", "surrogatepass")).digest()
+    with _followers_lock:
+        entry = _followers.pop(key, None)
+
+    if isinstance(entry, str) and len(text) > len(entry) and text.startswith(entry):
+        entry = IncrementalDetector()        # it grows: worth one streaming pass to resume from
+    if isinstance(entry, IncrementalDetector):
+        entry.update(text).apply(state)
+    else:
+        # Streaming has to look for every family's signals, not only the winner's,
+        # so a one-off input is cheaper through the plain path.
+        entry = text
+        detect_text(state)
+
+    with _followers_lock:
+        _followers[key] = entry
+        while len(_followers) > FOLLOWER_SLOTS:
+            _followers.popitem(last=False)
+    return state
+
+
+def forget_appended() -> None:
+    """Drop every remembered log, so the next detect_appended scans from scratch."""
+    with _followers_lock:
+        _followers.clear()
+
+
+class LogFollower:
+    """
+    Re-detection for a log file that is being appended to: each refresh() reads
+    only the bytes written since the last one. Truncation or rotation (file
+    shrank, or a different inode at the path) restarts from the beginning.
+    """
+
+    def __init__(self, path, chunk_size: int = CHUNK_SIZE):
+        self.path       = path
+        self.chunk_size = chunk_size
+        self.detector   = StreamDetector()
+        self.position   = 0
+        self._identity  = None
+
+    def refresh(self) -> StreamDetector:
+        st = os.stat(self.path)
+        if (st.st_dev, st.st_ino) != self._identity or st.st_size < self.position:
+            self.detector, self.position, self._identity = StreamDetector(), 0, (st.st_dev, st.st_ino)
+        with open(self.path, "rb") as fh:
+            fh.seek(self.position)
+            for chunk in iter(lambda: fh.read(self.chunk_size), b""):
+                self.detector.feed(chunk)
+                self.position += len(chunk)
+        return self.detector
+
+
+def iter_source(source, chunk_size: int = CHUNK_SIZE):
+    """
+    Yield chunks from a file path, a binary/text file object, or any iterable of
+    str/bytes lines or chunks.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            yield from iter(lambda: fh.read(chunk_size), b"")
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        yield from source
+
+
+def detect_stream(source, chunk_size: int = CHUNK_SIZE) -> dict | None:
+    """
+    Streaming counterpart of detector.detect. `source` is a path, file object or
+    iterable of lines/chunks; reading stops early once the result is settled.
+    """
+    det = StreamDetector()
+    for chunk in iter_source(source, chunk_size):
+        det.feed(chunk)
+        if det.done:
+            break
+    return det.result()
+
+
+def detect_file(path, state: AgentState | None = None) -> AgentState:
+    """
+    detect_node for a log on disk: stream it through the detector, then — only
+    if there is something to analyze — a second pass picks the prompt excerpt.
+    raw_logs and log_excerpt are set to that excerpt; the file is never loaded whole.
+    """
+    det = StreamDetector()
+    for chunk in iter_source(path):
+        det.feed(chunk)
+        if det.done:
+            break
+
+    state = det.apply({} if state is None else state)
+    excerpt = ""
+    if state.get("route") == "analyze":
+        excerpt = build_excerpt(iter_file_lines(path), state["evidence"])
+    state["raw_logs"] = state["log_excerpt"] = excerpt
+    return state
@@ -0,0 +1,25 @@
+# tests/conftest.py
+# The modules live at the repository root; make them importable however pytest is started.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["KUBE_DEBUG_CACHE"] = "off"     # never read or write the user's LLM cache
+
+from bench.stub import StubLLM  # noqa: E402  (needs the path above)
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """A bench.stub.StubLLM served by nodes.get_llm for the duration of the test."""
+    import escalation
+    import nodes
+
+    llm = StubLLM()
+    monkeypatch.setattr(nodes, "get_llm", lambda *args, **kwargs: llm)
+    # Hedging would send duplicate requests once latencies were seen; keep one call per analysis
+    monkeypatch.setattr(escalation, "_default", escalation.Policy(hedge=False))
+    return llm
@@ -0,0 +1,79 @@
+# tests/test_cache.py
+# The LLM cache: fingerprinting, TTL and LRU eviction, and analyses served from it.
+
+import cache
+from cache import LLMCache, fingerprint
+from graph import run_graph
+from samples import SAMPLES
+
+MODEL = "llama-3.3-70b-versatile"
+
+
+def test_get_put_and_counters(tmp_path):
+    db = LLMCache(tmp_path / "c.sqlite3")
+    assert db.get("k") is None
+    db.put("k", {"root_cause": "x"})
+    assert db.get("k") == {"root_cause": "x"}
+    assert db.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    db = LLMCache(tmp_path / "c.sqlite3", ttl=60)
+    db.put("k", {"v": 1})
+    now[0] += 59
+    assert db.get("k") == {"v": 1}
+    now[0] += 2
+    assert db.get("k") is None
+    assert db.stats()["entries"] == 0
+
+
+def test_least_recently_used_is_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    db = LLMCache(tmp_path / "c.sqlite3", max_entries=2)
+    for key in ("a", "b"):
+        db.put(key, {"key": key})
+        now[0] += 1
+    db.get("a")
+    now[0] += 1
+    db.put("c", {"key": "c"})
+    assert [db.get(key) is not None for key in ("a", "b", "c")] == [True, False, True]
+
+
+def test_fingerprint_ignores_noise_only():
+    base = fingerprint(MODEL, "OOMKilled", True, {"memory_limit": "512Mi"},
+                       "2024-01-15T14:23:01Z Killed process 4242 (java)\nBack-off 5m")
+    same = fingerprint(MODEL, "OOMKilled", True, {"memory_limit": "512Mi "},
+                       "2024-02-01T09:00:00Z  Killed process 17 (java)\nBack-off 2m")
+    assert base == same
+    assert base != fingerprint("other-model", "OOMKilled", True, {"memory_limit": "512Mi"},
+                               "2024-01-15T14:23:01Z Killed process 4242 (java)\nBack-off 5m")
+    assert base != fingerprint(MODEL, "OOMKilled", True, {"memory_limit": "1Gi"},
+                               "2024-01-15T14:23:01Z Killed process 4242 (java)\nBack-off 5m")
+
+
+def _use_cache(monkeypatch, setting: str) -> None:
+    monkeypatch.setenv("KUBE_DEBUG_CACHE", setting)
+    monkeypatch.setattr(cache, "_default_cache", None)
+    monkeypatch.setattr(cache, "_unavailable", set())
+
+
+def test_repeat_analysis_is_served_from_cache(tmp_path, monkeypatch, stub_llm):
+    _use_cache(monkeypatch, str(tmp_path / "c.sqlite3"))
+    first  = run_graph(SAMPLES["CrashLoopBackOff"], "gsk_test", MODEL)
+    second = run_graph(SAMPLES["CrashLoopBackOff"], "gsk_test", MODEL)
+    assert stub_llm.calls == 1
+    assert (first["analysis_source"], second["analysis_source"]) == ("llm", "cache")
+    assert second["root_cause"] == first["root_cause"]
+    cache.get_cache().close()
+
+
+def test_unusable_cache_is_skipped(tmp_path, monkeypatch, stub_llm):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory", encoding="utf-8")
+    _use_cache(monkeypatch, str(blocker / "c.sqlite3"))
+    assert cache.get_cache() is None
+    report = run_graph(SAMPLES["CrashLoopBackOff"], "gsk_test", MODEL)
+    assert report["analysis_source"] == "llm"
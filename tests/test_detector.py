@@ -0,0 +1,61 @@
+# tests/test_detector.py
+# The literal prefilters only skip work: every search and the winning rule are
+# what a plain regex scan in priority order would give.
+
+import pytest
+
+import rules
+from detector import detect, search
+from samples import SAMPLES
+
+NOISE = "".join(f"2024-01-15T14:23:{i:02d}Z INFO app request {i} served in 12ms\n" for i in range(60))
+CORPUS = {
+    **{f"sample {i}": text for i, text in enumerate(SAMPLES.values())},
+    "noise":      NOISE,
+    "upper":      SAMPLES["CrashLoopBackOff"].upper(),
+    "non-ascii":  "Zeitüberschreitung — " + SAMPLES["OOMKilled / Exit Code 137"],
+    "buried":     NOISE + SAMPLES["CreateContainerConfigError"] + NOISE,
+    "two":        SAMPLES["CrashLoopBackOff"] + SAMPLES["OOMKilled / Exit Code 137"],
+}
+
+
+def _span(m):
+    return m.span() if m else None
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_prefiltered_search_matches_plain_search(name):
+    text = CORPUS[name]
+    low  = text.lower() if text.isascii() else None
+    for rx in rules.current().patterns_through(None):
+        assert _span(search(rx, text, low)) == _span(rx.search(text)), rx.pattern
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_indexed_trigger_match_is_the_priority_order_scan(name):
+    text  = CORPUS[name]
+    index = rules.current()
+    naive = (None, ())
+    for pos, rule in enumerate(index.rules):
+        m = next((m for _, folded in rule.triggers if (m := folded.search(text))), None)
+        if m:
+            naive = (pos, (m.start(), m.end() - 1))
+            break
+    low = text.lower() if text.isascii() else None
+    assert index.first_match(text, low) == naive
+    assert index.first_match(text, None) == naive
+
+
+def test_sample_results():
+    assert detect(SAMPLES["CrashLoopBackOff"]) == {
+        "failure_type":  "CrashLoopBackOff",
+        "is_root_cause": False,
+        "confidence":    "high",
+        "signals": {"restart_count": "15", "severity_hint": "high — restarted 15 times", "exit_code": "1",
+                    "likely_cause": "application startup error", "termination_reason": "Error"},
+    }
+    assert detect(SAMPLES["CreateContainerConfigError"])["signals"] == {
+        "missing_resource": "Secret", "resource_name": "db-credentials", "namespace": "production",
+        "env_var_issue": "true",
+    }
+    assert detect(NOISE) is None
@@ -0,0 +1,120 @@
+# tests/test_escalation.py
+# Tiers, hedged requests and deadlines of the LLM call policy.
+
+import asyncio
+import time
+
+import pytest
+
+import detector
+import escalation
+from bench.stub import ANSWER
+from escalation import FAST_MODEL, LARGE_MODEL, DeadlineExceeded, Policy, tiers_for, validate
+from samples import SAMPLES
+
+INVALID = {**ANSWER, "severity": "unknown"}
+
+
+def _sync(behaviour: dict):
+    """call(model, progress) that sleeps, then returns or raises per model; counts calls."""
+    calls = []
+
+    def call(model, progress):
+        calls.append(model)
+        delay, outcome = behaviour[model] if not callable(behaviour[model]) else behaviour[model](len(calls))
+        time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, None
+    return call, calls
+
+
+def _async(behaviour: dict):
+    async def call(model, progress):
+        delay, outcome = behaviour[model]
+        await asyncio.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome, None
+    return call
+
+
+def test_validate():
+    assert validate(ANSWER) is None
+    assert validate(INVALID) == "severity 'unknown'"
+    assert validate({**ANSWER, "kubectl_commands": []}) == "bad kubectl_commands"
+    assert validate("text") == "not a JSON object"
+
+
+def test_tiers():
+    assert tiers_for("llama-3.3-70b-versatile", "high") == (["llama-3.3-70b-versatile"], None)
+    assert tiers_for("auto", "high") == ([FAST_MODEL, LARGE_MODEL], None)
+    assert tiers_for("auto", "low") == ([LARGE_MODEL], "low detection confidence")
+
+
+def test_detector_confidence():
+    assert detector.detect(SAMPLES["CrashLoopBackOff"])["confidence"] == "high"
+    # The trigger alone, with none of the rule's signals
+    assert detector.detect("Warning  BackOff  kubelet  Back-off restarting failed container\n")["confidence"] == "low"
+
+
+def test_invalid_fast_answer_escalates():
+    call, calls = _sync({FAST_MODEL: (0, INVALID), LARGE_MODEL: (0, ANSWER)})
+    outcome = Policy(hedge=False).run([FAST_MODEL, LARGE_MODEL], call)
+    assert calls == [FAST_MODEL, LARGE_MODEL]
+    assert outcome.model == LARGE_MODEL and outcome.parsed == ANSWER
+    assert "failed validation" in outcome.escalation
+
+
+def test_late_fast_answer_beats_failed_large_model():
+    behaviour = {FAST_MODEL: (0.3, ANSWER), LARGE_MODEL: (0, RuntimeError("large model down"))}
+    policy = Policy(deadline=5, fast_deadline=0.1, hedge=False)
+
+    call, _ = _sync(behaviour)
+    outcome = policy.run([FAST_MODEL, LARGE_MODEL], call)
+    assert outcome.model == FAST_MODEL and "missed its 0.1s deadline" in outcome.escalation
+
+    outcome = asyncio.run(policy.arun([FAST_MODEL, LARGE_MODEL], _async(behaviour)))
+    assert outcome.model == FAST_MODEL
+
+
+def test_deadline():
+    call, _ = _sync({LARGE_MODEL: (1.0, ANSWER)})
+    t0 = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        Policy(deadline=0.2, hedge=False).run([LARGE_MODEL], call)
+    assert time.monotonic() - t0 < 0.9
+
+
+def test_hedged_request_after_p95():
+    policy = Policy(hedge=True)
+    for _ in range(escalation.MIN_SAMPLES):
+        policy._window(LARGE_MODEL).observe(0.01)
+    assert policy.hedge_delay(LARGE_MODEL) == escalation.MIN_HEDGE_DELAY
+
+    # The first request hangs; the duplicate sent after the hedge delay answers
+    call, calls = _sync({LARGE_MODEL: lambda n: (3.0, ANSWER) if n == 1 else (0, ANSWER)})
+    t0 = time.monotonic()
+    outcome = policy.run([LARGE_MODEL], call)
+    assert outcome.hedged and len(calls) == 2
+    assert time.monotonic() - t0 < 2.0
+
+
+def test_limiter_queue_does_not_count_against_the_deadline(stub_llm, monkeypatch):
+    from graph import arun_graph
+    from ratelimit import RateLimiter
+
+    monkeypatch.setenv("KUBE_DEBUG_SINGLEFLIGHT", "off")     # every analysis makes its own call
+    monkeypatch.setattr(escalation, "_default", Policy(deadline=0.5, hedge=False))
+    stub_llm.latency = 0.3
+
+    async def main():
+        limiter = RateLimiter(max_concurrency=2, requests_per_min=1e6, tokens_per_min=1e9)
+        return await asyncio.gather(*(arun_graph(SAMPLES["CrashLoopBackOff"], "gsk_test", LARGE_MODEL,
+                                                 limiter=limiter) for _ in range(8)))
+
+    t0 = time.monotonic()
+    reports = asyncio.run(main())
+    assert time.monotonic() - t0 > 1.0          # four rounds of two: the queue really was waited on
+    assert [r["analysis_source"] for r in reports] == ["llm"] * 8
+    assert stub_llm.calls == 8
@@ -0,0 +1,55 @@
+# tests/test_excerpt.py
+# The prompt excerpt keeps the evidence, errors, events and tail within budget.
+
+import detector
+from excerpt import DEFAULT_BUDGET, GAP, build_excerpt, iter_file_lines
+from graph import run_graph
+from samples import SAMPLES
+from state import new_state
+
+STARTUP = "".join(f"2024-01-15T14:23:{i % 60:02d}Z INFO loading module {i}\n" for i in range(400))
+FATAL   = "2024-01-15T14:30:00Z FATAL cannot connect to database at db:5432\n"
+TAIL    = "".join(f"2024-01-15T14:31:{i:02d}Z INFO shutting down worker {i}\n" for i in range(5))
+
+
+def test_short_logs_are_sent_whole():
+    text = SAMPLES["CrashLoopBackOff"]
+    assert len(text) <= DEFAULT_BUDGET
+    assert build_excerpt(text) == text
+
+
+def test_fatal_lines_and_tail_beat_startup_noise():
+    text    = STARTUP + FATAL + STARTUP + TAIL
+    excerpt = build_excerpt(text)
+    assert len(excerpt) <= DEFAULT_BUDGET
+    assert FATAL.strip() in excerpt
+    assert "shutting down worker" in excerpt
+    assert excerpt.startswith(GAP)               # the startup lines before it were dropped
+
+
+def test_evidence_lines_are_kept():
+    text = STARTUP + SAMPLES["OOMKilled / Exit Code 137"] + STARTUP
+    state = detector.detect_text(new_state(text, "", "model"))
+    excerpt = build_excerpt(text, state["evidence"])
+    for offset in state["evidence"]:
+        line = text[text.rfind("\n", 0, offset) + 1:text.find("\n", offset)].rstrip()
+        assert line[:100] in excerpt
+    assert len(excerpt) <= DEFAULT_BUDGET
+
+
+def test_repeated_lines_collapse():
+    noisy = "".join(f"WARN retrying request {i} after back-off\n" for i in range(200))
+    excerpt = build_excerpt(STARTUP + noisy + FATAL)
+    assert excerpt.count("retrying request") < 3
+
+
+def test_file_lines_give_the_same_excerpt(tmp_path):
+    text = STARTUP + FATAL + STARTUP + TAIL
+    path = tmp_path / "pod.log"
+    path.write_text(text, encoding="utf-8")
+    assert build_excerpt(iter_file_lines(path)) == build_excerpt(text)
+
+
+def test_prompt_size_is_reported(stub_llm):
+    report = run_graph(STARTUP + SAMPLES["CrashLoopBackOff"] + STARTUP, "gsk_test", "llama-3.3-70b-versatile")
+    assert 0 < report["prompt_chars"] < len(STARTUP)
@@ -0,0 +1,83 @@
+# tests/test_graph.py
+# run_direct must produce the same report as the LangGraph graph on every path.
+
+import pytest
+
+import detector
+import rules
+from graph import run_direct, run_graph
+from samples import SAMPLES
+
+MODEL = "llama-3.3-70b-versatile"
+
+# One log per rule family, keyed by rule id
+FAMILIES = {
+    "oom":           SAMPLES["OOMKilled / Exit Code 137"],
+    "config":        SAMPLES["CreateContainerConfigError"],
+    "crashloop":     SAMPLES["CrashLoopBackOff"],
+    "image-pull":    'Warning  Failed  kubelet  Failed to pull image "registry.example.com/api:9.9": '
+                     "manifest unknown\nWarning  Failed  kubelet  Error: ErrImagePull\n",
+    "run-container": 'Warning  Failed  kubelet  Error: exec: "/app/start": executable file not found in $PATH\n'
+                     "    State:          Waiting\n      Reason:       RunContainerError\n",
+    "volume-mount":  'Warning  FailedMount  kubelet  MountVolume.SetUp failed for volume "data" : '
+                     'persistentvolumeclaim "data-pvc" not found\n',
+    "scheduling":    "Warning  FailedScheduling  default-scheduler  0/3 nodes are available: 3 Insufficient memory.\n",
+    "evicted":       "Status:  Failed\nReason:  Evicted\nMessage: The node was low on resource: memory.\n",
+    "probe":         "Warning  Unhealthy  kubelet  Liveness probe failed: HTTP probe failed with statuscode: 500\n"
+                     "Restart Count:  3\n",
+    "job-failed":    "Warning  BackoffLimitExceeded  job-controller  Job has reached the specified backoff limit\n",
+}
+OTHER = {
+    "unknown": "2024-01-15T14:23:01Z INFO app all requests served\n",
+    "empty":   "",
+}
+CASES = {**{f"sample:{name}": text for name, text in SAMPLES.items()},
+         **{f"rule:{rule_id}": text for rule_id, text in FAMILIES.items()}, **OTHER}
+
+
+def test_every_rule_family_is_covered():
+    ids = {rule.id for rule in rules.current().rules}
+    assert ids == set(FAMILIES)
+    by_type = {rule.failure_type: rule.id for rule in rules.current().rules}
+    for rule_id, text in FAMILIES.items():
+        assert by_type[detector.detect(text)["failure_type"]] == rule_id
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_pattern_path_matches_graph(case):
+    text = CASES[case]
+    assert run_direct(text, "", MODEL) == run_graph(text, "", MODEL)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_llm_path_matches_graph(case, stub_llm):
+    text = CASES[case]
+    report = run_direct(text, "gsk_test", MODEL)
+    assert report == run_graph(text, "gsk_test", MODEL)
+    if case.startswith(("sample:", "rule:")):
+        assert report["analysis_source"] == "llm" and stub_llm.calls == 2
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_streamed_path_matches_graph(case, stub_llm):
+    text = CASES[case]
+    direct, graph = [], []
+    assert run_direct(text, "gsk_test", MODEL, on_partial=direct.append) == \
+        run_graph(text, "gsk_test", MODEL, on_partial=graph.append)
+    assert direct == graph
+
+
+def test_direct_executor_records_the_same_metrics(stub_llm):
+    import metrics
+
+    def counts(run) -> dict:
+        metrics.reset()
+        run(SAMPLES["CrashLoopBackOff"], "gsk_test", MODEL)
+        run(OTHER["unknown"], "", MODEL)
+        snap = metrics.snapshot()
+        return {name: (snap[name]["count"], snap[name]["prompt_tokens"]) for name in snap if not name.startswith("run_")}
+
+    graph = counts(run_graph)
+    assert counts(run_direct) == graph
+    assert graph["analyze"] == (1, 100) and graph["detect"][0] == 2
+    assert metrics.snapshot()["run_direct"]["count"] == 2
@@ -0,0 +1,61 @@
+# tests/test_grouping.py
+# Replicas of one workload share a fingerprint; unrelated workloads never do.
+
+import pytest
+
+from detector import detect_node
+from grouping import Groups, group_key, workload
+from samples import SAMPLES
+from state import new_state
+
+CRASHLOOP = SAMPLES["CrashLoopBackOff"]
+
+
+def _state(text: str) -> dict:
+    return detect_node(new_state(text, "", "llama-3.3-70b-versatile"))
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("api-7d9f8c6bd5-x2bkq", "api"),          # Deployment
+    ("node-exporter-b7x2q",  "node-exporter"),  # DaemonSet
+    ("postgres-0",           "postgres"),     # StatefulSet
+    ("my-cache",             "my-cache"),     # no generated suffix
+    ("api-gateway",          "api-gateway"),
+])
+def test_workload(name, expected):
+    assert workload(name) == expected
+
+
+def test_replicas_share_a_group():
+    a = _state(CRASHLOOP + "2024-01-15T14:23:01Z ERROR dial tcp 10.0.3.7:5432: connection refused\n")
+    b = _state(CRASHLOOP + "2024-01-15T14:29:44Z ERROR dial tcp 10.0.3.9:5432: connection refused\n")
+    assert group_key("shop/api-7d9f8c6bd5-x2bkq", a) == group_key("shop/api-7d9f8c6bd5-q4zvn", b)
+
+
+def test_different_workloads_same_exit_code_do_not_group():
+    api    = _state(CRASHLOOP + "ERROR dial tcp 10.0.3.7:5432: connection refused\n")
+    worker = _state(CRASHLOOP + "FATAL open /etc/app/config.yaml: no such file or directory\n")
+    assert api["signals"] == worker["signals"]
+    assert group_key("shop/api-7d9f8c6bd5-x2bkq", api) != group_key("billing/worker-5f6d7c8b9-xz2q4", worker)
+
+
+def test_same_logs_different_workloads_do_not_group():
+    assert group_key("shop/api-7d9f8c6bd5-x2bkq", _state(CRASHLOOP)) != \
+        group_key("shop/worker-7d9f8c6bd5-x2bkq", _state(CRASHLOOP))
+
+
+def test_followers_get_the_leader_analysis_renamed():
+    groups = Groups()
+    leader, follower = _state(CRASHLOOP), _state(CRASHLOOP)
+    group, is_leader = groups.join("shop/api-7d9f8c6bd5-x2bkq", leader)
+    assert is_leader
+    assert groups.join("shop/api-7d9f8c6bd5-q4zvn", follower) == (group, False)
+
+    leader.update(root_cause="api-7d9f8c6bd5-x2bkq cannot reach its database", explanation="",
+                  severity="high", remediation_steps=["kubectl logs api-7d9f8c6bd5-x2bkq -n shop"],
+                  kubectl_commands=[], analysis_source="llm", analysis_model="m")
+    [(pod, state)] = groups.done(group, leader)
+    assert pod == "shop/api-7d9f8c6bd5-q4zvn"
+    assert state["root_cause"] == "api-7d9f8c6bd5-q4zvn cannot reach its database"
+    assert state["remediation_steps"] == ["kubectl logs api-7d9f8c6bd5-q4zvn -n shop"]
+    assert group.size == 2 and len(groups) == 1
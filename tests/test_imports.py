@@ -0,0 +1,18 @@
+# tests/test_imports.py
+# Pattern-only paths must not pull in asyncio, thread pools or LangChain on import.
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("asyncio", "concurrent.futures", "langchain_core", "langchain_groq", "httpx", "langgraph")
+
+
+@pytest.mark.parametrize("module", ["detector", "nodes", "graph"])
+def test_import_stays_light(module):
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == []
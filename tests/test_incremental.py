@@ -0,0 +1,57 @@
+# tests/test_incremental.py
+# Re-detection of a growing log scans only the appended text and matches a full rescan.
+
+import detector
+from samples import SAMPLES
+from state import new_state
+from streaming import IncrementalDetector, LogFollower, detect_appended, forget_appended
+
+NOISE = "".join(f"2024-01-15T14:23:{i % 60:02d}Z INFO app request {i} served in 12ms\n" for i in range(5_000))
+GROWTH = [NOISE, SAMPLES["CrashLoopBackOff"], NOISE, SAMPLES["OOMKilled / Exit Code 137"], NOISE]
+
+
+def _fields(state: dict) -> dict:
+    return {k: state.get(k) for k in ("failure_type", "is_root_cause", "signals", "confidence", "route", "evidence")}
+
+
+def test_appended_text_matches_full_rescan():
+    inc, text = IncrementalDetector(), ""
+    first = inc.detector
+    for part in GROWTH:
+        text += part
+        det = inc.update(text)
+        assert det is first                   # resumed, not restarted
+        assert inc.consumed == len(text)
+        assert det.result() == detector.detect(text)
+
+
+def test_changed_prefix_starts_over():
+    inc   = IncrementalDetector()
+    first = inc.update(SAMPLES["CrashLoopBackOff"] + NOISE)
+    text  = SAMPLES["CreateContainerConfigError"] + NOISE
+    assert inc.update(text) is not first
+    assert inc.detector.result() == detector.detect(text)
+
+
+def test_detect_appended_matches_detect_text():
+    forget_appended()
+    text = NOISE * 12
+    assert len(text) >= detector.INCREMENTAL_MIN
+    for part in GROWTH:
+        text += part
+        resumed = detect_appended(new_state(text, "", "model"))
+        full    = detector.detect_text(new_state(text, "", "model"))
+        assert _fields(resumed) == _fields(full)
+    forget_appended()
+
+
+def test_log_follower_reads_only_new_bytes(tmp_path):
+    path = tmp_path / "pod.log"
+    path.write_text(NOISE, encoding="utf-8")
+    follower = LogFollower(path)
+    assert follower.refresh().result() is None
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(SAMPLES["CrashLoopBackOff"])
+    det = follower.refresh()
+    assert follower.position == path.stat().st_size
+    assert det.result() == detector.detect(path.read_text(encoding="utf-8"))
@@ -0,0 +1,78 @@
+# tests/test_jsonstream.py
+# A streamed LLM answer yields each field as soon as it is complete, and the
+# partial reports built from it end in the same report as a plain call.
+
+import asyncio
+import json
+
+import pytest
+
+from bench.stub import ANSWER
+from graph import arun_graph, run_graph
+from jsonstream import ObjectStream
+from samples import SAMPLES
+
+MODEL = "llama-3.3-70b-versatile"
+
+
+def _feed_chars(text: str) -> list:
+    """Feed one character at a time; the fields after each change."""
+    stream, seen = ObjectStream(), []
+    for c in text:
+        if stream.feed(c):
+            seen.append({k: list(v) if isinstance(v, list) else v for k, v in stream.fields.items()})
+    assert stream.done and not stream.failed
+    return seen
+
+
+def test_fields_complete_one_at_a_time():
+    text = json.dumps(ANSWER)
+    seen = _feed_chars(text)
+    assert seen[0] == {"root_cause": ANSWER["root_cause"]}
+    assert seen[-1] == ANSWER
+    # Arrays grow by whole items
+    steps = [s["remediation_steps"] for s in seen if "remediation_steps" in s]
+    assert steps[0] == ANSWER["remediation_steps"][:1]
+    assert all(ANSWER["remediation_steps"][:len(s)] == s for s in steps)
+
+
+def test_fences_and_preamble_are_ignored():
+    text = "Here is the analysis:\n```json\n" + json.dumps(ANSWER, indent=2) + "\n```\n"
+    assert _feed_chars(text)[-1] == ANSWER
+
+
+def test_numbers_wait_for_a_delimiter():
+    stream = ObjectStream()
+    stream.feed('{"count": 1')
+    assert "count" not in stream.fields
+    stream.feed('5, "ok": true}')
+    assert stream.fields == {"count": 15, "ok": True} and stream.done
+
+
+def test_non_object_fails():
+    stream = ObjectStream()
+    stream.feed('{"a" 1}')
+    assert stream.failed and not stream.done
+
+
+def _partials(run) -> tuple[list, dict]:
+    partials = []
+    final = run(partials.append)
+    return partials, final
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_partial_reports_lead_to_the_final_report(mode, stub_llm):
+    log = SAMPLES["OOMKilled / Exit Code 137"]
+    if mode == "sync":
+        partials, final = _partials(lambda cb: run_graph(log, "gsk_test", MODEL, on_partial=cb))
+    else:
+        partials, final = _partials(lambda cb: asyncio.run(arun_graph(log, "gsk_test", MODEL, on_partial=cb)))
+    plain = run_graph(log, "gsk_test", MODEL)
+
+    assert partials and all(p["partial"] for p in partials)
+    assert partials[0]["root_cause"] == ANSWER["root_cause"]
+    assert not partials[0].get("remediation_steps")
+    assert {k: v for k, v in final.items() if k != "analysis_source"} == \
+        {k: v for k, v in plain.items() if k != "analysis_source"}
+    assert final["remediation_steps"] == ANSWER["remediation_steps"]
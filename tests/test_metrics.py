@@ -0,0 +1,40 @@
+# tests/test_metrics.py
+# The command-line tools expose metrics and spans; the HTTP endpoint is local by default.
+
+import json
+import urllib.request
+
+import metrics
+import podlist
+from metrics import serve_metrics
+
+
+def test_serve_metrics_is_local_by_default():
+    server = serve_metrics(0)
+    try:
+        host, port = server.server_address
+        assert host == "127.0.0.1"
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.status == 200
+            assert b"kube_debug_" in response.read()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cli_writes_metrics_and_spans(tmp_path, monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    metrics.reset()
+    pods = tmp_path / "pods.json"
+    pods.write_text(json.dumps({"kind": "PodList", "items": [{
+        "metadata": {"name": "api-0", "namespace": "shop"},
+        "status":   {"containerStatuses": [{"name": "api", "restartCount": 4,
+                                            "state": {"waiting": {"reason": "CrashLoopBackOff"}}}]},
+    }]}), encoding="utf-8")
+    prom, spans = tmp_path / "metrics.prom", tmp_path / "spans.jsonl"
+
+    assert podlist.main([str(pods), "-o", str(tmp_path / "out.jsonl"),
+                         "--metrics-file", str(prom), "--spans-file", str(spans)]) == 0
+    assert 'kube_debug_stage_seconds_count{stage="format"} 1' in prom.read_text(encoding="utf-8")
+    names = {json.loads(line)["name"] for line in spans.read_text(encoding="utf-8").splitlines()}
+    assert {"pattern", "format"} <= names
@@ -0,0 +1,107 @@
+# tests/test_podlist.py
+# Pod objects are read field by field, streamed with bounded memory, and
+# reported with the same detection a `kubectl describe` of them would get.
+
+import io
+import json
+
+import pytest
+
+import podlist
+import rules
+from describe import collect
+from podlist import PodView, detect_objects, event_row, run_podlist
+
+
+def _pod(name: str, restarts: int = 9, failing: bool = True) -> dict:
+    sidecar = {"name": "proxy", "restartCount": 0, "state": {"running": {}}}
+    app = {"name": "app", "restartCount": restarts if failing else 0,
+           "state": {"waiting": {"reason": "CrashLoopBackOff"}} if failing else {"running": {}},
+           "lastState": {"terminated": {"reason": "OOMKilled", "exitCode": 137}} if failing else {}}
+    return {
+        "kind": "Pod",
+        "metadata": {"name": name, "namespace": "shop"},
+        "spec": {"containers": [
+            {"name": "proxy", "resources": {"limits": {"memory": "64Mi"}}},
+            {"name": "app", "resources": {"limits": {"memory": "512Mi"}, "requests": {"memory": "256Mi"}}},
+        ]},
+        "status": {"phase": "Running", "containerStatuses": [sidecar, app]},
+    }
+
+
+def _event(name: str, message: str = "Back-off restarting failed container app in pod") -> dict:
+    return {"kind": "Event", "type": "Warning", "reason": "BackOff", "message": message,
+            "involvedObject": {"kind": "Pod", "name": name, "namespace": "shop"},
+            "source": {"component": "kubelet"}, "lastTimestamp": "2024-01-15T14:00:00Z"}
+
+
+def _source(*objects) -> io.StringIO:
+    return io.StringIO(json.dumps({"kind": "List", "items": list(objects)}))
+
+
+def test_fields_match_parsed_describe_text():
+    event = _event("api-0")
+    view  = PodView(_pod("api-0"), [(event_row(event), event["message"])])
+    parsed = collect(view.text)
+    paths = ["namespace", "container.name", "container.limits.memory", "container.requests.memory",
+             "container.restart count", "container.state.reason", "container.last state.reason",
+             "container.last state.exit code", "container.state.exit code"]
+    for rule in rules.current().rules:
+        mine, theirs = view.container_for(rule.triggers), parsed.container_for(rule.triggers)
+        assert [view.lookup(p, mine) for p in paths] == [parsed.lookup(p, theirs) for p in paths]
+
+
+def test_signals_come_from_the_failing_container():
+    [(pod, summary, state)] = list(detect_objects([_source(_pod("api-0"))]))
+    assert pod == "shop/api-0"
+    assert state["failure_type"] is not None
+    assert state["signals"]["container"] == "app"
+    assert state["signals"]["memory_limit"] == "512Mi"
+    assert summary == {"restart_count": 9, "last_termination_reason": "OOMKilled",
+                       "memory_limit": "512Mi", "waiting_reason": "CrashLoopBackOff"}
+
+
+def test_events_before_and_shortly_after_their_pod_are_attached():
+    objects = [_event("a", "first"), _pod("a"), _event("a", "second"), _pod("b"), _event("c", "orphan")]
+    found = {pod: state["raw_logs"] for pod, _, state in detect_objects([_source(*objects)])}
+    assert list(found) == ["shop/a", "shop/b", "shop/c"]
+    assert "first" in found["shop/a"] and "second" in found["shop/a"]
+    assert "Events:" not in found["shop/b"]
+    assert "orphan" in found["shop/c"]
+
+
+def test_pods_are_reported_before_the_input_ends(monkeypatch):
+    monkeypatch.setattr(podlist, "HOLD_PODS", 2)
+    monkeypatch.setattr(podlist, "CHUNK_SIZE", 256)
+    source = _source(*(_pod(f"api-{i}", failing=False) for i in range(50)))
+    size   = len(source.getvalue())
+    pods   = detect_objects([source])
+    first  = next(pods)
+    assert first[0] == "shop/api-0"
+    assert source.tell() < size / 4            # three pods in, not the whole list
+    assert len(list(pods)) == 49
+
+
+def test_run_podlist_writes_grouped_pods_in_order(monkeypatch):
+    monkeypatch.setattr(podlist, "MAX_WAITING", 2)
+    names   = [f"api-7d9f8c6bd5-{suffix}" for suffix in ("x2bkq", "c4tzn", "m8wqd", "r5vhl")]
+    objects = [_pod(names[0]), _pod("web-0", failing=False), *(_pod(n) for n in names[1:])]
+    out = io.StringIO()
+    stats = run_podlist([_source(*objects)], out, "", "model", llm_concurrency=2)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["pod"] for line in lines] == [f"shop/{n}" for n in names]
+    assert (stats["failing"], stats["analyses"], stats["groups"]) == (4, 1, 1)
+    assert len({line["group"] for line in lines}) == 1
+    assert all(line["report"]["failure_type"] == lines[0]["failure_type"] for line in lines)
+
+
+@pytest.mark.parametrize("order", ["events first", "pods first"])
+def test_separate_files(order, tmp_path):
+    pods, events = tmp_path / "pods.json", tmp_path / "events.json"
+    pods.write_text(json.dumps({"kind": "PodList", "items": [_pod("a"), _pod("b")]}), encoding="utf-8")
+    events.write_text(json.dumps({"kind": "EventList", "items": [_event("a"), _event("b")]}), encoding="utf-8")
+    sources = [events, pods] if order == "events first" else [pods, events]
+    found = {pod: state for pod, _, state in detect_objects(sources)}
+    assert sorted(found) == ["shop/a", "shop/b"]
+    # Both pods are still held when the events file is read
+    assert all("Back-off" in state["raw_logs"] for state in found.values())
@@ -0,0 +1,118 @@
+# tests/test_rules.py
+# Rule packs: validation, overrides, hot reload, and which rule wins when a
+# crash-looping pod also logs job or probe noise.
+
+import json
+
+import pytest
+
+import rules
+from detector import detect
+from rules import RuleError, load_index
+from samples import SAMPLES
+
+CRASHLOOP = SAMPLES["CrashLoopBackOff"]
+
+
+def _pack(path, *rule_list) -> str:
+    path.write_text(json.dumps({"rules": list(rule_list)}), encoding="utf-8")
+    return str(path)
+
+
+def _rule(**fields) -> dict:
+    return {"id": "site", "failure_type": "Site Failure", "priority": 5, "triggers": ["site broke"], **fields}
+
+
+@pytest.fixture
+def site_rules(tmp_path, monkeypatch):
+    """A site pack directory in $KUBE_DEBUG_RULES, with the live index reset around the test."""
+    monkeypatch.setenv("KUBE_DEBUG_RULES", str(tmp_path))
+    monkeypatch.setattr(rules, "_current", None)
+    monkeypatch.setattr(rules, "_stamp", None)
+    monkeypatch.setattr(rules, "_checked", 0.0)
+    return tmp_path
+
+
+# ── Priorities ───────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("noise", [
+    "rpc error: code = DeadlineExceeded desc = context deadline exceeded\n",
+    "Warning  Unhealthy  kubelet  Readiness probe failed: HTTP probe failed with statuscode: 503\n",
+])
+def test_incidental_lines_do_not_outrank_crashloop(noise):
+    assert detect(noise + CRASHLOOP)["failure_type"] == "CrashLoopBackOff"
+
+
+@pytest.mark.parametrize("line", [
+    "Warning  BackoffLimitExceeded  job-controller  Job has reached the specified backoff limit\n",
+    "Reason:  DeadlineExceeded\nMessage: Job was active longer than specified deadline\n",
+])
+def test_job_failures_are_detected(line):
+    assert detect(line)["failure_type"] == "Job Failed (BackoffLimitExceeded / DeadlineExceeded)"
+
+
+def test_liveness_failures_still_outrank_crashloop():
+    line = "Warning  Unhealthy  kubelet  Liveness probe failed: Get http://10.0.0.5:8080/healthz: timeout\n"
+    assert detect(line + CRASHLOOP)["failure_type"] == "Probe Failure"
+
+
+# ── Loading ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize("raw, message", [
+    (_rule(triggers=["site (broke"]),          "invalid regex"),
+    (_rule(triggers=["Site Broke"]),           "lower case"),
+    (_rule(triggers=[]),                       "non-empty list"),
+    (_rule(priority="high"),                   "'priority' must be an integer"),
+    (_rule(colour="red"),                      "unknown key"),
+    (_rule(failure_type="CrashLoopBackOff"),   "also used by rule 'crashloop'"),
+])
+def test_bad_rules_are_rejected(tmp_path, raw, message):
+    with pytest.raises(RuleError, match=message):
+        load_index(rules.rule_paths()[:2] + [_pack(tmp_path / "site.json", raw)])
+
+
+def test_bad_json_is_rejected(tmp_path):
+    path = tmp_path / "site.json"
+    path.write_text('{"rules": [', encoding="utf-8")
+    with pytest.raises(RuleError, match="site.json"):
+        load_index([path])
+
+
+def test_a_site_rule_overrides_a_builtin(site_rules):
+    _pack(site_rules / "site.json", {**_rule(id="crashloop", failure_type="CrashLoopBackOff"),
+                                     "triggers": ["crashloopbackoff"], "is_root_cause": True})
+    index = rules.current()
+    assert [r.id for r in index.rules].count("crashloop") == 1
+    assert index.by_failure_type["CrashLoopBackOff"].source == "site.json"
+    assert detect(CRASHLOOP)["is_root_cause"] is True
+
+
+def test_packs_are_hot_reloaded(site_rules, capsys):
+    path = site_rules / "site.json"
+    assert detect("site broke at 12:00") is None
+
+    _pack(path, _rule())
+    rules.reload()                                   # instead of waiting RELOAD_INTERVAL
+    assert detect("site broke at 12:00")["failure_type"] == "Site Failure"
+
+    # A broken edit keeps the rules already loaded
+    path.write_text('{"rules": [', encoding="utf-8")
+    before = rules.current()
+    assert rules.reload() is before
+    assert detect("site broke at 12:00")["failure_type"] == "Site Failure"
+    assert "keeping the previous rules" in capsys.readouterr().err
+
+
+# ── Index ────────────────────────────────────────────────────────────────────
+
+def test_each_rule_is_indexed_by_its_own_literal(tmp_path):
+    many  = [_rule(id=f"r{i}", failure_type=f"Synthetic {i}", triggers=[f"synthetic failure {i:03d}"])
+             for i in range(200)]
+    index = load_index([_pack(tmp_path / "many.json", *many)])
+    assert len(index._literals) == 200 and not index._unindexed
+
+    text = "startup ok\nsynthetic failure 123 in worker\n"
+    pos, (first, last) = index.first_match(text, text.lower())
+    assert index.rules[pos].id == "r123"
+    assert text[first:last + 1] == "synthetic failure 123"
+    assert index.first_match("startup ok\n", "startup ok\n") == (None, ())
@@ -0,0 +1,61 @@
+# tests/test_singleflight.py
+# Identical analyses that overlap in time make one upstream call and share its result.
+
+import asyncio
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bench.stub import ANSWER
+from graph import arun_graph, run_graph
+from samples import SAMPLES
+
+MODEL = "llama-3.3-70b-versatile"
+N     = 8
+LOG   = SAMPLES["CrashLoopBackOff"]
+
+
+def _run_threads(n: int) -> list:
+    barrier = threading.Barrier(n)
+
+    def one(_):
+        barrier.wait()
+        return run_graph(LOG, "gsk_test", MODEL)
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        return list(pool.map(one, range(n)))
+
+
+def _run_async(n: int) -> list:
+    async def main():
+        return await asyncio.gather(*(arun_graph(LOG, "gsk_test", MODEL) for _ in range(n)))
+    return asyncio.run(main())
+
+
+def _shared(report: dict) -> dict:
+    # Only the leader built a prompt, and each report says whether it led
+    return {k: v for k, v in report.items() if k not in ("analysis_source", "prompt_chars")}
+
+
+@pytest.mark.parametrize("run", [_run_threads, _run_async], ids=["threads", "async"])
+def test_concurrent_identical_analyses_share_one_call(run, stub_llm):
+    stub_llm.latency = 0.3
+    reports = run(N)
+    assert stub_llm.calls == 1
+    assert Counter(r["analysis_source"] for r in reports) == {"llm": 1, "coalesced": N - 1}
+    assert all(_shared(r) == _shared(reports[0]) for r in reports)
+    assert reports[0]["root_cause"] == ANSWER["root_cause"]
+
+
+@pytest.mark.parametrize("run", [_run_threads, _run_async], ids=["threads", "async"])
+def test_leader_error_is_not_shared(run, stub_llm):
+    # Only the first call fails: its caller falls back, the others retry and share the second call
+    stub_llm.latency, stub_llm.error, stub_llm.failures = 0.3, RuntimeError("upstream down"), 1
+    reports = run(N)
+    assert stub_llm.calls == 2
+    assert Counter(r["analysis_source"] for r in reports) == {"fallback": 1, "llm": 1, "coalesced": N - 2}
+    failed = next(r for r in reports if r["analysis_source"] == "fallback")
+    assert "upstream down" in failed["root_cause"]
+    assert all(r["root_cause"] == ANSWER["root_cause"] for r in reports if r is not failed)
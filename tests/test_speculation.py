@@ -0,0 +1,41 @@
+# tests/test_speculation.py
+# speculate(): a complete rule-based report at once, upgraded to the LLM's.
+
+import metrics
+from graph import run_direct, speculate
+from nodes import ANALYSIS_KEYS
+from samples import SAMPLES
+
+MODEL = "llama-3.3-70b-versatile"
+LOG   = SAMPLES["OOMKilled / Exit Code 137"]
+
+
+def test_without_key_the_first_report_is_final():
+    spec = speculate(LOG, "", MODEL)
+    assert spec.done() and list(spec.updates(timeout=1)) == []
+    assert spec.report == {**run_direct(LOG, "", MODEL), "provisional": []}
+
+
+def test_provisional_report_is_upgraded(stub_llm):
+    stub_llm.latency = 0.2
+    spec = speculate(LOG, "gsk_test", MODEL)
+    first = spec.report
+    assert first["analysis_source"] == "provisional" and first["provisional"] == list(ANALYSIS_KEYS)
+    assert all(first[key] for key in ANALYSIS_KEYS)     # complete from the start
+
+    updates = list(spec.updates(timeout=5))
+    final = spec.result(timeout=5)
+    assert updates[-1] == final == spec.report
+    assert final == {**run_direct(LOG, "gsk_test", MODEL), "provisional": []}
+    # Streamed fields land one by one: each update has fewer provisional fields
+    pending = [len(u["provisional"]) for u in updates]
+    assert pending == sorted(pending, reverse=True) and len(updates) > 2
+
+
+def test_speculation_is_traced(stub_llm):
+    metrics.reset()
+    speculate(LOG, "gsk_test", MODEL).result(timeout=5)
+    spans = {s["name"]: s for s in metrics.recent_spans()}
+    assert {"speculate", "detect", "speculate_upgrade", "analyze", "format"} <= set(spans)
+    assert len({s["trace_id"] for s in spans.values()}) == 1
+    assert metrics.snapshot()["analyze"]["prompt_tokens"] == 100
@@ -0,0 +1,54 @@
+# tests/test_streaming.py
+# Streaming detection over inputs larger than one chunk must match a full scan.
+
+import io
+
+import pytest
+
+import detector
+from samples import SAMPLES
+from streaming import CHUNK_SIZE, detect_file, detect_stream
+
+NOISE = "".join(f"2024-01-15T14:23:{i % 60:02d}Z INFO app request {i} served in 12ms\n" for i in range(60_000))
+
+# Every OOM signal matches in the first lines, so a stream could stop there —
+# but the describe Containers block at the end changes the field-read ones.
+SIGNALS_FIRST = (
+    "Events:\n  Warning  OOMKilling  kernel  Memory cgroup out of memory: Kill process 1\n"
+    "Limits:\n  memory:   1Gi\nRequests:\n  memory:   256Mi\nRestart Count:  4\n"
+    "java.lang.OutOfMemoryError: Java heap space\noom_kill_process\n"
+)
+CONTAINERS_LAST = (
+    "Name:         web-7d9f\nNamespace:    default\nContainers:\n  web:\n    State:          Waiting\n"
+    "      Reason:       CrashLoopBackOff\n    Last State:     Terminated\n      Reason:       OOMKilled\n"
+    "      Exit Code:    137\n    Restart Count:  9\n    Limits:\n      memory:  512Mi\n"
+)
+
+
+def _streamed(text: str, tmp_path) -> tuple[dict, dict]:
+    path = tmp_path / "pod.log"
+    path.write_text(text, encoding="utf-8")
+    state = detect_file(path)
+    return detect_stream(io.StringIO(text)), {"failure_type": state["failure_type"], "signals": state["signals"]}
+
+
+def test_streamed_matches_full_scan_after_describe_block(tmp_path):
+    text = SIGNALS_FIRST + NOISE + CONTAINERS_LAST
+    assert len(text) > 3 * CHUNK_SIZE
+    full = detector.detect(text)
+    assert full["signals"]["container"] == "web" and full["signals"]["memory_limit"] == "512Mi"
+    stream, from_file = _streamed(text, tmp_path)
+    assert stream == full
+    assert from_file == {"failure_type": full["failure_type"], "signals": full["signals"]}
+
+
+@pytest.mark.parametrize("name", sorted(SAMPLES))
+@pytest.mark.parametrize("layout", ["head", "tail", "both"])
+def test_large_sample_matches_full_scan(name, layout, tmp_path):
+    sample = SAMPLES[name]
+    text = {"head": sample + NOISE, "tail": NOISE + sample, "both": sample + NOISE + sample + NOISE}[layout]
+    assert len(text) > CHUNK_SIZE
+    full = detector.detect(text)
+    stream, from_file = _streamed(text, tmp_path)
+    assert stream == full
+    assert from_file == {"failure_type": full["failure_type"], "signals": full["signals"]}
@@ -0,0 +1,67 @@
+# tests/test_watch.py
+# Watch mode reports each classification change once, including recoveries and deletions.
+
+import io
+import json
+
+from samples import SAMPLES
+from watch import Watcher, run_watch
+
+POD = "shop/api-7d9f8c6bd5-x2bkq"
+
+
+def _pod(waiting: str | None) -> dict:
+    state = {"waiting": {"reason": waiting, "message": "back-off 5m0s restarting failed container"}} if waiting \
+        else {"running": {"startedAt": "2024-01-15T14:23:00Z"}}
+    return {
+        "metadata": {"name": "api-7d9f8c6bd5-x2bkq", "namespace": "shop"},
+        "spec":     {"containers": [{"name": "api"}]},
+        "status":   {"phase": "Running", "containerStatuses": [
+            {"name": "api", "restartCount": 7 if waiting else 0, "state": state,
+             "lastState": {"terminated": {"reason": "Error", "exitCode": 1}} if waiting else {}},
+        ]},
+    }
+
+
+def _event(kind: str, waiting: str | None = "CrashLoopBackOff") -> dict:
+    return {"type": kind, "object": _pod(waiting)}
+
+
+def test_status_change_is_reported_once():
+    watcher = Watcher()
+    assert watcher.handle(_event("ADDED", None)) is None
+    change = watcher.handle(_event("MODIFIED"))
+    assert (change["pod"], change["from"], change["to"]) == (POD, None, "CrashLoopBackOff")
+    assert change["status"]["restart_count"] == 7
+    assert watcher.handle(_event("MODIFIED")) is None
+    recovery = watcher.handle(_event("MODIFIED", None))
+    assert (recovery["from"], recovery["to"]) == ("CrashLoopBackOff", None)
+
+
+def test_log_lines_reclassify_only_on_new_matches():
+    watcher = Watcher()
+    lines = SAMPLES["CreateContainerConfigError"].splitlines()
+    changes = [c for c in (watcher.handle({"type": "LOG", "pod": POD, "line": line}) for line in lines) if c]
+    assert [c["to"] for c in changes] == ["CreateContainerConfigError"]
+    assert watcher.handle({"type": "LOG", "pod": POD, "line": "INFO request served"}) is None
+
+
+def test_deleting_a_failing_pod_ends_its_failure():
+    watcher = Watcher()
+    watcher.handle(_event("ADDED"))
+    change = watcher.handle(_event("DELETED"))
+    assert (change["from"], change["to"], change["deleted"]) == ("CrashLoopBackOff", None, True)
+    assert POD not in watcher.pods
+    # A healthy pod goes quietly
+    watcher.handle(_event("ADDED", None))
+    assert watcher.handle(_event("DELETED", None)) is None
+
+
+def test_run_watch_writes_every_change():
+    events = [_event("ADDED"), _event("MODIFIED"), _event("DELETED")]
+    out = io.StringIO()
+    stats = run_watch(events, out, "", "model", llm_concurrency=1)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert stats["changes"] == 2 and stats["pods"] == 0
+    assert sorted((line["to"] or "", line["report"] is None) for line in lines) == \
+        [("", True), ("CrashLoopBackOff", False)]
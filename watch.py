@@ -0,0 +1,315 @@
+# watch.py
+# Watch mode — long-running, incremental per-pod detection over a stream of
+# pod status updates and log lines. Each pod keeps a few hundred bytes of
+# state; analysis runs only when a pod's classification changes.
+#
+#   python watch.py events.jsonl -o changes.jsonl
+#   kubectl get pods -A -w -o json | jq -c '{type:"MODIFIED",object:.}' | python watch.py -
+#   python watch.py events.jsonl --follow          # keep reading as the file grows
+#   python watch.py - --metrics-port 9464          # live /metrics for Prometheus
+#
+# Input: one JSON object per line, either a Kubernetes watch event for a pod
+#   {"type": "ADDED" | "MODIFIED" | "DELETED", "object": {<Pod>}}
+# or a log line (or batch of lines) for a pod
+#   {"type": "LOG", "pod": "namespace/name", "line": "..."}   /   "lines": [...]
+#
+# Output: one JSON line per classification change (pod, from, to, status, report);
+# if the analysis fails, report is null and "error" says why. A failing pod that
+# is deleted gets a change to null, like a recovery, with "deleted": true.
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import rules
+from detector import detect, search
+from podlist import render_pod
+from rules import HINTS
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+TAIL_LINES    = 50          # recent log lines per pod, sent along for context
+POLL_INTERVAL = 0.5         # seconds between reads when following a file
+
+
+class _LineTables:
+    """
+    Per rule index: every trigger pattern, as (lower-case pattern for lowered
+    ASCII text, IGNORECASE twin), then every signal pattern as (pattern, None).
+    A log line is kept for a pod only if it holds that pod's first match of
+    one of them.
+    """
+    __slots__ = ("index", "patterns", "candidate")
+
+    def __init__(self, index: rules.RuleIndex):
+        self.index    = index
+        self.patterns = tuple(dict.fromkeys(
+            [pats for rule in index.rules for pats in rule.triggers]
+            + [(rx, None) for rx in index.patterns_through(None)]
+        ))
+        # Cheap first test: can this line match anything at all? Hints are lower
+        # case, so ASCII lines are lowered once and matched case-sensitively;
+        # patterns without a hint go in whole, case-insensitive.
+        alternatives = []
+        for rx, _ in self.patterns:
+            hints = HINTS.get(rx)
+            alternatives += [re.escape(h) for h in hints] if hints else [f"(?i:{rx.pattern})"]
+        candidate = "|".join(dict.fromkeys(alternatives))
+        try:
+            self.candidate = (re.compile(candidate), re.compile(candidate, re.IGNORECASE))
+        except re.error:                     # a pattern that can't be embedded: test every line
+            self.candidate = None
+
+
+# ── Per-pod state ─────────────────────────────────────────────────────────────
+
+class PodTracker:
+    """
+    Incremental detector state for one pod: the rendered current status, the
+    log lines that hold the first match of each pattern, and a short tail.
+    History is never rescanned — each event costs one small re-classification.
+    """
+    __slots__ = ("name", "status_text", "status", "_first", "_seq", "_tables", "tail", "failure_type")
+
+    def __init__(self, name: str, tables: _LineTables):
+        self.name         = name
+        self.status_text  = ""
+        self.status       = {}
+        self._first       = {}                    # pattern pair → (seq, line) of its first log match
+        self._seq         = 0
+        self._tables      = tables
+        self.tail         = deque(maxlen=TAIL_LINES)
+        self.failure_type = None
+
+    def update_status(self, pod: dict) -> None:
+        self.status_text, self.status = render_pod(pod)
+
+    def add_log(self, line: str) -> bool:
+        """Record a log line. Returns True if it holds a new first match (re-classify)."""
+        if not line.endswith("\n"):
+            line += "\n"
+        self.tail.append(line)
+        self._seq += 1
+        low = line.lower() if line.isascii() else None
+        candidate = self._tables.candidate
+        if candidate and not (candidate[0].search(low) if low is not None else candidate[1].search(line)):
+            return False
+        return self._scan(self._seq, line, low)
+
+    def _scan(self, seq: int, line: str, low: str | None) -> bool:
+        new = False
+        for pats in self._tables.patterns:
+            if pats in self._first:
+                continue
+            rx, folded = pats
+            if folded is None:
+                m = search(rx, line, low)
+            else:
+                m = rx.search(low) if low is not None else folded.search(line)
+            if m:
+                self._first[pats] = (seq, line)
+                new = True
+        return new
+
+    def retable(self, tables: _LineTables) -> None:
+        """
+        Switch to a reloaded rule set. First matches of patterns that remain are
+        kept; new patterns are looked for in the lines still held (kept + tail).
+        """
+        if tables is self._tables:
+            return
+        wanted = set(tables.patterns)
+        held   = sorted(set(self._first.values())
+                        | {(self._seq - len(self.tail) + 1 + i, line) for i, line in enumerate(self.tail)})
+        self._first  = {pats: first for pats, first in self._first.items() if pats in wanted}
+        self._tables = tables
+        for seq, line in held:
+            self._scan(seq, line, line.lower() if line.isascii() else None)
+
+    def evidence_text(self) -> str:
+        """Current status, then the kept log lines in arrival order."""
+        kept = sorted(set(self._first.values()))
+        return self.status_text + "".join(line for _, line in kept)
+
+    def classify(self) -> dict | None:
+        return detect(self.evidence_text())
+
+    def analysis_text(self) -> str:
+        return self.evidence_text() + "".join(self.tail)
+
+
+# ── Watcher ──────────────────────────────────────────────────────────────────
+
+def _pod_name(event: dict) -> str | None:
+    if event.get("type") == "LOG":
+        return event.get("pod")
+    meta = (event.get("object") or {}).get("metadata") or {}
+    if not meta.get("name"):
+        return None
+    return f"{meta.get('namespace', 'default')}/{meta['name']}"
+
+
+class Watcher:
+    """
+    Routes events to per-pod trackers and reports classification changes.
+    After a rule pack reload, each pod switches to the new rules at its next event.
+    """
+
+    def __init__(self):
+        self.pods   = {}
+        self.events = 0
+        self.tables = _LineTables(rules.current())
+
+    def handle(self, event: dict) -> dict | None:
+        """Apply one event. Returns a change record if the pod's classification changed."""
+        self.events += 1
+        name = _pod_name(event)
+        if name is None:
+            return None
+        if event.get("type") == "DELETED":
+            pod = self.pods.pop(name, None)
+            if pod is None or pod.failure_type is None:
+                return None
+            return {"pod": name, "from": pod.failure_type, "to": None,
+                    "event": self.events, "status": dict(pod.status), "deleted": True}
+
+        index = rules.current()
+        if index is not self.tables.index:
+            self.tables = _LineTables(index)
+        pod = self.pods.get(name)
+        if pod is None:
+            pod = self.pods[name] = PodTracker(name, self.tables)
+        else:
+            pod.retable(self.tables)
+
+        if event.get("type") == "LOG":
+            lines = event.get("lines") or [event.get("line", "")]
+            if not any([pod.add_log(line) for line in lines]):
+                return None
+        else:
+            pod.update_status(event.get("object") or {})
+
+        result = pod.classify()
+        failure_type = result["failure_type"] if result else None
+        if failure_type == pod.failure_type:
+            return None
+
+        change = {"pod": name, "from": pod.failure_type, "to": failure_type,
+                  "event": self.events, "status": dict(pod.status)}
+        pod.failure_type = failure_type
+        return change
+
+
+def iter_events(source, follow: bool = False):
+    """Yield decoded JSON events from a path or file object ("-" = stdin). Blank/bad lines are skipped."""
+    fh = sys.stdin if source == "-" else (open(source, encoding="utf-8") if isinstance(source, (str, os.PathLike)) else source)
+    try:
+        partial = ""
+        while True:
+            line = fh.readline()
+            if not line:
+                if not follow:
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+            if follow and not line.endswith("\n"):
+                partial += line             # writer is mid-line; wait for the rest
+                continue
+            line, partial = (partial + line).strip(), ""
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"watch: skipping malformed event: {line[:120]}", file=sys.stderr)
+    finally:
+        if fh is not sys.stdin and fh is not source:
+            fh.close()
+
+
+def _analyze(change: dict, text: str, groq_api_key: str, model: str) -> dict:
+    from graph import run_direct, run_graph
+    runner = run_graph if groq_api_key else run_direct
+    change["report"] = runner(text, groq_api_key, model)
+    return change
+
+
+def run_watch(events, out, groq_api_key: str, model: str, llm_concurrency: int = 4) -> dict:
+    """
+    Consume events, writing one JSON line per classification change. Changes to
+    a failure are analyzed in a thread pool; recoveries and deletions are written at once.
+    """
+    watcher = Watcher()
+    changes = 0
+    errors  = []
+    lock    = threading.Lock()
+    t0 = time.perf_counter()
+
+    def write(change):
+        with lock:
+            out.write(json.dumps(change) + "\n")
+            out.flush()
+
+    def finished(fut, change):
+        # A failed analysis still records the change, with the error in place of the report
+        exc = fut.exception()
+        if exc is not None:
+            change["report"] = None
+            change["error"]  = f"{type(exc).__name__}: {exc}"[:300]
+            errors.append(change["pod"])
+        write(change)
+
+    with ThreadPoolExecutor(max_workers=llm_concurrency) as llm:
+        for event in events:
+            change = watcher.handle(event)
+            if change is None:
+                continue
+            changes += 1
+            if change["to"] is None:
+                change["report"] = None
+                write(change)
+            else:
+                text = watcher.pods[change["pod"]].analysis_text()
+                llm.submit(_analyze, change, text, groq_api_key, model).add_done_callback(
+                    lambda fut, change=change: finished(fut, change))
+
+    return {"events": watcher.events, "pods": len(watcher.pods), "changes": changes,
+            "errors": len(errors), "wall": time.perf_counter() - t0}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Watch a JSONL stream of pod updates and log lines.")
+    parser.add_argument("input", help="JSONL event file, or - for stdin")
+    parser.add_argument("-o", "--output", help="JSONL output file for changes (default: stdout)")
+    parser.add_argument("--follow", action="store_true", help="keep reading as the file grows (like tail -f)")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="concurrent analyses")
+    metrics.add_options(parser)
+    args = parser.parse_args(argv)
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with metrics.exposed(args):
+            stats = run_watch(iter_events(args.input, args.follow), out, os.getenv("GROQ_API_KEY", ""),
+                              args.model, args.llm_concurrency)
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = stats["wall"]
+    print(f"{stats['events']} events, {stats['pods']} pods, {stats['changes']} changes in {wall:.2f}s"
+          f" — {stats['events'] / wall if wall else 0:,.0f} events/sec"
+          + (f", {stats['errors']} analyses failed" if stats["errors"] else ""), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())